@@ -0,0 +1,564 @@
+"""
+Модуль пакетного импорта и пакетного изменения продуктов.
+
+Тело запроса (NDJSON или CSV) читается потоком и разбирается построчно,
+каждая строка проверяется схемой `CreateProduct`. Прошедшие проверку
+строки копятся в пачки по `Settings.BULK_BATCH_SIZE`. Пачка загружается
+`COPY` (asyncpg) во временную таблицу и переносится в `products` одним
+`INSERT ... SELECT ... ON CONFLICT (slug) DO UPDATE` с `RETURNING`, каждая
+пачка — в своей транзакции. Неизвестные id категорий проверяются одним
+запросом на пачку (уже проверенные id запоминаются).
+
+Отчёт об импорте отдаётся потоком NDJSON параллельно с чтением тела:
+по строке на каждую строку входных данных и итоговая строка `summary`.
+
+Пакетное изменение цены и остатка (`PATCH /products/bulk`) выполняется одним
+`UPDATE ... FROM (VALUES ...)` на пачку; владение продуктом проверяется
+условием `supplier_id` в том же запросе.
+
+В SQLite нет `COPY` и `FROM (VALUES ...) AS t (колонки)`: пачка импорта
+вставляется обычным `INSERT ... VALUES ... ON CONFLICT`, а изменения цены
+и остатка применяются построчными UPDATE (`stock_update_rows`).
+"""
+
+import codecs
+import csv
+import json
+import time
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from asyncpg import PostgresError
+from pydantic import ValidationError
+from slugify import slugify
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    cast,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.backend.db import is_postgres, session as db_session
+from app.backend.response_cache import response_cache
+from app.backend.suggest import suggest_index
+from app.models.category import Category
+from app.models.products import Product
+from app.schemas import CreateProduct, CurrentUser, UpdateProductStock
+
+# Максимальная длина одной строки входных данных в символах
+MAX_LINE_LENGTH = 64 * 1024
+
+# Целочисленные поля CreateProduct и границы колонки INTEGER
+INTEGER_FIELDS = ("price", "stock", "category")
+INT4_MIN, INT4_MAX = -(2**31), 2**31 - 1
+
+# Поля продукта, которые перезаписываются при совпадении slug
+UPSERT_FIELDS = ("name", "description", "price", "image_url", "stock", "category_id")
+# Поля, которые загружаются в промежуточную таблицу
+STAGED_FIELDS = ("slug", "supplier_id") + UPSERT_FIELDS
+
+# Временная таблица соединения; строки удаляются при каждом COMMIT
+staging_table = Table(
+    "bulk_products",
+    MetaData(),
+    *(Column(field, Product.__table__.c[field].type) for field in STAGED_FIELDS),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[tuple[int, Optional[str]]]:
+    """
+    Разбивает поток байтов на строки UTF-8.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Куски тела запроса.
+        max_length (int): Максимальная длина строки; более длинная строка
+            пропускается целиком.
+
+    Yields:
+        tuple[int, str | None]: Номер строки (с 1) и её текст без перевода
+            строки или None, если строка длиннее `max_length`.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    number = 0
+    overflow = False
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            number += 1
+            if overflow or len(line) > max_length:
+                overflow = False
+                yield number, None
+            else:
+                yield number, line.removesuffix("\r")
+        if len(buffer) > max_length:
+            overflow, buffer = True, ""
+    buffer += decoder.decode(b"", final=True)
+    if buffer or overflow:
+        number += 1
+        yield number, None if overflow else buffer.removesuffix("\r")
+
+
+async def iter_ndjson(
+    lines: AsyncIterator[tuple[int, Optional[str]]],
+) -> AsyncIterator[tuple[int, Any, Optional[str]]]:
+    """
+    Разбирает строки NDJSON.
+
+    Yields:
+        tuple[int, Any, str | None]: Номер строки, объект и текст ошибки разбора.
+    """
+    async for number, line in lines:
+        if line is None:
+            yield number, None, "Line is too long"
+        elif line.strip():
+            try:
+                yield number, json.loads(line), None
+            except ValueError as error:
+                yield number, None, f"Invalid JSON: {error}"
+
+
+async def iter_csv(
+    lines: AsyncIterator[tuple[int, Optional[str]]],
+) -> AsyncIterator[tuple[int, Any, Optional[str]]]:
+    """
+    Разбирает CSV с заголовком; значения в кавычках могут содержать переводы строк.
+
+    Yields:
+        tuple[int, Any, str | None]: Номер первой строки записи, словарь
+            «колонка — значение» и текст ошибки разбора.
+    """
+    header: Optional[list[str]] = None
+    parts: list[str] = []
+    start = 0
+    async for number, line in lines:
+        if line is None:
+            parts = []
+            yield number, None, "Line is too long"
+            continue
+        if not parts:
+            start = number
+        parts.append(line)
+        text = "\n".join(parts)
+        if text.count('"') % 2:  # Запись продолжается на следующей строке
+            continue
+        parts = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield start, None, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield start, dict(zip(header, values)), None
+    if parts:
+        yield start, None, "Unterminated quoted value"
+
+
+PARSERS = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
+
+
+def validation_errors(error: ValidationError) -> list[str]:
+    """Приводит ошибки pydantic к списку строк вида `поле: сообщение`."""
+    return [
+        f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}"
+        for item in error.errors(include_url=False)
+    ]
+
+
+def upsert_statement(own_only: bool):
+    """
+    Строит upsert продуктов по slug из промежуточной таблицы.
+
+    Args:
+        own_only (bool): Перезаписывать только продукты того же поставщика.
+            Строки, не прошедшие условие, не попадают в `RETURNING`.
+
+    Returns:
+        Insert: Запрос, возвращающий id, slug, рейтинг, активность и признак вставки.
+    """
+    statement = pg_insert(Product).from_select(
+        [*STAGED_FIELDS, "rating", "is_active"],
+        select(*staging_table.c, literal(0.0), true()),
+    )
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[Product.slug],
+        set_={
+            **{field: excluded[field] for field in UPSERT_FIELDS},
+            "updated_at": func.now(),
+        },
+        where=(Product.supplier_id == excluded.supplier_id) if own_only else None,
+    )
+    return statement.returning(
+        Product.id,
+        Product.slug,
+        Product.rating,
+        Product.is_active,
+        # xmax = 0 только у только что вставленной версии строки
+        literal_column("(xmax = 0)", Boolean).label("inserted"),
+    )
+
+
+def rows_upsert_statement(
+    rows: list[dict[str, Any]], own_only: bool, existing: set[str]
+):
+    """
+    Строит переносимый upsert пачки продуктов по slug без промежуточной таблицы (SQLite).
+
+    Args:
+        rows: Строки продуктов с полями `STAGED_FIELDS`.
+        own_only (bool): Перезаписывать только продукты того же поставщика.
+        existing (set[str]): Slug пачки, которые уже есть в таблице
+            (вместо `xmax = 0` признак вставки считается по ним).
+
+    Returns:
+        Insert: Запрос с теми же колонками `RETURNING`, что и у `upsert_statement`.
+    """
+    statement = sqlite_insert(Product).values(
+        [{**row, "rating": 0.0, "is_active": True} for row in rows]
+    )
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[Product.slug],
+        set_={
+            **{field: excluded[field] for field in UPSERT_FIELDS},
+            "updated_at": func.now(),
+        },
+        where=(Product.supplier_id == excluded.supplier_id) if own_only else None,
+    )
+    return statement.returning(
+        Product.id,
+        Product.slug,
+        Product.rating,
+        Product.is_active,
+        Product.slug.not_in(existing).label("inserted"),
+    )
+
+
+def stock_update_statement(
+    items: Sequence[tuple[int, UpdateProductStock]], supplier_id: Optional[int]
+):
+    """
+    Строит `UPDATE ... FROM (VALUES ...)` для пачки изменений цены и остатка.
+
+    Args:
+        items: Пары (номер элемента в запросе, изменение).
+        supplier_id (int | None): Изменять только продукты этого поставщика;
+            None — любые продукты (администратор).
+
+    Returns:
+        Update: Запрос, возвращающий номер элемента, id, slug, цену и остаток
+            изменённых продуктов. Чужие и несуществующие продукты в `RETURNING`
+            не попадают.
+    """
+    changes = values(
+        Column("position", Integer),
+        Column("id", Integer),
+        Column("slug", String),
+        Column("price", Integer),
+        Column("stock", Integer),
+        name="changes",
+    ).data(
+        [
+            (position, item.id, item.slug, item.price, item.stock)
+            for position, item in items
+        ]
+    )
+    # NULL в VALUES не несёт типа: колонка из одних NULL получила бы тип text
+    change_id = cast(changes.c.id, Integer)
+    statement = (
+        update(Product)
+        .where(or_(Product.id == change_id, Product.slug == changes.c.slug))
+        .values(
+            price=func.coalesce(cast(changes.c.price, Integer), Product.price),
+            stock=func.coalesce(cast(changes.c.stock, Integer), Product.stock),
+        )
+        .returning(
+            changes.c.position, Product.id, Product.slug, Product.price, Product.stock
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if supplier_id is not None:
+        statement = statement.where(Product.supplier_id == supplier_id)
+    return statement
+
+
+async def stock_update_rows(
+    ss: AsyncSession,
+    items: Sequence[tuple[int, UpdateProductStock]],
+    supplier_id: Optional[int],
+) -> list:
+    """
+    Применяет пачку изменений цены и остатка построчными UPDATE (SQLite).
+
+    Args:
+        ss (AsyncSession): Сессия базы данных.
+        items: Пары (номер элемента в запросе, изменение).
+        supplier_id (int | None): Изменять только продукты этого поставщика.
+
+    Returns:
+        list: Строки с теми же колонками, что и `RETURNING` у `stock_update_statement`.
+    """
+    updated = []
+    for position, item in items:
+        statement = (
+            update(Product)
+            .where(
+                Product.id == item.id
+                if item.id is not None
+                else Product.slug == item.slug
+            )
+            .values(
+                {
+                    field: value
+                    for field, value in (("price", item.price), ("stock", item.stock))
+                    if value is not None
+                }
+            )
+            .returning(
+                literal(position).label("position"),
+                Product.id,
+                Product.slug,
+                Product.price,
+                Product.stock,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if supplier_id is not None:
+            statement = statement.where(Product.supplier_id == supplier_id)
+        row = (await ss.execute(statement)).first()
+        if row is not None:
+            updated.append(row)
+    return updated
+
+
+class ProductImporter:
+    """
+    Импорт потока записей о продуктах пачками.
+
+    Атрибуты:
+        user (CurrentUser): Пользователь, от имени которого идёт импорт;
+            становится поставщиком новых продуктов.
+        batch_size (int): Количество строк в одной пачке (`COPY` + `INSERT`).
+        counts (dict[str, int]): Количество строк по статусам отчёта.
+    """
+
+    def __init__(self, user: CurrentUser, batch_size: int) -> None:
+        self.user = user
+        self.batch_size = batch_size
+        self.counts = {"created": 0, "updated": 0, "rejected": 0, "error": 0}
+        self._statement = upsert_statement(own_only=not user.is_admin)
+        self._batch: dict[str, tuple[int, dict[str, Any]]] = {}
+        self._categories: set[int] = set()
+        self._missing_categories: set[int] = set()
+
+    async def run(
+        self, records: AsyncIterator[tuple[int, Any, Optional[str]]]
+    ) -> AsyncIterator[bytes]:
+        """
+        Импортирует записи и отдаёт отчёт.
+
+        Args:
+            records: Записи из `iter_ndjson` или `iter_csv`.
+
+        Yields:
+            bytes: Строки отчёта NDJSON; ошибки проверки отдаются сразу,
+                результаты записи — после каждой пачки.
+        """
+        started = time.perf_counter()
+        async for number, record, error in records:
+            if error is not None:
+                yield self._report(number, "error", errors=[error])
+                continue
+            try:
+                product = CreateProduct.model_validate(record)
+            except ValidationError as validation_error:
+                yield self._report(
+                    number, "error", errors=validation_errors(validation_error)
+                )
+                continue
+            out_of_range = [
+                f"{field}: Value out of range"
+                for field in INTEGER_FIELDS
+                if not INT4_MIN <= getattr(product, field) <= INT4_MAX
+            ]
+            if out_of_range:
+                yield self._report(number, "error", errors=out_of_range)
+                continue
+            slug = slugify(product.name)
+            if not slug:
+                yield self._report(number, "error", errors=["name: Empty slug"])
+                continue
+            if slug in self._batch:  # Повтор slug: более поздняя строка побеждает
+                yield await self._flush()
+            self._batch[slug] = (
+                number,
+                {
+                    "name": product.name,
+                    "slug": slug,
+                    "description": product.description,
+                    "price": product.price,
+                    "image_url": product.image_url,
+                    "stock": product.stock,
+                    "supplier_id": self.user.id,
+                    "category_id": product.category,
+                },
+            )
+            if len(self._batch) >= self.batch_size:
+                yield await self._flush()
+        if self._batch:
+            yield await self._flush()
+        summary = {
+            "rows": sum(self.counts.values()),
+            **self.counts,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        yield (json.dumps({"summary": summary}) + "\n").encode()
+
+    def _report(self, number: int, status: str, **fields: Any) -> bytes:
+        self.counts[status] += 1
+        line = {"line": number, "status": status, **fields}
+        return (json.dumps(line, ensure_ascii=False) + "\n").encode()
+
+    @staticmethod
+    async def _stage(ss: AsyncSession, rows: list[dict[str, Any]]) -> None:
+        # Таблица создаётся один раз на соединение пула и живёт до его закрытия
+        await ss.execute(CreateTable(staging_table, if_not_exists=True))
+        connection = await ss.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            staging_table.name,
+            records=[tuple(row[field] for field in STAGED_FIELDS) for row in rows],
+            columns=STAGED_FIELDS,
+        )
+
+    async def _flush(self) -> bytes:
+        batch, self._batch = self._batch, {}
+        report = []
+        async with db_session() as ss:
+            unknown = {
+                row["category_id"] for _, row in batch.values()
+            } - self._categories
+            if unknown:
+                found = set(
+                    await ss.scalars(
+                        select(Category.id).where(Category.id.in_(unknown))
+                    )
+                )
+                self._categories |= found
+                self._missing_categories |= unknown - found
+            rows = []
+            for slug, (number, row) in list(batch.items()):
+                if row["category_id"] in self._missing_categories:
+                    del batch[slug]
+                    report.append(
+                        self._report(
+                            number,
+                            "error",
+                            slug=slug,
+                            errors=[
+                                f"category: Category {row['category_id']} not found"
+                            ],
+                        )
+                    )
+                else:
+                    rows.append(row)
+            if not rows:
+                return b"".join(report)
+            try:
+                if is_postgres(ss):
+                    await self._stage(ss, rows)
+                    result = await ss.execute(self._statement)
+                else:
+                    existing = set(
+                        await ss.scalars(
+                            select(Product.slug).where(Product.slug.in_(batch))
+                        )
+                    )
+                    result = await ss.execute(
+                        rows_upsert_statement(rows, not self.user.is_admin, existing)
+                    )
+                written = {row.slug: row for row in result}
+                await ss.commit()
+            except (DBAPIError, PostgresError) as error:
+                # Ошибка сервера (в том числе в COPY) откатывает всю пачку
+                await ss.rollback()
+                message = str(getattr(error, "orig", error)).splitlines()[0]
+                for slug, (number, _) in batch.items():
+                    report.append(
+                        self._report(number, "error", slug=slug, errors=[message])
+                    )
+                return b"".join(report)
+        suggest_index.put_products(
+            (product.id, batch[product.slug][1]["name"], product.slug, product.rating)
+            for product in written.values()
+            if product.is_active
+        )
+        for slug, (number, _) in batch.items():
+            product = written.get(slug)
+            if product is None:
+                report.append(
+                    self._report(
+                        number,
+                        "rejected",
+                        slug=slug,
+                        errors=["slug: Product belongs to another supplier"],
+                    )
+                )
+                continue
+            report.append(
+                self._report(
+                    number,
+                    "created" if product.inserted else "updated",
+                    id=product.id,
+                    slug=slug,
+                )
+            )
+        response_cache.invalidate("product:*")
+        return b"".join(report)
+
+
+class ImportReportResponse(StreamingResponse):
+    """
+    Потоковый ответ, который не слушает `receive` во время отправки.
+
+    Обычный `StreamingResponse` параллельно ждёт `http.disconnect` и забирает
+    сообщения с телом запроса, а отчёт импорта пишется, пока тело ещё читается.
+    Отключение клиента обнаруживается при чтении тела (`ClientDisconnect`).
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,98 @@
+"""
+Модуль с простым in-process кэшем для часто читаемых данных.
+
+Предоставляет класс `TTLCache` — LRU-кэш ограниченного размера, в котором
+у каждой записи есть собственное время жизни (TTL).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    LRU-кэш ограниченного размера с временем жизни записей.
+
+    При превышении `maxsize` вытесняется запись, к которой дольше всего
+    не обращались. Просроченные записи удаляются при обращении к ним.
+    Класс не потокобезопасен и рассчитан на работу внутри одного event loop.
+
+    Атрибуты:
+        maxsize (int): Максимальное количество записей.
+        ttl (float): Время жизни записи по умолчанию в секундах.
+        hits (int): Количество попаданий в кэш.
+        misses (int): Количество промахов.
+        evictions (int): Количество записей, вытесненных по размеру или TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key: Hashable) -> Optional[tuple[float, Any]]:
+        """Возвращает живую запись без учёта статистики или None."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            self.evictions += 1
+            return None
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу и помечает запись как недавно использованную.
+
+        Args:
+            key: Ключ записи.
+            default: Значение, возвращаемое при промахе.
+
+        Returns:
+            Any: Закэшированное значение или `default`.
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение, при необходимости вытесняя самые старые записи.
+
+        Args:
+            key: Ключ записи.
+            value: Сохраняемое значение.
+            ttl: Время жизни записи в секундах. По умолчанию `self.ttl`.
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Удаляет запись и возвращает её значение (или `default`)."""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Полностью очищает кэш. Счётчики статистики сохраняются."""
+        self._data.clear()
@@ -0,0 +1,262 @@
+"""
+Модуль с in-memory деревом категорий.
+
+Категории меняются редко, а читаются постоянно, поэтому дерево целиком
+держится в памяти процесса: для каждой категории известны родитель, дети,
+slug и заранее посчитанное множество id всех потомков.
+
+Дерево загружается при старте приложения (`lifespan` в `app/main.py`),
+пересобирается после каждой записи в категории и, кроме того, не живёт
+дольше `Settings.CATEGORY_TREE_TTL` секунд — так подхватываются изменения,
+сделанные другими процессами. Снимок общий для всех запросов процесса,
+поэтому при устаревании он перечитывается из основной БД, а не через сессию
+запроса, которая может смотреть на отстающую реплику.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend import db, reads
+from app.backend.etag import rows_etag
+from app.backend.settings import setting
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryNode:
+    """
+    Узел дерева категорий.
+
+    Атрибуты:
+        id (int): Идентификатор категории.
+        parent_id (int | None): Идентификатор родительской категории.
+        name (str): Название категории.
+        slug (str): Slug категории.
+        is_active (bool): Флаг активности категории.
+        children (tuple[int, ...]): Идентификаторы дочерних категорий.
+        descendants (frozenset[int]): Идентификаторы категории и всех её потомков.
+    """
+
+    id: int
+    parent_id: Optional[int]
+    name: str
+    slug: str
+    is_active: bool
+    children: tuple[int, ...]
+    descendants: frozenset[int]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Возвращает поля категории в том виде, в каком их отдаёт API."""
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "slug": self.slug,
+            "is_active": self.is_active,
+        }
+
+
+def build_nodes(rows: Iterable[Any]) -> dict[int, CategoryNode]:
+    """
+    Строит узлы дерева из строк таблицы категорий.
+
+    Args:
+        rows: Строки с атрибутами id, parent_id, name, slug, is_active.
+
+    Returns:
+        dict[int, CategoryNode]: Узлы дерева по id категории.
+    """
+    rows = {row.id: row for row in rows}
+    children: dict[int, list[int]] = {category_id: [] for category_id in rows}
+    for row in rows.values():
+        if row.parent_id in children and row.parent_id != row.id:
+            children[row.parent_id].append(row.id)
+
+    descendants: dict[int, frozenset[int]] = {}
+    for category_id in rows:
+        # Обход в глубину; посещённые узлы защищают от циклов в parent_id
+        seen = {category_id}
+        stack = [category_id]
+        while stack:
+            for child in children[stack.pop()]:
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        descendants[category_id] = frozenset(seen)
+
+    return {
+        row.id: CategoryNode(
+            id=row.id,
+            parent_id=row.parent_id,
+            name=row.name,
+            slug=row.slug,
+            is_active=bool(row.is_active),
+            children=tuple(sorted(children[row.id])),
+            descendants=descendants[row.id],
+        )
+        for row in rows.values()
+    }
+
+
+def nested_tree(nodes: dict[int, CategoryNode]) -> list[dict[str, Any]]:
+    """
+    Строит дерево активных категорий в виде вложенных словарей.
+
+    Неактивная категория скрывается вместе со всем своим поддеревом.
+
+    Args:
+        nodes (dict[int, CategoryNode]): Узлы дерева по id категории.
+
+    Returns:
+        list[dict]: Корневые категории с вложенными списками `children`.
+    """
+
+    def subtree(node: CategoryNode) -> dict[str, Any]:
+        return {
+            **node.as_dict(),
+            "children": [
+                subtree(nodes[child])
+                for child in node.children
+                if nodes[child].is_active
+            ],
+        }
+
+    roots = [
+        node
+        for node in nodes.values()
+        if node.parent_id not in nodes and node.is_active
+    ]
+    return [subtree(node) for node in sorted(roots, key=lambda node: node.id)]
+
+
+class CategoryTree:
+    """
+    Кэш дерева категорий в памяти процесса.
+
+    Снимок дерева (узлы по id и по slug, готовые ответы для списка
+    и вложенного дерева, а также ETag по версиям категорий) заменяется целиком одним присваиванием, поэтому
+    читатели никогда не видят частично обновлённое дерево.
+
+    Атрибуты:
+        ttl (float): Максимальный возраст снимка в секундах. 0 отключает кэш.
+        loaded_at (float | None): Момент загрузки снимка (time.monotonic).
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.loaded_at: Optional[float] = None
+        self._snapshot: tuple[
+            dict[int, CategoryNode], dict[str, CategoryNode], list, list, str
+        ] = ({}, {}, [], [], rows_etag("categories", []))
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Включён ли кэш дерева категорий."""
+        return self.ttl > 0
+
+    @property
+    def is_fresh(self) -> bool:
+        """Загружен ли снимок и не истёк ли его срок жизни."""
+        return (
+            self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+        )
+
+    def load(self, rows: Iterable[Any]) -> None:
+        """
+        Атомарно заменяет снимок дерева построенным из строк `rows`.
+
+        Строки должны содержать также `updated_at` — из него строится ETag.
+        """
+        rows = sorted(rows, key=lambda row: row.id)
+        nodes = build_nodes(rows)
+        self._snapshot = (
+            nodes,
+            {node.slug: node for node in nodes.values()},
+            [nodes[i].as_dict() for i in sorted(nodes) if nodes[i].is_active],
+            nested_tree(nodes),
+            rows_etag("categories", rows),
+        )
+        self.loaded_at = time.monotonic()
+
+    async def reload(self, session: AsyncSession) -> None:
+        """
+        Перечитывает категории из базы данных и заменяет снимок дерева.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+        """
+        if not self.enabled:
+            return
+        async with self._lock:
+            await self._reload(session)
+
+    async def ensure_fresh(self) -> bool:
+        """
+        Перезагружает дерево из основной БД, если оно не загружено или устарело.
+
+        Конкурентные вызовы ждут одну перезагрузку, а не запускают свои.
+
+        Returns:
+            bool: True, если дерево можно использовать.
+        """
+        if not self.enabled:
+            return False
+        if not self.is_fresh:
+            async with self._lock:
+                if not self.is_fresh:
+                    async with db.session() as ss:
+                        await self._reload(ss)
+        return True
+
+    async def _reload(self, session: AsyncSession) -> None:
+        categories = reads.categories
+        self.load(
+            await reads.fetch_all(
+                session,
+                select(
+                    categories.c.id,
+                    categories.c.parent_id,
+                    categories.c.name,
+                    categories.c.slug,
+                    categories.c.is_active,
+                    categories.c.updated_at,
+                ),
+            )
+        )
+
+    def invalidate(self) -> None:
+        """Помечает снимок устаревшим; он будет перечитан при следующем обращении."""
+        self.loaded_at = None
+
+    def get(self, category_id: int) -> Optional[CategoryNode]:
+        """Возвращает узел по id категории."""
+        return self._snapshot[0].get(category_id)
+
+    def get_by_slug(self, slug: str) -> Optional[CategoryNode]:
+        """Возвращает узел по slug категории."""
+        return self._snapshot[1].get(slug)
+
+    def descendants(self, slug: str) -> Optional[frozenset[int]]:
+        """Возвращает id категории и всех её потомков или None, если slug не найден."""
+        node = self.get_by_slug(slug)
+        return node.descendants if node is not None else None
+
+    def active(self) -> list[dict[str, Any]]:
+        """Возвращает все активные категории в порядке id."""
+        return self._snapshot[2]
+
+    def nested(self) -> list[dict[str, Any]]:
+        """Возвращает дерево активных категорий в виде вложенных словарей."""
+        return self._snapshot[3]
+
+    def etag(self) -> str:
+        """Возвращает ETag снимка, построенный по версиям всех категорий."""
+        return self._snapshot[4]
+
+
+category_tree = CategoryTree(ttl=setting.CATEGORY_TREE_TTL)
@@ -3,22 +3,99 @@
 
 Этот модуль предоставляет функции для инициализации таблиц,
 тестирования подключения к PostgreSQL и получения данных из базы.
+
+Основная СУБД — PostgreSQL (asyncpg). Если `Settings.DATABASE_URL` указывает
+на SQLite (aiosqlite), движок создаётся без настроек asyncpg, а код,
+использующий возможности PostgreSQL, проверяет `is_postgres` и выполняет
+переносимый вариант запроса.
 """
 
 from typing import Optional
 
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from app.backend.settings import setting  # Экземпляр класса Settings
+from app.backend.pool import InstrumentedPool
+from app.backend.metrics import instrument_engine
 
 from app.models.category import Category
 from app.models.products import Product
 from app.models.user import User
 from app.models.review import Review, Base
+from app.models.order import Order, OrderItem
+
+
+def make_engine(url: str) -> AsyncEngine:
+    """
+    Создаёт асинхронный движок с настройками пула из `Settings`.
+
+    Для SQLite настройки asyncpg не передаются, а база в памяти получает
+    пул из одного подключения. Запросы движка учитываются в метриках
+    (`app.backend.metrics`).
 
-engine = create_async_engine(setting.get_path, echo=False)
+    Args:
+        url (str): Строка подключения SQLAlchemy.
+
+    Returns:
+        AsyncEngine: Движок с пулом `InstrumentedPool`.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        in_memory = parsed.database in (None, "", ":memory:")
+        engine = create_async_engine(
+            url,
+            echo=False,
+            poolclass=InstrumentedPool,
+            # База в памяти живёт, пока открыто её единственное подключение:
+            # транзакции выполняются по очереди, подключение не переоткрывается
+            pool_size=1 if in_memory else setting.DB_POOL_SIZE,
+            max_overflow=0 if in_memory else setting.DB_MAX_OVERFLOW,
+            pool_timeout=setting.DB_POOL_TIMEOUT,
+            pool_recycle=-1 if in_memory else setting.DB_POOL_RECYCLE,
+        )
+        # SQLite проверяет внешние ключи (и ON DELETE CASCADE) только по запросу
+        event.listen(engine.sync_engine, "connect", enable_foreign_keys)
+    else:
+        engine = create_async_engine(
+            url,
+            echo=False,
+            poolclass=InstrumentedPool,
+            pool_size=setting.DB_POOL_SIZE,
+            max_overflow=setting.DB_MAX_OVERFLOW,
+            pool_timeout=setting.DB_POOL_TIMEOUT,
+            pool_recycle=setting.DB_POOL_RECYCLE,
+            pool_pre_ping=setting.DB_POOL_PRE_PING,
+            connect_args={
+                # Кэш asyncpg и кэш подготовленных выражений диалекта SQLAlchemy
+                "statement_cache_size": setting.DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": setting.DB_STATEMENT_CACHE_SIZE,
+            },
+        )
+    instrument_engine(engine)
+    return engine
+
+
+def enable_foreign_keys(dbapi_connection, connection_record) -> None:
+    """Включает проверку внешних ключей в новом подключении SQLite."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def is_postgres(ss: AsyncSession) -> bool:
+    """Работает ли сессия с PostgreSQL (иначе нужен переносимый вариант запроса)."""
+    return ss.bind.dialect.name == "postgresql"
+
+
+engine = make_engine(setting.get_path)
 session = async_sessionmaker(bind=engine)
 
 
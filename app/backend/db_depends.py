@@ -15,8 +15,10 @@
 - Проверка корневого эндпоинта `/` на корректный статус-код и тело ответа.
 """
 
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.backend.db import session
+from app.backend.replicas import read_replicas, reads_from_primary
 
 
 async def get_session() -> AsyncSession:
@@ -30,3 +32,23 @@ async def get_session() -> AsyncSession:
             yield ss
         finally:
             await ss.close()  # Закрывает сессию при ошибке
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """
+    Зависимость FastAPI для обработчиков, которые только читают данные.
+    Отдаёт сессию очередной доступной реплики (`Settings.DB_REPLICAS`).
+    Если реплик нет, все они недоступны или клиент только что что-то
+    изменил (cookie `read_primary_until`), отдаёт сессию основной БД.
+    Чтение с реплики отмечается в `request.state` (`read_from_replica`):
+    `cached_response` хранит такие ответы не дольше
+    `Settings.RESPONSE_CACHE_REPLICA_TTL`.
+    """
+    ss = None
+    if read_replicas and not reads_from_primary(request):
+        ss = await read_replicas.session()
+        request.state.read_replica = ss is not None
+    if ss is None:
+        ss = session()
+    async with ss:
+        yield ss
@@ -0,0 +1,78 @@
+"""
+Модуль для условных GET-запросов (ETag / If-None-Match).
+
+У продуктов, категорий и отзывов есть колонка `updated_at`, которую
+SQLAlchemy обновляет в каждом UPDATE (`onupdate`). ETag ответа строится
+из версий строк, попавших в ответ, поэтому он меняется при любом изменении
+этих строк. Если клиент прислал совпадающий `If-None-Match`, эндпоинт
+отвечает `304 Not Modified`, не загружая и не сериализуя тело ответа.
+"""
+
+import hashlib
+import json
+from typing import Any, Iterable
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строит сильный ETag из частей ответа.
+
+    Args:
+        *parts: Значения, от которых зависит тело ответа (версии строк,
+            строка запроса и т.п.). datetime приводится к строке.
+
+    Returns:
+        str: ETag в кавычках, например `"3f2a..."`.
+    """
+    raw = json.dumps(parts, default=str, separators=(",", ":")).encode()
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def rows_etag(prefix: Any, rows: Iterable[Any]) -> str:
+    """
+    Строит ETag списка по версиям его строк.
+
+    Args:
+        prefix: Значение, отличающее списки друг от друга (например, строка запроса).
+        rows: Строки с атрибутами `id` и `updated_at`.
+
+    Returns:
+        str: ETag списка.
+    """
+    return make_etag(prefix, [(row.id, row.updated_at) for row in rows])
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет, совпадает ли заголовок `If-None-Match` запроса с ETag.
+
+    Сравнение слабое (RFC 9110): префикс `W/` игнорируется.
+
+    Args:
+        request (Request): Входящий запрос.
+        etag (str): Текущий ETag ответа.
+
+    Returns:
+        bool: True, если у клиента актуальная версия ответа.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for tag in header.split(",")
+    )
+
+
+def has_conditional(request: Request) -> bool:
+    """Прислал ли клиент заголовок `If-None-Match`."""
+    return "if-none-match" in request.headers
+
+
+def not_modified(etag: str) -> Response:
+    """Возвращает пустой ответ `304 Not Modified` с текущим ETag."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
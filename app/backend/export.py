@@ -0,0 +1,113 @@
+"""
+Модуль потоковой выгрузки каталога продуктов.
+
+Строки читаются серверным курсором (`reads.stream_partitions`: Core-запрос
+на подключении сессии с `yield_per`) пачками по `EXPORT_CHUNK_SIZE` и сразу
+сериализуются в NDJSON или CSV, поэтому память процесса не зависит
+от размера каталога: одновременно в памяти находится не больше одной пачки
+строк.
+
+Выгрузка открывает собственную сессию: `StreamingResponse` отдаёт тело
+уже после того, как сессия запроса (зависимость `get_read_session`) закрыта.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import session as db_session
+from app.backend.reads import stream_partitions
+from app.models.products import Product
+
+# Количество строк в одной пачке серверного курсора и в одном куске ответа
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.slug,
+    Product.description,
+    Product.price,
+    Product.image_url,
+    Product.stock,
+    Product.rating,
+    Product.category_id,
+    Product.supplier_id,
+    Product.is_active,
+    Product.updated_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def ndjson_chunk(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Сериализует пачку строк в NDJSON (по объекту JSON на строку)."""
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, row)), default=_default, ensure_ascii=False)
+        + "\n"
+        for row in rows
+    ).encode()
+
+
+def csv_chunk(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Сериализует пачку строк в CSV (без заголовка)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode()
+
+
+def csv_header() -> bytes:
+    """Возвращает строку заголовка CSV."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_FIELDS)
+    return buffer.getvalue().encode()
+
+
+SERIALIZERS: dict[str, Callable[[Sequence[Sequence[Any]]], bytes]] = {
+    "ndjson": ndjson_chunk,
+    "csv": csv_chunk,
+}
+
+
+async def stream_export(
+    statement: Select,
+    export_format: str,
+    session_factory: Callable[[], AsyncSession] = db_session,
+) -> AsyncIterator[bytes]:
+    """
+    Выполняет запрос серверным курсором и отдаёт результат кусками.
+
+    Args:
+        statement (Select): Запрос, выбирающий `EXPORT_COLUMNS`.
+        export_format (str): Формат выгрузки: ndjson или csv.
+        session_factory: Фабрика сессий (по умолчанию — основная БД; обработчик
+            передаёт фабрику той же реплики, что и у сессии запроса).
+
+    Yields:
+        bytes: Очередной кусок тела ответа (до `EXPORT_CHUNK_SIZE` строк).
+    """
+    serialize = SERIALIZERS[export_format]
+    if export_format == "csv":
+        yield csv_header()
+    async with session_factory() as ss:
+        async for rows in stream_partitions(ss, statement, EXPORT_CHUNK_SIZE):
+            yield serialize(rows)
@@ -0,0 +1,325 @@
+"""
+Модуль метрик запросов в формате Prometheus.
+
+`MetricsMiddleware` считает запросы по маршрутам (шаблон пути FastAPI,
+например `/products/{product_slug}`, а не конкретный URL), время обработки
+и размер ответа. Обработчики событий `before_cursor_execute` /
+`after_cursor_execute`, которые `instrument_engine` вешает на движки
+из `app.backend.db`, замеряют каждый запрос к БД и приписывают его к текущему
+HTTP-запросу через `ContextVar`.
+
+Сравнение `http_request_db_seconds_total` с `http_request_duration_seconds_sum`
+по маршруту показывает, упирается обработчик в БД или в процессор
+(bcrypt, сериализация). Всё это отдаёт `GET /metrics`.
+"""
+
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Верхние границы корзин гистограмм
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Метка маршрута для запросов, не совпавших ни с одним маршрутом (404)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами.
+
+    Атрибуты:
+        buckets (tuple): Верхние границы корзин по возрастанию.
+        total (float): Сумма наблюдений.
+        count (int): Количество наблюдений.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.total = 0.0
+        self.count = 0
+        self._counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        """Учитывает одно наблюдение."""
+        self.total += value
+        self.count += 1
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Кумулятивные счётчики корзин: пары (граница `le`, количество)."""
+        result, total = [], 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class RequestStats:
+    """
+    Запросы к БД, выполненные в рамках одного HTTP-запроса.
+
+    Атрибуты:
+        queries (int): Количество запросов к БД.
+        db_seconds (float): Суммарное время запросов к БД.
+    """
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Статистика текущего HTTP-запроса; None вне запроса (фоновые задачи, lifespan)
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+class RouteStats:
+    """
+    Метрики одного маршрута (метод + шаблон пути).
+
+    Атрибуты:
+        duration (Histogram): Время обработки запроса в секундах.
+        size (Histogram): Размер тела ответа в байтах.
+        db_queries (int): Количество запросов к БД.
+        db_seconds (float): Суммарное время запросов к БД.
+    """
+
+    def __init__(self) -> None:
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+class Metrics:
+    """
+    Хранилище метрик процесса.
+
+    Атрибуты:
+        requests (dict): Количество ответов по (метод, маршрут, статус).
+        routes (dict[tuple[str, str], RouteStats]): Метрики по (метод, маршрут).
+        queries (Histogram): Время выполнения запросов к БД (всех, включая
+            фоновые задачи).
+    """
+
+    def __init__(self) -> None:
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        self.queries = Histogram(QUERY_BUCKETS)
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status_code: int,
+        seconds: float,
+        size: int,
+        stats: RequestStats,
+    ) -> None:
+        """Учитывает завершённый HTTP-запрос."""
+        key = (method, route, status_code)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        route_stats = self.routes.get((method, route))
+        if route_stats is None:
+            route_stats = self.routes[(method, route)] = RouteStats()
+        route_stats.duration.observe(seconds)
+        route_stats.size.observe(size)
+        route_stats.db_queries += stats.queries
+        route_stats.db_seconds += stats.db_seconds
+
+    def observe_query(self, seconds: float) -> None:
+        """Учитывает выполненный запрос к БД."""
+        self.queries.observe(seconds)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+
+    def render(self, pool_stats: Optional[dict] = None) -> str:
+        """
+        Формирует текстовый формат Prometheus (version 0.0.4).
+
+        Args:
+            pool_stats (dict | None): Результат `InstrumentedPool.stats()`
+                основной БД; если передан, добавляются метрики пула.
+
+        Returns:
+            str: Метрики, по одной строке на значение.
+        """
+        lines: list[str] = []
+        family(
+            lines,
+            "http_requests_total",
+            "counter",
+            "HTTP responses by route and status.",
+        )
+        for (method, route, status_code), count in sorted(self.requests.items()):
+            lines.append(
+                sample(
+                    "http_requests_total",
+                    {"method": method, "route": route, "status": str(status_code)},
+                    count,
+                )
+            )
+        routes = sorted(self.routes.items())
+        for name, attr, help_text in (
+            ("http_request_duration_seconds", "duration", "Request handling time."),
+            ("http_response_size_bytes", "size", "Response body size."),
+        ):
+            family(lines, name, "histogram", help_text)
+            for (method, route), stats in routes:
+                histogram(
+                    lines,
+                    name,
+                    {"method": method, "route": route},
+                    getattr(stats, attr),
+                )
+        for name, attr, help_text in (
+            (
+                "http_request_db_queries_total",
+                "db_queries",
+                "Database queries executed while handling requests.",
+            ),
+            (
+                "http_request_db_seconds_total",
+                "db_seconds",
+                "Database time spent while handling requests.",
+            ),
+        ):
+            family(lines, name, "counter", help_text)
+            for (method, route), stats in routes:
+                lines.append(
+                    sample(
+                        name, {"method": method, "route": route}, getattr(stats, attr)
+                    )
+                )
+        family(lines, "db_query_duration_seconds", "histogram", "Database query time.")
+        histogram(lines, "db_query_duration_seconds", {}, self.queries)
+        if pool_stats is not None:
+            render_pool(lines, pool_stats)
+        return "\n".join(lines) + "\n"
+
+
+def family(lines: list[str], name: str, kind: str, help_text: str) -> None:
+    """Добавляет строки `# HELP` и `# TYPE` метрики."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def sample(name: str, labels: dict[str, str], value: float) -> str:
+    """Форматирует одно значение метрики с метками."""
+    if not labels:
+        return f"{name} {value}"
+    rendered = ",".join(f'{key}="{escape(val)}"' for key, val in labels.items())
+    return f"{name}{{{rendered}}} {value}"
+
+
+def escape(value: str) -> str:
+    """Экранирует значение метки по правилам текстового формата Prometheus."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def histogram(
+    lines: list[str], name: str, labels: dict[str, str], data: Histogram
+) -> None:
+    """Добавляет корзины, сумму и количество гистограммы."""
+    for bound, count in data.cumulative():
+        lines.append(sample(f"{name}_bucket", {**labels, "le": bound}, count))
+    lines.append(sample(f"{name}_sum", labels, data.total))
+    lines.append(sample(f"{name}_count", labels, data.count))
+
+
+def render_pool(lines: list[str], stats: dict) -> None:
+    """Добавляет метрики пула подключений основной БД."""
+    for name, key, kind, help_text in (
+        ("db_pool_checked_out", "checked_out", "gauge", "Connections in use."),
+        ("db_pool_checked_in", "checked_in", "gauge", "Idle connections."),
+        ("db_pool_waiting", "waiting", "gauge", "Requests waiting for a connection."),
+        ("db_pool_timeouts_total", "timeouts", "counter", "Connection wait timeouts."),
+    ):
+        family(lines, name, kind, help_text)
+        lines.append(sample(name, {}, stats[key]))
+    name = "db_pool_wait_seconds"
+    family(lines, name, "histogram", "Time to acquire a connection.")
+    for bound, count in stats["wait_seconds_buckets"].items():
+        lines.append(sample(f"{name}_bucket", {"le": bound}, count))
+    lines.append(sample(f"{name}_sum", {}, stats["wait_seconds_total"]))
+    lines.append(sample(f"{name}_count", {}, stats["checkouts"]))
+
+
+metrics = Metrics()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Запоминает время начала запроса к БД."""
+    context.metrics_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Учитывает время запроса к БД в общих метриках и метриках HTTP-запроса."""
+    metrics.observe_query(time.perf_counter() - context.metrics_started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключает замер запросов к БД к движку."""
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: замеряет время обработки и размер ответа каждого
+    HTTP-запроса и собирает запросы к БД, выполненные при его обработке.
+
+    Как и `PrimaryStickyMiddleware`, реализовано «чистым» ASGI, чтобы
+    не буферизовать потоковые ответы: время считается до последнего фрагмента
+    тела ответа.
+    """
+
+    def __init__(self, app, registry: Metrics = metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500  # Если обработчик упал до начала ответа
+        size = 0
+        started = time.perf_counter()
+
+        async def send_with_metrics(message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            current_request.reset(token)
+            # FastAPI кладёт совпавший маршрут в scope при маршрутизации
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self.registry.observe_request(
+                scope["method"],
+                route,
+                status_code,
+                time.perf_counter() - started,
+                size,
+                stats,
+            )
@@ -0,0 +1,107 @@
+"""
+Модуль для курсорной (keyset) пагинации списков.
+
+Курсор — непрозрачная для клиента строка (base64 от JSON), в которой хранятся
+значения ключа сортировки последней строки страницы. Следующая страница
+выбирается условием `WHERE (key, id) > (:key, :id)` вместо `OFFSET`, поэтому
+глубокие страницы стоят столько же, сколько первая.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException, status
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in cursor")
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Кодирует значения ключа сортировки в курсор.
+
+    Args:
+        *values: Значения ключа сортировки (datetime кодируется в ISO 8601).
+
+    Returns:
+        str: Курсор.
+    """
+    raw = json.dumps(values, default=_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """
+    Декодирует курсор, полученный от клиента.
+
+    Args:
+        cursor (str): Курсор.
+
+    Returns:
+        list: Значения ключа сортировки.
+
+    Raises:
+        HTTPException: Если курсор повреждён.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        values = None
+    if not isinstance(values, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return values
+
+
+def decode_datetime(value: Any) -> datetime:
+    """
+    Преобразует значение из курсора в datetime.
+
+    Raises:
+        HTTPException: Если значение не является датой в ISO 8601.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def is_cursor_int(value: Any) -> bool:
+    """Является ли значение из курсора целым числом (bool не считается)."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def make_page(
+    rows: Sequence[Any], limit: int, cursor_key: Callable[[Any], Sequence[Any]]
+) -> tuple[Sequence[Any], str | None]:
+    """
+    Обрезает выборку до размера страницы и формирует курсор следующей страницы.
+
+    Запрос должен выбирать `limit + 1` строк: лишняя строка означает,
+    что следующая страница существует.
+
+    Args:
+        rows: Строки, выбранные с лимитом `limit + 1`.
+        limit (int): Размер страницы.
+        cursor_key: Функция, возвращающая ключ сортировки строки.
+
+    Returns:
+        tuple: Строки страницы и курсор следующей страницы (или None).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*cursor_key(rows[-1]))
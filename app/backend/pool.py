@@ -0,0 +1,128 @@
+"""
+Модуль с пулом подключений к БД, собирающим метрики ожидания.
+
+`InstrumentedPool` — это `AsyncAdaptedQueuePool`, который замеряет время
+получения подключения (ожидание свободного подключения в очереди пула
+и, при необходимости, открытие нового) и считает запросы, ждущие подключения
+прямо сейчас. Метрики вместе с текущим состоянием пула отдаёт
+`GET /service/pool`.
+
+Если подключение не освободилось за `Settings.DB_POOL_TIMEOUT` секунд,
+SQLAlchemy выбрасывает `sqlalchemy.exc.TimeoutError`; приложение превращает
+его в ответ 503 (см. `pool_timeout_handler`), чтобы клиент не ждал
+собственного таймаута.
+"""
+
+import bisect
+import time
+from typing import Optional
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+# Верхние границы корзин гистограммы времени получения подключения, в секундах
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """
+    Счётчики получения подключений из пула.
+
+    Атрибуты:
+        checkouts (int): Количество выданных подключений.
+        timeouts (int): Количество запросов, не дождавшихся подключения.
+        waiting (int): Количество запросов, ждущих подключения прямо сейчас.
+        max_waiting (int): Максимальное количество одновременно ждущих запросов.
+        wait_seconds_total (float): Суммарное время получения подключений.
+        wait_seconds_max (float): Максимальное время получения подключения.
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        """Учитывает одно получение подключения."""
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self._buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def histogram(self) -> dict[str, int]:
+        """Кумулятивная гистограмма: сколько получений уложилось в каждую границу."""
+        result, total = {}, 0
+        for bound, count in zip((*map(str, WAIT_BUCKETS), "+Inf"), self._buckets):
+            total += count
+            result[bound] = total
+        return result
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Очередь подключений SQLAlchemy с метриками ожидания.
+
+    Атрибуты:
+        metrics (PoolMetrics): Счётчики пула. Сохраняются при пересоздании
+            пула (`engine.dispose()`).
+    """
+
+    def __init__(self, *args, metrics: Optional[PoolMetrics] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+
+    def connect(self) -> PoolProxiedConnection:
+        metrics = self.metrics
+        metrics.waiting += 1
+        metrics.max_waiting = max(metrics.max_waiting, metrics.waiting)
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.waiting -= 1
+        metrics.checkouts += 1
+        metrics.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        """Возвращает состояние пула и метрики получения подключений."""
+        metrics = self.metrics
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "waiting": metrics.waiting,
+            "max_waiting": metrics.max_waiting,
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_seconds_total": metrics.wait_seconds_total,
+            "wait_seconds_max": metrics.wait_seconds_max,
+            "wait_seconds_buckets": metrics.histogram(),
+        }
+
+
+async def pool_timeout_handler(
+    request: Request, error: exc.TimeoutError
+) -> JSONResponse:
+    """Отвечает 503, если запрос не дождался свободного подключения к БД."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database connection pool exhausted, retry later"},
+        headers={"Retry-After": "1"},
+    )
@@ -0,0 +1,315 @@
+"""
+Модуль с фоновой очередью отложенного пересчёта рейтинга продуктов.
+
+Вместо того чтобы обновлять строку продукта в каждом запросе `add_review`
+и `delete_reviews`, обработчик кладёт в очередь дельту (продукт, изменение
+суммы оценок, изменение количества оценок). Фоновая задача собирает дельты
+в течение окна `Settings.RATING_QUEUE_WINDOW`, складывает дельты одного
+продукта и применяет всю пачку одним
+`UPDATE products ... FROM (VALUES ...)`.
+
+Очередь ограничена по размеру. Если она переполнена, не запущена или
+её фоновая задача погибла, дельта применяется синхронно в транзакции
+запроса. Задачу, завершившуюся с ошибкой, очередь перезапускает. Дельты, потерянные
+при аварийном завершении процесса, восстанавливает
+`python -m app.backend.ratings --repair`.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import Float, Integer, column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import is_postgres, session as db_session
+from app.backend.ratings import apply_rating_delta, derived_rating
+from app.backend.response_cache import response_cache
+from app.backend.suggest import suggest_index
+from app.backend.settings import setting
+from app.models.products import Product
+
+
+class RatingQueue:
+    """
+    Ограниченная очередь дельт рейтинга с фоновым пакетным сбросом в БД.
+
+    Атрибуты:
+        maxsize (int): Максимальное количество дельт в очереди.
+        window (float): Окно накопления дельт перед сбросом, в секундах.
+        batch_size (int): Максимальное количество продуктов в одном сбросе.
+        flushes (int): Количество успешных сбросов.
+        flushed_products (int): Количество продуктов, обновлённых сбросами.
+        flush_failures (int): Количество неудачных сбросов.
+        fallbacks (int): Количество дельт, применённых синхронно в транзакции запроса.
+        task_failures (int): Сколько раз фоновая задача завершилась вне `stop`.
+        flush_seconds_total (float): Суммарная длительность сбросов.
+        flush_seconds_max (float): Максимальная длительность сброса.
+        last_flush_seconds (float): Длительность последнего сброса.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        window: float,
+        batch_size: int,
+        session_factory: Callable[[], AsyncSession],
+    ) -> None:
+        self.maxsize = maxsize
+        self.window = window
+        self.batch_size = batch_size
+        self._session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: dict[int, list] = {}
+        self._stopping = False
+
+        self.flushes = 0
+        self.flushed_products = 0
+        self.flush_failures = 0
+        self.fallbacks = 0
+        self.task_failures = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Работает ли фоновая задача."""
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    @property
+    def depth(self) -> int:
+        """Количество дельт, ожидающих в очереди."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def accepting(self) -> bool:
+        """Примет ли очередь дельту прямо сейчас."""
+        return self.running and not self._queue.full()
+
+    def start(self) -> None:
+        """Запускает фоновую задачу сброса (вызывается из `lifespan`)."""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._spawn()
+
+    def _spawn(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="rating-queue")
+        self._task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        """
+        Сообщает о гибели фоновой задачи и перезапускает её после ошибки.
+
+        Дельты из очереди и `_pending` не теряются: их забирает новая
+        задача. Отменённую задачу очередь не перезапускает — до `stop`
+        дельты применяются синхронно, а оставшиеся в очереди сбрасывает `stop`.
+        """
+        if self._stopping or task is not self._task:
+            return
+        self.task_failures += 1
+        if task.cancelled():
+            print("Фоновая задача очереди рейтингов отменена")
+            return
+        print(
+            f"Фоновая задача очереди рейтингов упала, перезапуск: {task.exception()!r}"
+        )
+        self._spawn()
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу, предварительно сбросив все дельты."""
+        if self._task is None:
+            return
+        self._stopping = True
+        if self._task.done():
+            await self._drain()
+        else:
+            try:
+                self._queue.put_nowait(None)  # Будим задачу, если она ждёт дельту
+            except asyncio.QueueFull:
+                pass
+            await self._task
+        self._task = None
+        self._queue = None
+
+    def submit(self, product_id: int, delta_sum: float, delta_count: int) -> bool:
+        """
+        Ставит дельту рейтинга в очередь.
+
+        Args:
+            product_id (int): Идентификатор продукта.
+            delta_sum (float): Изменение суммы оценок.
+            delta_count (int): Изменение количества оценок.
+
+        Returns:
+            bool: False, если очередь не работает или переполнена.
+        """
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait((product_id, delta_sum, delta_count))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def _merge(self, item: tuple[int, float, int]) -> None:
+        product_id, delta_sum, delta_count = item
+        pending = self._pending.setdefault(product_id, [0.0, 0])
+        pending[0] += delta_sum
+        pending[1] += delta_count
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            item = await self._queue.get()
+            if item is not None:
+                self._merge(item)
+            deadline = loop.time() + self.window
+            while len(self._pending) < self.batch_size and not self._stopping:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is not None:
+                    self._merge(item)
+            await self._flush()
+        await self._drain()
+
+    async def _drain(self) -> None:
+        """Забирает всё, что осталось в очереди, и сбрасывает в БД."""
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                self._merge(item)
+        await self._flush()
+
+    async def _flush(self) -> None:
+        """Применяет накопленные дельты одним UPDATE ... FROM (VALUES ...)."""
+        deltas = [
+            (product_id, delta_sum, delta_count)
+            for product_id, (delta_sum, delta_count) in self._pending.items()
+            if delta_sum or delta_count
+        ]
+        if not deltas:
+            self._pending.clear()
+            return
+        started = time.perf_counter()
+        try:
+            async with self._session_factory() as ss:
+                if is_postgres(ss):
+                    result = await ss.execute(
+                        rating_deltas_update(deltas).returning(
+                            Product.id, Product.rating
+                        )
+                    )
+                    ratings = result.all()
+                else:
+                    # SQLite: без FROM (VALUES ...) — по UPDATE на продукт
+                    ratings = []
+                    for product_id, delta_sum, delta_count in deltas:
+                        rating = await apply_rating_delta(
+                            ss, product_id, delta_sum, delta_count
+                        )
+                        ratings.append((product_id, rating))
+                await ss.commit()
+        except Exception as e:
+            # Дельты остаются в _pending и уйдут со следующим сбросом
+            self.flush_failures += 1
+            print(f"Не удалось обновить рейтинги продуктов: {e}")
+            return
+        self._pending.clear()
+        for product_id, rating in ratings:
+            suggest_index.set_product_rating(product_id, rating)
+        response_cache.invalidate("product:*")  # Ответы с продуктами содержат рейтинг
+        elapsed = time.perf_counter() - started
+        self.flushes += 1
+        self.flushed_products += len(deltas)
+        self.last_flush_seconds = elapsed
+        self.flush_seconds_total += elapsed
+        self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+
+    def stats(self) -> dict[str, float]:
+        """Возвращает метрики очереди."""
+        return {
+            "depth": self.depth,
+            "pending_products": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_products": self.flushed_products,
+            "flush_failures": self.flush_failures,
+            "fallbacks": self.fallbacks,
+            "task_failures": self.task_failures,
+            "flush_seconds_total": self.flush_seconds_total,
+            "flush_seconds_max": self.flush_seconds_max,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+
+def rating_deltas_update(deltas: list[tuple[int, float, int]]):
+    """
+    Строит один UPDATE, применяющий дельты рейтинга сразу к нескольким продуктам.
+
+    Args:
+        deltas: Список кортежей (id продукта, изменение суммы, изменение количества).
+
+    Returns:
+        Update: `UPDATE products SET ... FROM (VALUES ...) AS deltas WHERE ...`.
+    """
+    deltas_table = values(
+        column("product_id", Integer),
+        column("delta_sum", Float),
+        column("delta_count", Integer),
+        name="deltas",
+    ).data(deltas)
+    new_sum = Product.rating_sum + deltas_table.c.delta_sum
+    new_count = Product.rating_count + deltas_table.c.delta_count
+    return (
+        update(Product)
+        .where(Product.id == deltas_table.c.product_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=derived_rating(new_sum, new_count),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+rating_queue = RatingQueue(
+    maxsize=setting.RATING_QUEUE_SIZE,
+    window=setting.RATING_QUEUE_WINDOW,
+    batch_size=setting.RATING_QUEUE_BATCH,
+    session_factory=db_session,
+)
+
+
+async def commit_with_rating_delta(
+    session: AsyncSession, product_id: int, delta_sum: float, delta_count: int
+) -> None:
+    """
+    Коммитит транзакцию отзыва и учитывает изменение рейтинга продукта.
+
+    Если очередь принимает дельты, транзакция отзыва коммитится без
+    обновления строки продукта, а дельта уходит в очередь. Иначе дельта
+    применяется синхронно в той же транзакции.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия с незакоммиченным отзывом.
+        product_id (int): Идентификатор продукта.
+        delta_sum (float): Изменение суммы оценок.
+        delta_count (int): Изменение количества оценок.
+    """
+    if rating_queue.accepting:
+        await session.commit()
+        if rating_queue.submit(product_id, delta_sum, delta_count):
+            return
+    rating_queue.fallbacks += 1
+    rating = await apply_rating_delta(session, product_id, delta_sum, delta_count)
+    await session.commit()
+    suggest_index.set_product_rating(product_id, rating)
+    response_cache.invalidate("product:*")
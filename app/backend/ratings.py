@@ -0,0 +1,213 @@
+"""
+Модуль для инкрементального поддержания рейтинга продуктов.
+
+У продукта хранятся сумма оценок активных отзывов (`rating_sum`) и их
+количество (`rating_count`); `rating` всегда равен их отношению.
+При добавлении или деактивации отзыва колонки сдвигаются на дельту в той же
+транзакции, что и запись отзыва, без пересчёта AVG по всем отзывам.
+
+Модуль также запускается как команда проверки согласованности:
+
+    python -m app.backend.ratings            # только отчёт о расхождениях
+    python -m app.backend.ratings --repair   # отчёт и исправление
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import session as db_session
+from app.models.products import Product
+from app.models.review import Review
+
+# Допустимая погрешность накопленной суммы оценок (Float)
+RATING_EPSILON = 1e-6
+
+
+def derived_rating(rating_sum, rating_count):
+    """
+    SQL-выражение рейтинга по сумме и количеству оценок.
+
+    Args:
+        rating_sum: Выражение суммы оценок.
+        rating_count: Выражение количества оценок.
+
+    Returns:
+        SQL-выражение `rating_sum / rating_count` (0, если оценок нет).
+    """
+    return case(
+        (rating_count > 0, rating_sum / func.nullif(rating_count, 0)), else_=0.0
+    )
+
+
+async def apply_rating_delta(
+    session: AsyncSession, product_id: int, delta_sum: float, delta_count: int
+) -> float | None:
+    """
+    Сдвигает сумму и количество оценок продукта и пересчитывает его рейтинг.
+
+    Выполняется одним UPDATE без коммита: вызывающий код коммитит его
+    вместе с записью отзыва.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        product_id (int): Идентификатор продукта.
+        delta_sum (float): Изменение суммы оценок.
+        delta_count (int): Изменение количества оценок.
+
+    Returns:
+        float | None: Новый рейтинг продукта (None, если продукт не найден).
+    """
+    new_sum = Product.rating_sum + delta_sum
+    new_count = Product.rating_count + delta_count
+    return await session.scalar(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=derived_rating(new_sum, new_count),
+        )
+        .returning(Product.rating)
+    )
+
+
+def is_drifted(
+    product_id: int,
+    stored_sum: float | None,
+    stored_count: int | None,
+    actual_sum: float,
+    actual_count: int,
+    stored_rating: float | None,
+) -> bool:
+    """Проверяет, расходятся ли сохранённые сумма, количество или рейтинг с отзывами."""
+    expected_rating = actual_sum / actual_count if actual_count else 0.0
+    return (
+        stored_count != actual_count
+        or abs((stored_sum or 0.0) - actual_sum) > RATING_EPSILON
+        or abs((stored_rating or 0.0) - expected_rating) > RATING_EPSILON
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class RatingDrift:
+    """
+    Расхождение сохранённого рейтинга продукта с его отзывами.
+
+    Атрибуты:
+        product_id (int): Идентификатор продукта.
+        stored_sum (float): Сохранённая сумма оценок.
+        stored_count (int): Сохранённое количество оценок.
+        actual_sum (float): Сумма оценок активных отзывов.
+        actual_count (int): Количество активных отзывов.
+    """
+
+    product_id: int
+    stored_sum: float
+    stored_count: int
+    actual_sum: float
+    actual_count: int
+
+
+async def check_ratings(
+    session: AsyncSession, repair: bool = False, batch_size: int = 1000
+) -> list[RatingDrift]:
+    """
+    Сверяет `rating_sum`/`rating_count` продуктов с активными отзывами.
+
+    Продукты обходятся пачками по id, поэтому проверка не держит
+    в памяти весь каталог. При `repair=True` каждая пачка исправляется
+    и коммитится отдельно.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        repair (bool): Исправлять ли найденные расхождения.
+        batch_size (int): Количество продуктов в пачке.
+
+    Returns:
+        list[RatingDrift]: Найденные расхождения.
+    """
+    drifts: list[RatingDrift] = []
+    last_id = 0
+    while True:
+        ids = (
+            await session.scalars(
+                select(Product.id)
+                .where(Product.id > last_id)
+                .order_by(Product.id)
+                .limit(batch_size)
+            )
+        ).all()
+        if not ids:
+            break
+        last_id = ids[-1]
+        actual = (
+            select(
+                Review.product_id,
+                func.coalesce(func.sum(Review.rating), 0.0).label("actual_sum"),
+                func.count(Review.id).label("actual_count"),
+            )
+            .where(Review.product_id.in_(ids), Review.is_active == True)
+            .group_by(Review.product_id)
+            .subquery()
+        )
+        rows = await session.execute(
+            select(
+                Product.id,
+                Product.rating_sum,
+                Product.rating_count,
+                func.coalesce(actual.c.actual_sum, 0.0),
+                func.coalesce(actual.c.actual_count, 0),
+                Product.rating,
+            )
+            .outerjoin(actual, actual.c.product_id == Product.id)
+            .where(Product.id.in_(ids))
+        )
+        batch = [RatingDrift(*row[:5]) for row in rows if is_drifted(*row)]
+        if repair and batch:
+            for drift in batch:
+                await session.execute(
+                    update(Product)
+                    .where(Product.id == drift.product_id)
+                    .values(
+                        rating_sum=drift.actual_sum,
+                        rating_count=drift.actual_count,
+                        rating=(
+                            drift.actual_sum / drift.actual_count
+                            if drift.actual_count
+                            else 0.0
+                        ),
+                    )
+                )
+            await session.commit()
+        drifts.extend(batch)
+    return drifts
+
+
+async def main(repair: bool, batch_size: int) -> None:
+    """Запускает проверку рейтингов и печатает отчёт."""
+    async with db_session() as ss:
+        drifts = await check_ratings(ss, repair=repair, batch_size=batch_size)
+    for drift in drifts:
+        print(
+            f"product {drift.product_id}: "
+            f"stored {drift.stored_sum}/{drift.stored_count}, "
+            f"actual {drift.actual_sum}/{drift.actual_count}"
+        )
+    action = "исправлено" if repair else "найдено"
+    print(f"Расхождений {action}: {len(drifts)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Проверка согласованности рейтингов продуктов"
+    )
+    parser.add_argument(
+        "--repair", action="store_true", help="Исправить найденные расхождения"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.repair, args.batch_size))
@@ -0,0 +1,311 @@
+"""
+Модуль чтения данных для GET-эндпоинтов (read-side репозиторий).
+
+Запросы строятся по колонкам таблиц (`Product.__table__` и т.д.), а не по
+ORM-сущностям, и выполняются на подключении сессии (`AsyncConnection`), минуя
+`Session.execute`. ORM не создаёт объекты, не заносит их в identity map
+и не пропускает строки через свой загрузчик: результат — обычные кортежи `Row`
+с атрибутами по именам колонок. Сессия по-прежнему выбирает, к какой базе
+идти (основная БД или реплика, см. `get_read_session`), и владеет транзакцией.
+
+Построители запросов (`*_statement`) отделены от выполнения (`fetch_all`,
+`fetch_one`, `stream_partitions`), чтобы обработчики могли сузить запрос,
+например до (id, updated_at) для проверки ETag.
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from sqlalchemy import Row, Select, and_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.category import Category
+from app.models.order import Order, OrderItem
+from app.models.products import Product
+from app.models.review import Review
+
+products = Product.__table__
+categories = Category.__table__
+reviews = Review.__table__
+orders = Order.__table__
+order_items = OrderItem.__table__
+
+# Колонки, которые отдаются в списках продуктов (см. `ProductOut`)
+PRODUCT_COLUMNS = (
+    products.c.id,
+    products.c.name,
+    products.c.slug,
+    products.c.description,
+    products.c.price,
+    products.c.image_url,
+    products.c.stock,
+    products.c.rating,
+    products.c.category_id,
+    products.c.supplier_id,
+)
+
+# Допустимые ключи сортировки списка продуктов (у каждого есть индекс (key, id))
+SORT_COLUMNS = {
+    "id": products.c.id,
+    "price": products.c.price,
+    "rating": products.c.rating,
+}
+
+
+async def fetch_all(session: AsyncSession, statement: Select) -> list[Row]:
+    """
+    Выполняет запрос на подключении сессии и возвращает все строки.
+
+    Args:
+        session (AsyncSession): Сессия запроса (основная БД или реплика).
+        statement (Select): Запрос по колонкам.
+
+    Returns:
+        list[Row]: Строки результата.
+    """
+    connection = await session.connection()
+    return (await connection.execute(statement)).all()
+
+
+async def fetch_one(session: AsyncSession, statement: Select) -> Optional[Row]:
+    """То же, что `fetch_all`, для запроса, возвращающего не больше одной строки."""
+    connection = await session.connection()
+    return (await connection.execute(statement)).one_or_none()
+
+
+async def stream_partitions(
+    session: AsyncSession, statement: Select, size: int
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Читает результат серверным курсором пачками по `size` строк.
+
+    Args:
+        session (AsyncSession): Сессия, открытая на время чтения.
+        statement (Select): Запрос по колонкам.
+        size (int): Количество строк в пачке.
+
+    Yields:
+        Sequence[Row]: Очередная пачка строк.
+    """
+    connection = await session.connection()
+    result = await connection.stream(statement.execution_options(yield_per=size))
+    async for rows in result.partitions():
+        yield rows
+
+
+def category_subtree(root_condition: Any):
+    """Рекурсивный CTE с id корневой категории и всех её потомков.
+    Используется UNION (а не UNION ALL), поэтому цикл в parent_id
+    не приводит к бесконечной рекурсии.
+    Args:
+        root_condition: Условие выбора корневой категории.
+    Returns:
+        CTE: CTE с единственной колонкой `id`.
+    """
+    subtree = (
+        select(categories.c.id).where(root_condition).cte("subtree", recursive=True)
+    )
+    return subtree.union(
+        select(categories.c.id).where(categories.c.parent_id == subtree.c.id)
+    )
+
+
+def product_page_statement(
+    sort: str, descending: bool, after: Optional[tuple[Any, int]], limit: int
+) -> Select:
+    """
+    Страница активных продуктов с ненулевым остатком (keyset-пагинация).
+
+    Args:
+        sort (str): Ключ сортировки из `SORT_COLUMNS`.
+        descending (bool): Сортировка по убыванию.
+        after: Пара (значение ключа, id) последней строки предыдущей страницы.
+        limit (int): Количество строк.
+
+    Returns:
+        Select: Запрос `PRODUCT_COLUMNS` и `updated_at`.
+    """
+    column = SORT_COLUMNS[sort]
+    statement = (
+        select(*PRODUCT_COLUMNS, products.c.updated_at)
+        .where(and_(products.c.is_active == True, products.c.stock > 0))
+        .order_by(
+            *(
+                (column.desc(), products.c.id.desc())
+                if descending
+                else (column.asc(), products.c.id.asc())
+            )
+        )
+        .limit(limit)
+    )
+    if after is not None:
+        key = tuple_(column, products.c.id)
+        bound = tuple_(*after)
+        statement = statement.where(key < bound if descending else key > bound)
+    return statement
+
+
+def category_products_statement(
+    category_ids: Any, after_id: Optional[int], limit: int
+) -> Select:
+    """
+    Страница продуктов категорий (id и название), упорядоченная по id.
+
+    Args:
+        category_ids: Список id категорий или подзапрос, возвращающий их.
+        after_id (int | None): id последней строки предыдущей страницы.
+        limit (int): Количество строк.
+
+    Returns:
+        Select: Запрос (id, name).
+    """
+    statement = (
+        select(products.c.id, products.c.name)
+        .where(
+            and_(
+                products.c.category_id.in_(category_ids),
+                products.c.is_active == True,
+                products.c.stock > 0,
+            )
+        )
+        .order_by(products.c.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        statement = statement.where(products.c.id > after_id)
+    return statement
+
+
+def product_detail_statement(slug: str) -> Select:
+    """Описание продукта и его версия (id, description, updated_at) по slug."""
+    return select(products.c.id, products.c.description, products.c.updated_at).where(
+        products.c.slug == slug
+    )
+
+
+def active_product_statement(slug: str) -> Select:
+    """Активный продукт (id, name, updated_at) по slug."""
+    return select(products.c.id, products.c.name, products.c.updated_at).where(
+        products.c.slug == slug, products.c.is_active == True
+    )
+
+
+def active_categories_statement() -> Select:
+    """Активные категории по id с версией строки (`updated_at`)."""
+    return (
+        select(
+            categories.c.id,
+            categories.c.parent_id,
+            categories.c.name,
+            categories.c.slug,
+            categories.c.is_active,
+            categories.c.updated_at,
+        )
+        .where(categories.c.is_active == True)
+        .order_by(categories.c.id)
+    )
+
+
+def category_id_statement(slug: str) -> Select:
+    """id категории по slug."""
+    return select(categories.c.id).where(categories.c.slug == slug)
+
+
+def _after_review(statement: Select, after: Optional[tuple[datetime, int]]) -> Select:
+    if after is None:
+        return statement
+    return statement.where(
+        tuple_(reviews.c.comment_date, reviews.c.id) < tuple_(*after)
+    )
+
+
+def review_feed_statement(after: Optional[tuple[datetime, int]], limit: int) -> Select:
+    """
+    Лента активных отзывов от новых к старым с названием продукта.
+
+    Args:
+        after: Пара (comment_date, id) последней строки предыдущей страницы.
+        limit (int): Количество строк.
+
+    Returns:
+        Select: Запрос полей `ReviewWithProductOut`.
+    """
+    return _after_review(
+        select(
+            reviews.c.id,
+            products.c.name.label("product"),
+            reviews.c.rating,
+            reviews.c.comment,
+            reviews.c.comment_date,
+            reviews.c.updated_at,
+        )
+        .join(products, products.c.id == reviews.c.product_id)
+        .where(reviews.c.is_active == True)
+        .order_by(reviews.c.comment_date.desc(), reviews.c.id.desc())
+        .limit(limit),
+        after,
+    )
+
+
+def product_reviews_statement(
+    product_id: int, after: Optional[tuple[datetime, int]], limit: int
+) -> Select:
+    """
+    Активные отзывы продукта от новых к старым.
+
+    Args:
+        product_id (int): Идентификатор продукта.
+        after: Пара (comment_date, id) последней строки предыдущей страницы.
+        limit (int): Количество строк.
+
+    Returns:
+        Select: Запрос полей `ReviewOut`.
+    """
+    return _after_review(
+        select(
+            reviews.c.id,
+            reviews.c.rating,
+            reviews.c.comment,
+            reviews.c.comment_date,
+            reviews.c.updated_at,
+        )
+        .where(reviews.c.product_id == product_id, reviews.c.is_active == True)
+        .order_by(reviews.c.comment_date.desc(), reviews.c.id.desc())
+        .limit(limit),
+        after,
+    )
+
+
+def user_orders_statement(user_id: int, limit: int) -> Select:
+    """Последние заказы пользователя, от новых к старым."""
+    return (
+        select(
+            orders.c.id,
+            orders.c.status,
+            orders.c.total,
+            orders.c.created_at,
+            orders.c.expires_at,
+        )
+        .where(orders.c.user_id == user_id)
+        .order_by(orders.c.id.desc())
+        .limit(limit)
+    )
+
+
+def order_statement(order_id: int) -> Select:
+    """Заказ по id вместе с владельцем (`user_id`)."""
+    return select(
+        orders.c.id,
+        orders.c.user_id,
+        orders.c.status,
+        orders.c.total,
+        orders.c.created_at,
+        orders.c.expires_at,
+    ).where(orders.c.id == order_id)
+
+
+def order_items_statement(order_id: int) -> Select:
+    """Позиции заказа."""
+    return select(
+        order_items.c.product_id, order_items.c.quantity, order_items.c.price
+    ).where(order_items.c.order_id == order_id)
@@ -0,0 +1,187 @@
+"""
+Модуль маршрутизации чтения на реплики базы данных.
+
+Реплики задаются списком строк подключения `Settings.DB_REPLICAS`. Зависимость
+`get_read_session` (см. `app.backend.db_depends`) берёт реплики по кругу:
+сессия сразу получает подключение, и если реплика недоступна, она исключается
+из ротации на `Settings.DB_REPLICA_RETRY_INTERVAL` секунд, а запрос уходит
+на следующую реплику. Если доступных реплик нет, чтение идёт в основную БД.
+
+Запись и чтение собственных изменений остаются на основной БД: после
+успешного изменяющего запроса (POST, PUT, PATCH, DELETE) `PrimaryStickyMiddleware`
+ставит клиенту cookie `read_primary_until`, и пока она не истекла
+(`Settings.DB_REPLICA_STICKY_SECONDS`), его GET-запросы читают из основной БД.
+Дерево категорий и индекс подсказок загружаются только из основной БД.
+Кэш ответов заполняется и с реплик, но такие записи живут не дольше
+`Settings.RESPONSE_CACHE_REPLICA_TTL` (см. `read_from_replica`).
+"""
+
+import logging
+import time
+from typing import Optional, Sequence
+
+from fastapi import Request
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.backend.db import make_engine
+from app.backend.settings import setting
+
+STICKY_COOKIE = "read_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """
+    Реплика базы данных.
+
+    Атрибуты:
+        engine (AsyncEngine): Движок с собственным пулом подключений.
+        session (async_sessionmaker): Фабрика сессий реплики.
+        down_until (float): До какого момента (`time.monotonic()`) реплика
+            исключена из ротации.
+        failures (int): Количество неудачных подключений.
+    """
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.session = async_sessionmaker(bind=engine)
+        self.down_until = 0.0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        """Участвует ли реплика в ротации."""
+        return self.down_until <= time.monotonic()
+
+
+class ReplicaSet:
+    """
+    Набор реплик с круговой ротацией и исключением недоступных.
+
+    Атрибуты:
+        replicas (list[Replica]): Реплики в порядке ротации.
+        retry_interval (float): На сколько секунд недоступная реплика
+            исключается из ротации.
+        primary_fallbacks (int): Сколько раз чтение ушло в основную БД,
+            потому что доступных реплик не было.
+    """
+
+    def __init__(self, engines: Sequence[AsyncEngine], retry_interval: float) -> None:
+        self.replicas = [Replica(engine) for engine in engines]
+        self.retry_interval = retry_interval
+        self.primary_fallbacks = 0
+        self._next = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    async def session(self) -> Optional[AsyncSession]:
+        """
+        Открывает сессию на очередной доступной реплике.
+
+        Сессия сразу получает подключение, поэтому недоступная реплика
+        обнаруживается до выполнения обработчика. Реплика, к которой
+        не удалось подключиться, исключается из ротации; реплика с занятым
+        пулом (истёк `pool_timeout`) остаётся в ротации, запрос просто уходит
+        на следующую.
+
+        Returns:
+            Optional[AsyncSession]: Сессия реплики или None, если доступных
+                реплик нет (читать нужно из основной БД).
+        """
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next]
+            self._next = (self._next + 1) % len(self.replicas)
+            if not replica.healthy:
+                continue
+            ss = replica.session()
+            try:
+                await ss.connection()
+            except exc.TimeoutError:
+                await ss.close()
+                logger.info("Пул реплики %s занят", replica.engine.url.host)
+                continue
+            except (OSError, exc.DBAPIError) as e:
+                await ss.close()
+                replica.failures += 1
+                replica.down_until = time.monotonic() + self.retry_interval
+                logger.warning("Реплика %s недоступна: %s", replica.engine.url.host, e)
+                continue
+            return ss
+        if self.replicas:
+            self.primary_fallbacks += 1
+        return None
+
+    def stats(self) -> list[dict]:
+        """Возвращает состояние и пул подключений каждой реплики."""
+        return [
+            {
+                "host": replica.engine.url.host,
+                "port": replica.engine.url.port,
+                "healthy": replica.healthy,
+                "failures": replica.failures,
+                **replica.engine.pool.stats(),
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        """Закрывает пулы подключений реплик."""
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Должен ли клиент читать из основной БД, чтобы увидеть свои изменения."""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_from_replica(request: Request) -> bool:
+    """Получил ли обработчик запроса сессию реплики (см. `get_read_session`)."""
+    return getattr(request.state, "read_replica", False)
+
+
+class PrimaryStickyMiddleware:
+    """
+    ASGI-middleware: после успешного изменяющего запроса закрепляет
+    чтение клиента за основной БД на `sticky_seconds` секунд.
+
+    Реализовано как «чистое» ASGI-middleware, а не `BaseHTTPMiddleware`,
+    чтобы не буферизовать потоковые запросы и ответы (импорт, выгрузка).
+    """
+
+    def __init__(self, app, sticky_seconds: int) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + self.sticky_seconds
+                cookie = (
+                    f"{STICKY_COOKIE}={until}; Max-Age={self.sticky_seconds};"
+                    " Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"set-cookie", cookie.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+read_replicas = ReplicaSet(
+    [make_engine(url) for url in setting.DB_REPLICAS],
+    retry_interval=setting.DB_REPLICA_RETRY_INTERVAL,
+)
@@ -0,0 +1,358 @@
+"""
+Модуль резервирования остатков продуктов под заказы.
+
+Оформление заказа уменьшает `products.stock` сразу для всех позиций одним
+условным `UPDATE products SET stock = stock - q ... WHERE stock >= q`.
+Проверка и списание выполняются в одном операторе под блокировкой строки,
+поэтому параллельные заказы одного товара не могут продать больше остатка:
+второй заказ ждёт первый и перепроверяет условие уже по новому остатку.
+Если какой-то позиции не хватило, транзакция откатывается целиком.
+
+В SQLite нет `FROM (VALUES ...) AS t (колонки)`, поэтому там каждая позиция
+списывается своим условным UPDATE в той же транзакции (SQLite и так
+выполняет пишущие транзакции по одной).
+
+Неоплаченный заказ держит резерв `Settings.ORDER_RESERVATION_TTL` секунд.
+Истёкшие резервы отменяет фоновая задача `ReservationSweeper`: статус заказа
+меняется на expired, а остаток возвращается тем же пакетным UPDATE, что и
+при отмене заказа покупателем.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+from typing import Callable, Optional, Sequence
+
+from sqlalchemy import Integer, column, func, insert, select, update, values
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import is_postgres, session as db_session
+from app.backend.response_cache import response_cache
+from app.backend.settings import setting
+from app.models.order import ORDER_EXPIRED, ORDER_RESERVED, Order, OrderItem
+from app.models.products import Product
+
+# Сколько раз повторять оформление заказа, прерванное взаимоблокировкой
+DEADLOCK_RETRIES = 3
+DEADLOCK_SQLSTATE = "40P01"
+
+
+class InsufficientStock(ValueError):
+    """Остатка не хватает для одной или нескольких позиций заказа."""
+
+    def __init__(self, product_ids: list[int]) -> None:
+        super().__init__(f"Insufficient stock for products {product_ids}")
+        self.product_ids = product_ids
+
+
+def reserve_statement(lines: Sequence[tuple[int, int]]):
+    """
+    Строит условное списание остатка для всех позиций заказа.
+
+    Args:
+        lines: Пары (id продукта, количество) без повторов id.
+
+    Returns:
+        Update: Запрос, возвращающий id, slug и цену продуктов, остатка которых
+            хватило. Продукты без остатка и неактивные в `RETURNING` не попадают.
+    """
+    lines_table = values(
+        column("product_id", Integer), column("quantity", Integer), name="lines"
+    ).data(list(lines))
+    return (
+        update(Product)
+        .where(
+            Product.id == lines_table.c.product_id,
+            Product.stock >= lines_table.c.quantity,
+            Product.is_active == True,
+        )
+        .values(stock=Product.stock - lines_table.c.quantity)
+        .returning(Product.id, Product.slug, Product.price)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reserve_rows(session: AsyncSession, lines: Sequence[tuple[int, int]]) -> list:
+    """
+    Списывает остаток построчными условными UPDATE (SQLite).
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        lines: Пары (id продукта, количество) без повторов id.
+
+    Returns:
+        list: Строки (id, slug, price) продуктов, остатка которых хватило.
+    """
+    reserved = []
+    for product_id, quantity in lines:
+        result = await session.execute(
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.stock >= quantity,
+                Product.is_active == True,
+            )
+            .values(stock=Product.stock - quantity)
+            .returning(Product.id, Product.slug, Product.price)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.first()
+        if row is not None:
+            reserved.append(row)
+    return reserved
+
+
+def release_statement(order_ids: Sequence[int]):
+    """
+    Строит возврат остатка по позициям заказов.
+
+    Args:
+        order_ids: Идентификаторы отменённых или истёкших заказов.
+
+    Returns:
+        Update: Запрос, возвращающий slug продуктов, остаток которых вернулся.
+    """
+    quantities = (
+        select(OrderItem.product_id, func.sum(OrderItem.quantity).label("quantity"))
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.product_id)
+        .subquery("released")
+    )
+    return (
+        update(Product)
+        .where(Product.id == quantities.c.product_id)
+        .values(stock=Product.stock + quantities.c.quantity)
+        .returning(Product.slug)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def expire_statement(limit: int):
+    """
+    Строит перевод истёкших резервов в статус expired.
+
+    Заказы выбираются с `FOR UPDATE SKIP LOCKED`: несколько процессов
+    приложения не мешают друг другу и не ждут заказ, который прямо сейчас
+    оплачивают или отменяют.
+
+    Args:
+        limit (int): Максимальное количество заказов за один запрос.
+
+    Returns:
+        Update: Запрос, возвращающий id истёкших заказов.
+    """
+    expired = (
+        select(Order.id)
+        .where(Order.status == ORDER_RESERVED, Order.expires_at <= func.now())
+        .order_by(Order.expires_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(Order)
+        .where(Order.id.in_(expired.scalar_subquery()))
+        .values(status=ORDER_EXPIRED)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def invalidate_products(slugs: Sequence[str]) -> None:
+    """Сбрасывает закэшированные ответы с продуктами, у которых изменился остаток."""
+    if slugs:
+        response_cache.invalidate(
+            "product:list", *(f"product:{slug}" for slug in set(slugs))
+        )
+
+
+async def place_order(
+    session: AsyncSession, user_id: int, lines: Sequence[tuple[int, int]]
+) -> tuple[int, int]:
+    """
+    Резервирует остаток и создаёт заказ в одной транзакции.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        user_id (int): Идентификатор покупателя.
+        lines: Пары (id продукта, количество) без повторов id.
+
+    Returns:
+        tuple[int, int]: Идентификатор и сумма созданного заказа.
+
+    Raises:
+        InsufficientStock: Если хотя бы одной позиции не хватило остатка
+            (транзакция откатывается, остатки не меняются).
+    """
+    # Одинаковый порядок строк в разных заказах уменьшает шанс взаимоблокировки
+    lines = sorted(lines)
+    for attempt in range(DEADLOCK_RETRIES):
+        try:
+            order_id, total, slugs = await _place_order(session, user_id, lines)
+            break
+        except DBAPIError as error:
+            await session.rollback()
+            deadlock = getattr(error.orig, "sqlstate", None) == DEADLOCK_SQLSTATE
+            if not deadlock or attempt == DEADLOCK_RETRIES - 1:
+                raise
+    invalidate_products(slugs)
+    return order_id, total
+
+
+async def _place_order(
+    session: AsyncSession, user_id: int, lines: Sequence[tuple[int, int]]
+) -> tuple[int, int, list[str]]:
+    ttl = setting.ORDER_RESERVATION_TTL
+    if is_postgres(session):
+        reserved = (await session.execute(reserve_statement(lines))).all()
+        expires_at = func.now() + timedelta(seconds=ttl)
+    else:
+        reserved = await reserve_rows(session, lines)
+        expires_at = func.datetime("now", f"+{ttl} seconds")
+    if len(reserved) < len(lines):
+        await session.rollback()
+        found = {row.id for row in reserved}
+        raise InsufficientStock(
+            [product_id for product_id, _ in lines if product_id not in found]
+        )
+    prices = {row.id: row.price for row in reserved}
+    total = sum(prices[product_id] * quantity for product_id, quantity in lines)
+    order_id = await session.scalar(
+        insert(Order)
+        .values(
+            user_id=user_id,
+            status=ORDER_RESERVED,
+            total=total,
+            expires_at=expires_at,
+        )
+        .returning(Order.id)
+    )
+    await session.execute(
+        insert(OrderItem),
+        [
+            {
+                "order_id": order_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "price": prices[product_id],
+            }
+            for product_id, quantity in lines
+        ],
+    )
+    await session.commit()
+    return order_id, total, [row.slug for row in reserved]
+
+
+async def release_orders(session: AsyncSession, order_ids: Sequence[int]) -> list[str]:
+    """
+    Возвращает остаток по позициям заказов (без коммита).
+
+    Args:
+        session (AsyncSession): Сессия, в которой статус заказов уже изменён.
+        order_ids: Идентификаторы заказов.
+
+    Returns:
+        list[str]: Slug продуктов, остаток которых изменился.
+    """
+    if order_ids:
+        result = await session.execute(release_statement(order_ids))
+        return [row.slug for row in result]
+    return []
+
+
+class ReservationSweeper:
+    """
+    Фоновая отмена неоплаченных заказов с истёкшим резервом.
+
+    Атрибуты:
+        interval (float): Период проходов в секундах.
+        batch_size (int): Максимальное количество заказов за один проход.
+        sweeps (int): Количество выполненных проходов.
+        expired_orders (int): Количество отменённых заказов.
+        failures (int): Количество неудачных проходов.
+        last_sweep_seconds (float): Длительность последнего прохода.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        batch_size: int,
+        session_factory: Callable[[], AsyncSession],
+    ) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self._session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+        self.sweeps = 0
+        self.expired_orders = 0
+        self.failures = 0
+        self.last_sweep_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Запущена ли фоновая задача."""
+        return self._task is not None
+
+    def start(self) -> None:
+        """Запускает фоновую задачу (вызывается из `lifespan`)."""
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="reservation-sweeper")
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Проход продолжается, пока истёкшие заказы заполняют пачку целиком
+                while await self.sweep() == self.batch_size:
+                    pass
+            except Exception as e:
+                self.failures += 1
+                print(f"Не удалось отменить истёкшие резервы: {e}")
+
+    async def sweep(self) -> int:
+        """
+        Отменяет одну пачку истёкших заказов и возвращает их остаток.
+
+        Returns:
+            int: Количество отменённых заказов.
+        """
+        started = time.perf_counter()
+        async with self._session_factory() as ss:
+            order_ids = list(await ss.scalars(expire_statement(self.batch_size)))
+            slugs = await release_orders(ss, order_ids)
+            await ss.commit()
+        invalidate_products(slugs)
+        self.sweeps += 1
+        self.expired_orders += len(order_ids)
+        self.last_sweep_seconds = time.perf_counter() - started
+        return len(order_ids)
+
+    def stats(self) -> dict[str, float]:
+        """Возвращает метрики фоновой отмены."""
+        return {
+            "running": self.running,
+            "sweeps": self.sweeps,
+            "expired_orders": self.expired_orders,
+            "failures": self.failures,
+            "last_sweep_seconds": self.last_sweep_seconds,
+        }
+
+
+reservation_sweeper = ReservationSweeper(
+    interval=setting.RESERVATION_SWEEP_INTERVAL,
+    batch_size=setting.RESERVATION_SWEEP_BATCH,
+    session_factory=db_session,
+)
@@ -0,0 +1,337 @@
+"""
+Модуль кэширования ответов GET-эндпоинтов в памяти процесса.
+
+Ответ сохраняется уже сериализованным (байты тела и заголовки), поэтому
+попадание в кэш не требует ни запросов к БД, ни сериализации.
+Записи хранятся в LRU-кэше ограниченного размера с TTL (`TTLCache`).
+
+Каждая запись помечается тегами, например `product:<slug>` или
+`category:all`. Обработчики записи сбрасывают кэш по тегу
+(`response_cache.invalidate("product:phone")`) или по пространству имён
+(`response_cache.invalidate("category:*")`). Инвалидация стоит O(1):
+у каждого тега и пространства имён есть счётчик поколения, а запись
+считается устаревшей, если поколение хотя бы одного из её тегов изменилось.
+
+Кэш локален для процесса: изменения, сделанные другими воркерами,
+становятся видны не позже чем через TTL записи.
+
+Запись общая для всех клиентов. Ответ, прочитанный с реплики
+(`read_from_replica`), может отставать от основной БД, а инвалидация
+при записи случилась до того, как реплика догнала изменения, поэтому
+такая запись живёт не дольше `replica_ttl` (`Settings.RESPONSE_CACHE_REPLICA_TTL`).
+Клиент, который только что что-то изменил (cookie `read_primary_until`),
+читает мимо кэша.
+
+Тело ответа сериализуется без `jsonable_encoder`: модели ответа (`ProductOut`
+и т.п.) — сериализатором Pydantic, остальное — orjson (`render_json`).
+"""
+
+import functools
+import inspect
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.backend.cache import TTLCache
+from app.backend.etag import etag_matches, not_modified
+from app.backend.replicas import read_from_replica, reads_from_primary
+from app.backend.settings import setting
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    """
+    Закэшированный ответ.
+
+    Атрибуты:
+        body (bytes): Сериализованное тело ответа.
+        headers (dict[str, str]): Дополнительные заголовки ответа (например, ETag).
+        generations (tuple): Пары (тег, поколение) на момент сохранения.
+    """
+
+    body: bytes
+    headers: dict[str, str]
+    generations: tuple[tuple[str, int], ...]
+
+
+class ResponseCache:
+    """
+    Кэш сериализованных ответов с инвалидацией по тегам.
+
+    Атрибуты:
+        enabled (bool): Глобальный выключатель кэша.
+        disabled_routes (set[str]): Имена эндпоинтов, для которых кэш выключен.
+        replica_ttl (float): Максимальное время жизни ответа, прочитанного
+            с реплики; 0 — такие ответы не кэшируются.
+        hits (int): Количество попаданий в кэш.
+        misses (int): Количество промахов (включая устаревшие по тегу записи).
+        invalidations (int): Количество вызовов инвалидации.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float, enabled: bool = True, replica_ttl: float = 0
+    ) -> None:
+        self.enabled = enabled
+        self.disabled_routes: set[str] = set()
+        self.replica_ttl = replica_ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: dict[str, int] = {}
+
+    @staticmethod
+    def _namespace(tag: str) -> str:
+        return tag.split(":", 1)[0] + ":*"
+
+    def _current(self, tags: Iterable[str]) -> tuple[tuple[str, int], ...]:
+        keys = []
+        for tag in tags:
+            keys.append(tag)
+            keys.append(self._namespace(tag))
+        return tuple(
+            (key, self._generations.get(key, 0)) for key in dict.fromkeys(keys)
+        )
+
+    def is_enabled(self, route: str) -> bool:
+        """Включён ли кэш для эндпоинта `route`."""
+        return self.enabled and route not in self.disabled_routes
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Возвращает актуальную запись или None.
+
+        Запись, у которой изменилось поколение хотя бы одного тега, удаляется.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and any(
+            self._generations.get(tag, 0) != gen for tag, gen in entry.generations
+        ):
+            self._entries.pop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def snapshot(self, tags: Iterable[str]) -> tuple[tuple[str, int], ...]:
+        """
+        Запоминает текущие поколения тегов.
+
+        Снимок берётся до чтения данных из БД и передаётся в `set`: если
+        инвалидация случилась, пока ответ строился, запись сразу окажется
+        устаревшей, а не будет отдаваться как свежая до истечения TTL.
+        """
+        return self._current(tags)
+
+    def set(
+        self,
+        key: str,
+        body: bytes,
+        headers: dict[str, str],
+        tags: Iterable[str],
+        ttl: Optional[float] = None,
+        generations: Optional[tuple[tuple[str, int], ...]] = None,
+    ) -> None:
+        """
+        Сохраняет сериализованный ответ.
+
+        Args:
+            key (str): Ключ записи (путь и строка запроса).
+            body (bytes): Тело ответа.
+            headers (dict[str, str]): Дополнительные заголовки ответа.
+            tags: Теги записи.
+            ttl (float | None): Время жизни записи. По умолчанию — TTL кэша.
+            generations: Поколения тегов, снятые `snapshot` до чтения данных.
+                По умолчанию — текущие поколения `tags`.
+        """
+        if generations is None:
+            generations = self._current(tags)
+        self._entries.set(key, CachedResponse(body, headers, generations), ttl=ttl)
+
+    def invalidate(self, *tags: str) -> None:
+        """
+        Сбрасывает записи с указанными тегами.
+
+        Args:
+            *tags: Теги (`product:phone`) или пространства имён (`product:*`).
+        """
+        self.invalidations += 1
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики кэша."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._entries.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache(
+    maxsize=setting.RESPONSE_CACHE_SIZE,
+    ttl=setting.RESPONSE_CACHE_TTL,
+    enabled=setting.RESPONSE_CACHE_ENABLED,
+    replica_ttl=setting.RESPONSE_CACHE_REPLICA_TTL,
+)
+response_cache.disabled_routes.update(setting.RESPONSE_CACHE_DISABLED_ROUTES)
+
+
+def cached_response(
+    tags: Callable[..., Iterable[str]],
+    ttl: Optional[float] = None,
+    enabled: bool = True,
+) -> Callable:
+    """
+    Декоратор GET-эндпоинта, кэширующий его сериализованный ответ.
+
+    Ключ записи — путь и строка запроса. Запросы клиента, который должен
+    видеть свои изменения (`reads_from_primary`), идут мимо кэша. Ответ,
+    прочитанный с реплики, живёт не дольше `ResponseCache.replica_ttl`.
+    Ответы-объекты `Response` (например, 304 или ошибки) не кэшируются.
+    Заголовки, выставленные эндпоинтом через параметр `response: Response`,
+    сохраняются вместе с телом; если среди них есть ETag, попадание в кэш
+    отвечает на `If-None-Match` кодом 304.
+
+    Args:
+        tags: Функция, получающая аргументы эндпоинта и возвращающая теги записи.
+        ttl (float | None): Время жизни записей этого эндпоинта.
+        enabled (bool): False полностью отключает кэш для эндпоинта.
+
+    Returns:
+        Callable: Декоратор.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if not enabled:
+            return func
+        route = func.__name__
+        signature = inspect.signature(func)
+        parameters = list(signature.parameters.values())
+        extra = []
+        if not any(p.annotation is Request for p in parameters):
+            extra.append(
+                inspect.Parameter(
+                    "_cache_request",
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=Request,
+                )
+            )
+        if not any(p.annotation is Response for p in parameters):
+            extra.append(
+                inspect.Parameter(
+                    "_cache_response",
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=Response,
+                )
+            )
+        request_name = next(
+            (p.name for p in parameters if p.annotation is Request), "_cache_request"
+        )
+        response_name = next(
+            (p.name for p in parameters if p.annotation is Response),
+            "_cache_response",
+        )
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            request: Request = kwargs[request_name]
+            response: Response = kwargs[response_name]
+            call_kwargs = {
+                name: value
+                for name, value in kwargs.items()
+                if name not in ("_cache_request", "_cache_response")
+            }
+            if not response_cache.is_enabled(route) or reads_from_primary(request):
+                return await func(*args, **call_kwargs)
+
+            key = request.url.path + "?" + str(request.query_params)
+            entry = response_cache.get(key)
+            if entry is not None:
+                etag = entry.headers.get("etag")
+                if etag is not None and etag_matches(request, etag):
+                    not_modified_response = not_modified(etag)
+                    not_modified_response.headers["X-Cache"] = "HIT"
+                    return not_modified_response
+                return cached_to_response(entry.body, entry.headers, "HIT")
+
+            # Поколения тегов — до обращения к БД: инвалидация во время
+            # работы обработчика должна сделать этот ответ устаревшим
+            entry_tags = list(tags(**call_kwargs))
+            generations = response_cache.snapshot(entry_tags)
+            result = await func(*args, **call_kwargs)
+            if isinstance(result, Response):
+                return result
+            body = render_json(result)
+            headers = {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in ("content-length", "content-type")
+            }
+            entry_ttl = ttl
+            if read_from_replica(request):
+                # Реплика могла ещё не получить изменения, инвалидация
+                # которых уже прошла: запись живёт не дольше replica_ttl
+                if response_cache.replica_ttl <= 0:
+                    return cached_to_response(body, headers, "MISS")
+                entry_ttl = response_cache.replica_ttl
+                if ttl is not None:
+                    entry_ttl = min(ttl, entry_ttl)
+            response_cache.set(
+                key, body, headers, entry_tags, ttl=entry_ttl, generations=generations
+            )
+            return cached_to_response(body, headers, "MISS")
+
+        wrapper.__signature__ = signature.replace(
+            parameters=[
+                p for p in parameters if p.kind != inspect.Parameter.VAR_KEYWORD
+            ]
+            + extra
+        )
+        return wrapper
+
+    return decorator
+
+
+def json_default(value: Any) -> Any:
+    """Приводит к JSON-совместимому виду то, чего не умеет orjson."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return jsonable_encoder(value)
+
+
+def render_json(content: Any) -> bytes:
+    """
+    Сериализует ответ эндпоинта в JSON.
+
+    Args:
+        content: Модель Pydantic или данные из словарей, списков, чисел,
+            строк и datetime.
+
+    Returns:
+        bytes: Тело ответа.
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def cached_to_response(body: bytes, headers: dict[str, str], status: str) -> Response:
+    """Собирает ответ из сериализованного тела и сохранённых заголовков."""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={**headers, "X-Cache": status},
+    )
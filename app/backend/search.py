@@ -0,0 +1,188 @@
+"""
+Модуль полнотекстового поиска по продуктам.
+
+Поиск идёт по генерируемой колонке `products.search_vector` (tsvector из
+name и description, см. `app/models/products.py`) через GIN-индекс
+`ix_products_search_vector`. Запрос пользователя разбирается
+`websearch_to_tsquery` (поддерживает "фразы", OR и -исключения),
+результаты ранжируются `ts_rank` и листаются курсором по (ранг, id).
+
+Подсветка (`ts_headline`) дорогая — она перечитывает исходный текст, —
+поэтому считается только для строк выбранной страницы. Текст продукта задаёт
+поставщик, поэтому `ts_headline` размечает совпадения управляющими символами,
+а не тегами: `render_highlight` экранирует текст как HTML и только потом
+заменяет маркеры на `<b>...</b>`.
+
+Для SQLite (см. `Settings.DATABASE_URL`) есть переносимый вариант
+`like_search_statement`: поиск подстрок без морфологии и подсветки.
+"""
+
+import html
+import re
+from typing import Optional
+
+from sqlalchemy import (
+    Float,
+    and_,
+    case,
+    false,
+    func,
+    literal,
+    literal_column,
+    not_,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.models.products import SEARCH_CONFIG, Product
+
+search_vector = literal_column("products.search_vector", TSVECTOR)
+
+# Маркеры начала и конца совпадения: управляющие символы, которых нет
+# в обычном тексте и которые не значат ничего в HTML
+START_SEL = "\x02"
+STOP_SEL = "\x03"
+HIGHLIGHT = re.compile(f"{START_SEL}([^{START_SEL}{STOP_SEL}]*){STOP_SEL}")
+
+# Параметры подсветки совпадений в названии и описании
+HEADLINE_OPTIONS = f"StartSel={START_SEL}, StopSel={STOP_SEL}, MaxWords=35, MinWords=15"
+HEADLINE_FRAGMENT_OPTIONS = HEADLINE_OPTIONS + ", MaxFragments=2"
+
+
+def render_highlight(text: Optional[str]) -> Optional[str]:
+    """
+    Превращает результат `ts_headline` в безопасный HTML.
+
+    Весь текст экранируется; парные маркеры совпадений становятся `<b>...</b>`,
+    одиночные (если они были в исходном тексте) удаляются.
+
+    Args:
+        text (str | None): Текст с маркерами `START_SEL` и `STOP_SEL`.
+
+    Returns:
+        str | None: HTML, в котором единственная разметка — `<b>`.
+    """
+    if text is None:
+        return None
+    parts = []
+    position = 0
+    for match in HIGHLIGHT.finditer(text):
+        parts.append(html.escape(text[position : match.start()]))
+        parts.append(f"<b>{html.escape(match.group(1))}</b>")
+        position = match.end()
+    parts.append(html.escape(text[position:]))
+    return "".join(parts).replace(START_SEL, "").replace(STOP_SEL, "")
+
+
+def search_statement(q: str, limit: int, after: Optional[tuple[float, int]] = None):
+    """
+    Строит запрос страницы результатов поиска.
+
+    Args:
+        q (str): Поисковый запрос в синтаксисе `websearch_to_tsquery`.
+        limit (int): Количество строк (для `make_page` — размер страницы + 1).
+        after (tuple[float, int] | None): Ранг и id последней строки
+            предыдущей страницы.
+
+    Returns:
+        Select: Запрос, возвращающий продукты с рангом и подсветкой.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(search_vector, query, type_=Float).label("rank")
+    page = (
+        select(Product.id, rank)
+        .where(
+            search_vector.op("@@")(query),
+            and_(Product.is_active == True, Product.stock > 0),
+        )
+        .order_by(rank.desc(), Product.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        page = page.where(tuple_(rank, Product.id) < tuple_(*after))
+    page = page.subquery("page")
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.slug,
+            Product.price,
+            Product.image_url,
+            Product.rating,
+            page.c.rank,
+            func.ts_headline(
+                SEARCH_CONFIG, Product.name, query, HEADLINE_OPTIONS
+            ).label("name_highlight"),
+            func.ts_headline(
+                SEARCH_CONFIG, Product.description, query, HEADLINE_FRAGMENT_OPTIONS
+            ).label("description_highlight"),
+        )
+        .join(page, page.c.id == Product.id)
+        .order_by(page.c.rank.desc(), Product.id.desc())
+    )
+
+
+def like_search_statement(
+    q: str, limit: int, after: Optional[tuple[float, int]] = None
+):
+    """
+    Строит переносимый запрос страницы поиска через LIKE (для SQLite).
+
+    Каждое слово запроса должно встретиться в названии или описании,
+    слова с `-` исключают продукт, OR и кавычки игнорируются. Ранг — число
+    слов, найденных в названии; подсветки нет (исходный текст без маркеров).
+
+    Args:
+        q (str): Поисковый запрос.
+        limit (int): Количество строк (для `make_page` — размер страницы + 1).
+        after (tuple[float, int] | None): Ранг и id последней строки
+            предыдущей страницы.
+
+    Returns:
+        Select: Запрос с теми же колонками, что и у `search_statement`.
+    """
+    words = [word.strip('"').lower() for word in q.split() if word.upper() != "OR"]
+    include = [word for word in words if word and not word.startswith("-")]
+    exclude = [word[1:] for word in words if word.startswith("-") and word[1:]]
+
+    def matches(word: str):
+        return or_(
+            func.lower(Product.name).contains(word, autoescape=True),
+            func.lower(Product.description).contains(word, autoescape=True),
+        )
+
+    rank = sum(
+        (
+            case(
+                (func.lower(Product.name).contains(word, autoescape=True), 1.0),
+                else_=0.0,
+            )
+            for word in include
+        ),
+        literal(0.0, Float),
+    ).label("rank")
+    statement = (
+        select(
+            Product.id,
+            Product.name,
+            Product.slug,
+            Product.price,
+            Product.image_url,
+            Product.rating,
+            rank,
+            Product.name.label("name_highlight"),
+            Product.description.label("description_highlight"),
+        )
+        .where(
+            *([matches(word) for word in include] or [false()]),
+            *(not_(matches(word)) for word in exclude),
+            and_(Product.is_active == True, Product.stock > 0),
+        )
+        .order_by(rank.desc(), Product.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        statement = statement.where(tuple_(rank, Product.id) < tuple_(*after))
+    return statement
@@ -0,0 +1,506 @@
+"""
+Модуль с in-memory индексом автодополнения названий продуктов и категорий.
+
+Индекс — отсортированный массив ключей и параллельный массив записей.
+Ключ — нормализованный хвост названия, начинающийся с каждого его слова
+("красный телефон" даёт ключи "красный телефон" и "телефон"), поэтому
+префикс находит название по началу любого слова. Поиск префикса — два
+`bisect` по массиву ключей, затем top-k записей диапазона по рейтингу.
+Для коротких префиксов с широкими диапазонами top-k хранится заранее.
+
+Индекс строится при старте приложения (`lifespan` в `app/main.py`) и
+обновляется точечно обработчиками записи продуктов и категорий, а рейтинги
+— очередью пересчёта рейтингов. Изменения, сделанные другими воркерами,
+пакетным импортом или скриптами, подтягиваются не реже чем раз
+в `Settings.SUGGEST_REFRESH_INTERVAL` секунд (`SuggestIndex.ensure_fresh`):
+продукты — по `updated_at` (индекс `ix_products_updated_at`), категории —
+целиком. Удаления продуктов по `updated_at` не видны; их выдаёт расхождение
+числа активных продуктов с индексом, и тогда индекс перестраивается целиком.
+
+Память (CPython 3.11, названия из двух слов по ~20 символов, вместе со
+строками названий и slug): 470 байт на название латиницей и 545 байт
+на название кириллицей — около 0,5 ГБ на миллион названий; на время
+построения пик выше ещё на ~25%. Построение индекса на миллион названий
+занимает ~15 с. Оценку проверяет тест `test_suggest_memory_footprint`.
+"""
+
+import asyncio
+import bisect
+import heapq
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend import db
+from app.backend.settings import setting
+from app.models.category import Category
+from app.models.products import Product
+
+# Максимальная длина ключа: длиннее префиксы из поисковой строки не бывают
+MAX_KEY_LENGTH = 64
+# Префиксы с большим количеством ключей обслуживаются из готовых top-списков
+SCAN_LIMIT = 1024
+# Максимальное количество подсказок в ответе и длина хранимых top-списков
+MAX_SUGGESTIONS = 20
+TOP_SIZE = 2 * MAX_SUGGESTIONS
+# Запас при выборке изменённых продуктов: `now()` в PostgreSQL — время начала
+# транзакции, и долгая транзакция фиксируется позже, чем датирована её запись
+REFRESH_OVERLAP = timedelta(seconds=60)
+MAX_CHAR = "\U0010ffff"
+WORD_START = re.compile(r"(?:^|\W)(?=\w)")
+
+
+def normalize(text: str) -> str:
+    """Приводит строку к виду, в котором сравниваются ключи и префиксы."""
+    return " ".join(text.casefold().replace("ё", "е").split())
+
+
+def word_keys(name: str) -> list[str]:
+    """
+    Возвращает ключи индекса для названия: хвосты, начинающиеся с каждого слова.
+
+    Args:
+        name (str): Название продукта или категории.
+
+    Returns:
+        list[str]: Уникальные ключи, обрезанные до `MAX_KEY_LENGTH`.
+    """
+    normalized = normalize(name)
+    keys = {
+        normalized[match.end() : match.end() + MAX_KEY_LENGTH]
+        for match in WORD_START.finditer(normalized)
+    }
+    return sorted(keys)
+
+
+@dataclass(slots=True)
+class SuggestEntry:
+    """
+    Запись индекса автодополнения.
+
+    Атрибуты:
+        id (int): Идентификатор продукта или категории.
+        name (str): Название.
+        slug (str): Slug.
+        rating (float): Рейтинг, по которому выбирается top-k.
+    """
+
+    id: int
+    name: str
+    slug: str
+    rating: float
+
+    def as_dict(self) -> dict[str, Any]:
+        """Возвращает запись в том виде, в каком её отдаёт API."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "slug": self.slug,
+            "rating": self.rating,
+        }
+
+
+def rank_key(entry: SuggestEntry) -> tuple[float, str]:
+    """Порядок подсказок: по убыванию рейтинга, при равенстве — по названию."""
+    return (-entry.rating, entry.name)
+
+
+class PrefixIndex:
+    """
+    Отсортированный массив ключей с поиском top-k по префиксу.
+
+    Для префиксов, под которые попадает больше `SCAN_LIMIT` ключей
+    (обычно одна-две первые буквы), top-`TOP_SIZE` записей хранится
+    заранее и поддерживается при изменениях, чтобы не перебирать весь
+    диапазон на каждое нажатие клавиши. Остальные префиксы перебираются
+    целиком — это не больше `SCAN_LIMIT` ключей.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[str] = []
+        self._entries: list[SuggestEntry] = []
+        self._by_id: dict[int, SuggestEntry] = {}
+        # Префикс широкого диапазона -> лучшие записи диапазона по rank_key
+        self._top: dict[str, list[SuggestEntry]] = {}
+        # Длина самого длинного префикса в _top (длиннее искать незачем)
+        self._top_length = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(self, entries: Iterable[SuggestEntry]) -> None:
+        """Заменяет содержимое индекса (сортировка один раз, без вставок)."""
+        by_id = {entry.id: entry for entry in entries}
+        pairs = sorted(
+            (key, entry.id) for entry in by_id.values() for key in word_keys(entry.name)
+        )
+        self._keys = [key for key, _ in pairs]
+        self._entries = [by_id[entry_id] for _, entry_id in pairs]
+        self._by_id = by_id
+        self._top = {}
+        self._top_length = 0
+        self._build_top(0, len(self._keys), 0)
+
+    def _build_top(self, low: int, high: int, depth: int) -> list[SuggestEntry]:
+        # Диапазон [low, high) — ключи с общим префиксом длины depth.
+        # Top-список диапазона собирается из top-списков поддиапазонов
+        # (по следующему символу), поэтому каждый ключ перебирается один раз.
+        if high - low <= SCAN_LIMIT:
+            return self._scan(low, high, TOP_SIZE)
+        candidates = []
+        position = low
+        while position < high:
+            key = self._keys[position]
+            if len(key) <= depth:
+                end = bisect.bisect_right(self._keys, key, position, high)
+                candidates.extend(self._scan(position, end, TOP_SIZE))
+            else:
+                prefix = key[: depth + 1]
+                end = bisect.bisect_left(self._keys, prefix + MAX_CHAR, position, high)
+                candidates.extend(self._build_top(position, end, depth + 1))
+            position = end
+        matches = {id(entry): entry for entry in candidates}
+        top = heapq.nsmallest(TOP_SIZE, matches.values(), key=rank_key)
+        if depth:
+            self._top[self._keys[low][:depth]] = top
+            self._top_length = max(self._top_length, depth)
+        return top
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        low = bisect.bisect_left(self._keys, prefix)
+        return low, bisect.bisect_left(self._keys, prefix + MAX_CHAR, lo=low)
+
+    def _scan(self, low: int, high: int, limit: int) -> list[SuggestEntry]:
+        matches = {id(entry): entry for entry in self._entries[low:high]}
+        return heapq.nsmallest(limit, matches.values(), key=rank_key)
+
+    def _prefixes(self, keys: Iterable[str]) -> set[str]:
+        return {
+            key[:length]
+            for key in keys
+            for length in range(1, min(len(key), self._top_length) + 1)
+            if key[:length] in self._top
+        }
+
+    def _top_remove(self, prefixes: set[str], entry: SuggestEntry) -> None:
+        for prefix in prefixes:
+            top = self._top[prefix]
+            for position, candidate in enumerate(top):
+                if candidate is entry:
+                    del top[position]
+                    break
+
+    def _top_insert(self, prefixes: set[str], entry: SuggestEntry) -> None:
+        # Список — лучшие записи диапазона, поэтому запись, которая хуже
+        # последней в нём, вставлять нельзя: вне списка могут быть лучше.
+        for prefix in prefixes:
+            top = self._top[prefix]
+            if not top or rank_key(entry) >= rank_key(top[-1]):
+                continue
+            if any(candidate is entry for candidate in top):
+                continue
+            bisect.insort(top, entry, key=rank_key)
+            del top[TOP_SIZE:]
+
+    def put(self, entry: SuggestEntry) -> None:
+        """Добавляет запись или заменяет запись с тем же id."""
+        self.remove(entry.id)
+        keys = word_keys(entry.name)
+        for key in keys:
+            position = bisect.bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._entries.insert(position, entry)
+        self._by_id[entry.id] = entry
+        self._top_insert(self._prefixes(keys), entry)
+
+    def put_many(self, entries: Iterable[SuggestEntry]) -> None:
+        """
+        Добавляет или заменяет пачку записей.
+
+        Новые ключи вливаются в массивы одним линейным проходом, а не
+        вставкой по одному (каждая вставка сдвигает хвост массива).
+        Записи с неизменным названием только обновляют slug и рейтинг.
+        """
+        added = []
+        for entry in entries:
+            current = self._by_id.get(entry.id)
+            if current is not None and current.name == entry.name:
+                current.slug = entry.slug
+                self.set_rating(entry.id, entry.rating)
+                continue
+            self.remove(entry.id)
+            added.append((entry, word_keys(entry.name)))
+        pairs = sorted(
+            ((key, entry) for entry, entry_keys in added for key in entry_keys),
+            key=lambda pair: pair[0],
+        )
+        keys: list[str] = []
+        merged: list[SuggestEntry] = []
+        start = 0
+        for key, entry in pairs:
+            position = bisect.bisect_right(self._keys, key, start)
+            keys.extend(self._keys[start:position])
+            merged.extend(self._entries[start:position])
+            keys.append(key)
+            merged.append(entry)
+            start = position
+        if pairs:
+            keys.extend(self._keys[start:])
+            merged.extend(self._entries[start:])
+            self._keys, self._entries = keys, merged
+        for entry, entry_keys in added:
+            self._by_id[entry.id] = entry
+            self._top_insert(self._prefixes(entry_keys), entry)
+
+    def remove(self, entry_id: int) -> None:
+        """Удаляет запись по id (если она есть)."""
+        entry = self._by_id.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in word_keys(entry.name):
+            position = bisect.bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._entries[position] is entry:
+                    del self._keys[position]
+                    del self._entries[position]
+                    break
+                position += 1
+        self._top_remove(self._prefixes(word_keys(entry.name)), entry)
+
+    def set_rating(self, entry_id: int, rating: float) -> None:
+        """Обновляет рейтинг записи без перестроения массивов."""
+        entry = self._by_id.get(entry_id)
+        if entry is None or entry.rating == rating:
+            return
+        prefixes = self._prefixes(word_keys(entry.name))
+        self._top_remove(prefixes, entry)
+        entry.rating = rating
+        self._top_insert(prefixes, entry)
+
+    def search(self, prefix: str, limit: int) -> list[SuggestEntry]:
+        """
+        Ищет записи, у которых какое-либо слово названия начинается с `prefix`.
+
+        Args:
+            prefix (str): Префикс.
+            limit (int): Максимальное количество записей (не больше `TOP_SIZE`).
+
+        Returns:
+            list[SuggestEntry]: Записи с наибольшим рейтингом (при равенстве —
+                по названию).
+        """
+        prefix = normalize(prefix)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+        low, high = self._range(prefix)
+        if high - low <= SCAN_LIMIT:
+            return self._scan(low, high, limit)
+        top = self._top.get(prefix)
+        if top is None or len(top) < limit:
+            # Новый широкий префикс или список истощён удалениями
+            top = self._top[prefix] = self._scan(low, high, TOP_SIZE)
+            self._top_length = max(self._top_length, len(prefix))
+        return top[:limit]
+
+
+class SuggestIndex:
+    """
+    Индексы автодополнения продуктов и категорий.
+
+    Атрибуты:
+        products (PrefixIndex): Активные продукты, top-k по рейтингу.
+        categories (PrefixIndex): Активные категории (рейтинг всегда 0).
+        refresh_interval (float): Как часто подтягивать изменения из БД
+            в секундах. 0 отключает обновление.
+        loaded (bool): Загружен ли индекс из базы данных.
+        refreshed_at (float | None): Момент последней загрузки или обновления
+            (time.monotonic).
+        watermark (datetime | None): Наибольший `updated_at` учтённых продуктов.
+    """
+
+    def __init__(self, refresh_interval: float = 0) -> None:
+        self.products = PrefixIndex()
+        self.categories = PrefixIndex()
+        self.refresh_interval = refresh_interval
+        self.loaded = False
+        self.refreshed_at: Optional[float] = None
+        self.watermark: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_fresh(self) -> bool:
+        """Загружен ли индекс и не пора ли подтянуть изменения из БД."""
+        if not self.loaded:
+            return False
+        return (
+            self.refresh_interval <= 0
+            or time.monotonic() - self.refreshed_at < self.refresh_interval
+        )
+
+    async def reload(self, session: AsyncSession) -> None:
+        """
+        Строит оба индекса по активным продуктам и категориям.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+        """
+        products = (
+            await session.execute(
+                select(
+                    Product.id,
+                    Product.name,
+                    Product.slug,
+                    Product.rating,
+                    Product.updated_at,
+                ).where(Product.is_active == True)
+            )
+        ).all()
+        self.products.load(
+            SuggestEntry(row.id, row.name, row.slug, row.rating or 0.0)
+            for row in products
+        )
+        self.watermark = max((row.updated_at for row in products), default=None)
+        await self._reload_categories(session)
+        self.loaded = True
+        self.refreshed_at = time.monotonic()
+
+    async def _reload_categories(self, session: AsyncSession) -> None:
+        categories = await session.execute(
+            select(Category.id, Category.name, Category.slug).where(
+                Category.is_active == True
+            )
+        )
+        self.categories.load(
+            SuggestEntry(row.id, row.name, row.slug, 0.0) for row in categories
+        )
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """
+        Подтягивает изменения продуктов с прошлой загрузки и перечитывает категории.
+
+        Продукты, изменённые начиная с `watermark - REFRESH_OVERLAP`,
+        добавляются или обновляются, снятые с продажи — удаляются. Если после
+        этого число активных продуктов в БД не совпадает с индексом (продукт
+        удалён или изменение пропущено), индекс перестраивается целиком.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+        """
+        statement = select(
+            Product.id,
+            Product.name,
+            Product.slug,
+            Product.rating,
+            Product.is_active,
+            Product.updated_at,
+        )
+        if self.watermark is not None:
+            statement = statement.where(
+                Product.updated_at >= self.watermark - REFRESH_OVERLAP
+            )
+        changed = (await session.execute(statement)).all()
+        for row in changed:
+            if not row.is_active:
+                self.products.remove(row.id)
+        self.products.put_many(
+            SuggestEntry(row.id, row.name, row.slug, row.rating or 0.0)
+            for row in changed
+            if row.is_active
+        )
+        self.watermark = max(
+            (row.updated_at for row in changed), default=self.watermark
+        )
+        active = await session.scalar(
+            select(func.count()).select_from(Product).where(Product.is_active == True)
+        )
+        if active != len(self.products):
+            await self.reload(session)
+            return
+        await self._reload_categories(session)
+        self.refreshed_at = time.monotonic()
+
+    async def ensure_fresh(self) -> None:
+        """
+        Загружает индекс или подтягивает в него изменения, если пора.
+
+        Чтение идёт из основной БД: индекс общий для всех запросов процесса,
+        и отставшая реплика не должна его заполнять. Конкурентные вызовы
+        ждут одну загрузку, а не запускают свои.
+        """
+        if not self.is_fresh:
+            async with self._lock:
+                if not self.is_fresh:
+                    async with db.session() as ss:
+                        if self.loaded:
+                            await self.refresh(ss)
+                        else:
+                            await self.reload(ss)
+
+    def invalidate(self) -> None:
+        """Помечает индекс незагруженным; он будет построен при следующем обращении."""
+        self.loaded = False
+
+    def put_product(
+        self, product_id: int, name: str, slug: str, rating: Optional[float]
+    ) -> None:
+        """Добавляет или обновляет продукт."""
+        self.products.put(SuggestEntry(product_id, name, slug, rating or 0.0))
+
+    def put_products(
+        self, rows: Iterable[tuple[int, str, str, Optional[float]]]
+    ) -> None:
+        """Добавляет или обновляет пачку продуктов (id, name, slug, rating)."""
+        self.products.put_many(
+            SuggestEntry(product_id, name, slug, rating or 0.0)
+            for product_id, name, slug, rating in rows
+        )
+
+    def remove_product(self, product_id: int) -> None:
+        """Удаляет продукт."""
+        self.products.remove(product_id)
+
+    def set_product_rating(self, product_id: int, rating: Optional[float]) -> None:
+        """Обновляет рейтинг продукта."""
+        self.products.set_rating(product_id, rating or 0.0)
+
+    def put_category(self, category_id: int, name: str, slug: str) -> None:
+        """Добавляет или обновляет категорию."""
+        self.categories.put(SuggestEntry(category_id, name, slug, 0.0))
+
+    def remove_category(self, category_id: int) -> None:
+        """Удаляет категорию."""
+        self.categories.remove(category_id)
+
+    def suggest(self, prefix: str, limit: int) -> dict[str, list[dict[str, Any]]]:
+        """
+        Возвращает подсказки для префикса.
+
+        Args:
+            prefix (str): Введённый пользователем префикс.
+            limit (int): Максимальное количество подсказок каждого вида.
+
+        Returns:
+            dict: Продукты (`products`, по убыванию рейтинга) и категории
+                (`categories`, по названию).
+        """
+        return {
+            "products": [
+                entry.as_dict() for entry in self.products.search(prefix, limit)
+            ],
+            "categories": [
+                {
+                    key: value
+                    for key, value in entry.as_dict().items()
+                    if key != "rating"
+                }
+                for entry in self.categories.search(prefix, limit)
+            ],
+        }
+
+
+suggest_index = SuggestIndex(refresh_interval=setting.SUGGEST_REFRESH_INTERVAL)
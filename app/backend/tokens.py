@@ -0,0 +1,133 @@
+"""
+Модуль для выпуска и проверки подписанных токенов доступа.
+
+Токены имеют формат JWT (HS256) и подписываются ключом `Settings.SECRET_KEY`.
+Проверка токена не требует обращения к базе данных: все нужные для
+авторизации данные (id пользователя и его роли) хранятся в самом токене.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from typing import Any
+
+from app.backend.settings import setting
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+class TokenError(ValueError):
+    """Токен повреждён, подделан, просрочен или отозван."""
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(message: bytes) -> bytes:
+    return hmac.new(setting.SECRET_KEY.encode(), message, hashlib.sha256).digest()
+
+
+class RevocationList:
+    """
+    Список отозванных токенов (по их `jti`).
+
+    Запись хранится только до истечения срока действия самого токена,
+    после чего токен и так будет отклонён при проверке.
+    Список хранится в памяти процесса.
+    """
+
+    def __init__(self) -> None:
+        self._revoked: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Добавляет токен в список отозванных до момента `expires_at`."""
+        self._prune()
+        self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        """Проверяет, отозван ли токен."""
+        return jti in self._revoked
+
+    def _prune(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[jti]
+
+
+revocation_list = RevocationList()
+
+
+def create_token(claims: dict[str, Any], token_type: str, ttl: int) -> str:
+    """
+    Создаёт подписанный токен.
+
+    Args:
+        claims (dict): Полезная нагрузка токена.
+        token_type (str): Тип токена (`ACCESS_TOKEN` или `REFRESH_TOKEN`).
+        ttl (int): Время жизни токена в секундах.
+
+    Returns:
+        str: Токен в формате `header.payload.signature`.
+    """
+    now = int(time.time())
+    payload = {
+        **claims,
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + ttl,
+    }
+    signing_input = b".".join(
+        (
+            _b64encode(json.dumps(_HEADER, separators=(",", ":")).encode()),
+            _b64encode(json.dumps(payload, separators=(",", ":")).encode()),
+        )
+    )
+    return b".".join((signing_input, _b64encode(_sign(signing_input)))).decode()
+
+
+def decode_token(token: str, token_type: str) -> dict[str, Any]:
+    """
+    Проверяет подпись, срок действия, тип и отзыв токена.
+
+    Args:
+        token (str): Токен.
+        token_type (str): Ожидаемый тип токена.
+
+    Returns:
+        dict: Полезная нагрузка токена.
+
+    Raises:
+        TokenError: Если токен недействителен.
+    """
+    try:
+        header, payload, signature = token.split(".")
+        signature_ok = hmac.compare_digest(
+            _b64decode(signature), _sign(f"{header}.{payload}".encode())
+        )
+        claims = json.loads(_b64decode(payload)) if signature_ok else None
+    except (ValueError, TypeError) as e:
+        raise TokenError("Malformed token") from e
+    if not signature_ok or not isinstance(claims, dict):
+        raise TokenError("Invalid token signature")
+    if claims.get("type") != token_type:
+        raise TokenError("Invalid token type")
+    if claims.get("exp", 0) <= time.time():
+        raise TokenError("Token has expired")
+    if revocation_list.is_revoked(claims.get("jti", "")):
+        raise TokenError("Token has been revoked")
+    return claims
@@ -6,9 +6,27 @@
 import uvicorn
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
-
-from app.routers import category_router, product_router, auth_router, review_router
+from sqlalchemy import exc
+
+from app.routers import (
+    category_router,
+    product_router,
+    auth_router,
+    review_router,
+    service_router,
+    order_router,
+)
+from app.backend.db import engine, session
+from app.backend.metrics import MetricsMiddleware, metrics
+from app.backend.pool import pool_timeout_handler
+from app.backend.replicas import PrimaryStickyMiddleware, read_replicas
+from app.backend.category_tree import category_tree
+from app.backend.rating_queue import rating_queue
+from app.backend.reservations import reservation_sweeper
+from app.backend.suggest import suggest_index
+from app.backend.settings import setting
 
 
 @asynccontextmanager
@@ -16,7 +34,10 @@ async def lifespan(app: FastAPI) -> None:
     """
     Контекстный менеджер для управления жизненным циклом приложения FastAPI.
 
-    Выполняет действия при запуске и остановке приложения.
+    Выполняет действия при запуске и остановке приложения:
+    при запуске загружает in-memory дерево категорий и индекс автодополнения,
+    запускает очередь пересчёта рейтингов и фоновую отмену истёкших резервов,
+    при остановке сбрасывает накопленные дельты рейтингов.
 
     Аргументы:
         app (FastAPI): Экземпляр приложения FastAPI.
@@ -24,8 +45,22 @@ async def lifespan(app: FastAPI) -> None:
     Yields:
         None: Контекстный менеджер не возвращает значений.
     """
+    try:
+        async with session() as ss:
+            await category_tree.reload(ss)
+            await suggest_index.reload(ss)
+    except Exception as e:
+        # Без БД приложение всё равно стартует: дерево и индекс
+        # загрузятся при первом обращении
+        print(f"Не удалось загрузить дерево категорий и индекс подсказок: {e}")
+    if setting.RATING_QUEUE_ENABLED:
+        rating_queue.start()
+    reservation_sweeper.start()
     print("Приложение запущено")
     yield
+    await reservation_sweeper.stop()
+    await rating_queue.stop()
+    await read_replicas.dispose()
     print("Приложение остановлено")
 
 
@@ -33,7 +68,18 @@ app = FastAPI(
     lifespan=lifespan,
     title="FastAPI-Ecommerce",
     debug=True,
+    # Ответы с response_model сериализует Pydantic, а тело собирает orjson
+    default_response_class=ORJSONResponse,
+)
+# Исчерпанный пул подключений — 503 сразу, а не ожидание до таймаута клиента
+app.add_exception_handler(exc.TimeoutError, pool_timeout_handler)
+# После изменяющего запроса клиент некоторое время читает из основной БД
+app.add_middleware(
+    PrimaryStickyMiddleware, sticky_seconds=setting.DB_REPLICA_STICKY_SECONDS
 )
+if setting.METRICS_ENABLED:
+    # Добавлено последним — внешний слой, замеряет запрос целиком
+    app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/", tags=["TEST 👻"], summary="Тестовая апишка", description="Для теста")
@@ -52,11 +98,32 @@ async def main() -> dict:
     return {"STATUS": "OK"}
 
 
+@app.get(
+    "/metrics",
+    tags=["service ⚙️"],
+    summary="Метрики в формате Prometheus",
+    response_class=PlainTextResponse,
+)
+async def prometheus_metrics() -> PlainTextResponse:
+    """
+    Метрики запросов по маршрутам, запросов к БД и пула подключений.
+
+    Возвращает:
+        PlainTextResponse: Текстовый формат Prometheus (version 0.0.4).
+    """
+    return PlainTextResponse(
+        metrics.render(engine.pool.stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 # Подключаем роуты из category.py и products.py
 app.include_router(category_router)
 app.include_router(product_router)
 app.include_router(auth_router)
 app.include_router(review_router)
+app.include_router(service_router)
+app.include_router(order_router)
 
 
 if __name__ == "__main__":
@@ -5,7 +5,16 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from app.backend.db import setting, Category, Product, User, Review, Base
+from app.backend.db import (
+    setting,
+    Category,
+    Product,
+    User,
+    Review,
+    Order,
+    OrderItem,
+    Base,
+)
 
 
 config = context.config
@@ -20,6 +29,15 @@ config.set_main_option(
 
 target_metadata = Base.metadata
 
+# Объекты, которые создаются DDL-событиями и не описаны в моделях
+# (полнотекстовый поиск по продуктам, см. app/models/products.py)
+UNMAPPED_OBJECTS = {"search_vector", "ix_products_search_vector"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Не даёт autogenerate удалять объекты из UNMAPPED_OBJECTS."""
+    return not (reflected and compare_to is None and name in UNMAPPED_OBJECTS)
+
 
 def run_migrations_offline() -> None:
 
@@ -29,6 +47,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -48,6 +67,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_server_default=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
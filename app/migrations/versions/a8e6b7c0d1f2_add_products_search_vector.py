@@ -0,0 +1,45 @@
+"""add products search_vector with GIN index
+
+Revision ID: a8e6b7c0d1f2
+Revises: f7d5a6b9c0e1
+Create Date: 2026-10-17 15:12:40.731205
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.products import SEARCH_VECTOR_SQL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a8e6b7c0d1f2"
+down_revision: Union[str, Sequence[str], None] = "f7d5a6b9c0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Генерируемая колонка вычисляется для всех существующих строк при добавлении
+    op.execute(
+        "ALTER TABLE products ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+    )
+    op.create_index(
+        "ix_products_search_vector",
+        "products",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_products_search_vector", table_name="products", postgresql_using="gin"
+    )
+    op.drop_column("products", "search_vector")
@@ -0,0 +1,34 @@
+"""add reviews product index
+
+Revision ID: b3f1c2d4e5a6
+Revises: 7bbccf7db999
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f1c2d4e5a6"
+down_revision: Union[str, Sequence[str], None] = "7bbccf7db999"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_reviews_product_id_is_active_comment_date",
+        "reviews",
+        ["product_id", "is_active", "comment_date", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reviews_product_id_is_active_comment_date", table_name="reviews")
@@ -0,0 +1,29 @@
+"""add products updated_at index
+
+Revision ID: b9f7c8d1e2a3
+Revises: a8e6b7c0d1f2
+Create Date: 2026-10-17 16:40:03.118452
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b9f7c8d1e2a3"
+down_revision: Union[str, Sequence[str], None] = "a8e6b7c0d1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_products_updated_at", "products", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_updated_at", table_name="products")
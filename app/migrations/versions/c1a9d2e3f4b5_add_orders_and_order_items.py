@@ -0,0 +1,70 @@
+"""add orders and order_items
+
+Revision ID: c1a9d2e3f4b5
+Revises: b9f7c8d1e2a3
+Create Date: 2026-10-17 18:12:40.527316
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c1a9d2e3f4b5"
+down_revision: Union[str, Sequence[str], None] = "b9f7c8d1e2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_orders_id"), "orders", ["id"], unique=False)
+    op.create_index(op.f("ix_orders_user_id"), "orders", ["user_id"], unique=False)
+    # Фоновая отмена ищет истёкшие резервы по (status, expires_at)
+    op.create_index(
+        "ix_orders_status_expires_at", "orders", ["status", "expires_at"], unique=False
+    )
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ondelete="CASCADE"),
+        # Продукт из заказа не удаляется: позиции хранят историю заказов
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="RESTRICT"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_order_items_order_id"), "order_items", ["order_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_order_items_order_id"), table_name="order_items")
+    op.drop_table("order_items")
+    op.drop_index("ix_orders_status_expires_at", table_name="orders")
+    op.drop_index(op.f("ix_orders_user_id"), table_name="orders")
+    op.drop_index(op.f("ix_orders_id"), table_name="orders")
+    op.drop_table("orders")
@@ -0,0 +1,31 @@
+"""add products sort indexes
+
+Revision ID: c4a2d3e6f7b8
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-17 11:02:17.904512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a2d3e6f7b8"
+down_revision: Union[str, Sequence[str], None] = "b3f1c2d4e5a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_products_price_id", "products", ["price", "id"], unique=False)
+    op.create_index("ix_products_rating_id", "products", ["rating", "id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_rating_id", table_name="products")
+    op.drop_index("ix_products_price_id", table_name="products")
@@ -0,0 +1,31 @@
+"""add categories parent_id index
+
+Revision ID: d5b3e4f7a8c9
+Revises: c4a2d3e6f7b8
+Create Date: 2026-10-17 11:48:05.217733
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5b3e4f7a8c9"
+down_revision: Union[str, Sequence[str], None] = "c4a2d3e6f7b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_categories_parent_id"), "categories", ["parent_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_categories_parent_id"), table_name="categories")
@@ -0,0 +1,74 @@
+"""add products rating_sum and rating_count
+
+Revision ID: e6c4f5a8b9d0
+Revises: d5b3e4f7a8c9
+Create Date: 2026-10-17 12:36:52.550871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e6c4f5a8b9d0"
+down_revision: Union[str, Sequence[str], None] = "d5b3e4f7a8c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Количество продуктов, пересчитываемых одной транзакцией при заполнении
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "products",
+        sa.Column("rating_sum", sa.Float(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "products",
+        sa.Column("rating_count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    # Заполняем новые колонки пачками по id продуктов; каждая пачка
+    # коммитится отдельно, чтобы не держать блокировку на всей таблице.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        last_id = 0
+        while True:
+            upper_id = conn.execute(
+                sa.text(
+                    "SELECT max(id) FROM ("
+                    "SELECT id FROM products WHERE id > :last_id ORDER BY id LIMIT :batch_size"
+                    ") AS batch"
+                ),
+                {"last_id": last_id, "batch_size": BATCH_SIZE},
+            ).scalar()
+            if upper_id is None:
+                break
+            conn.execute(
+                sa.text(
+                    "UPDATE products SET "
+                    "rating_sum = totals.rating_sum, "
+                    "rating_count = totals.rating_count, "
+                    "rating = totals.rating_sum / totals.rating_count "
+                    "FROM ("
+                    "SELECT product_id, sum(rating) AS rating_sum, count(*) AS rating_count "
+                    "FROM reviews "
+                    "WHERE is_active AND product_id > :last_id AND product_id <= :upper_id "
+                    "GROUP BY product_id"
+                    ") AS totals "
+                    "WHERE products.id = totals.product_id"
+                ),
+                {"last_id": last_id, "upper_id": upper_id},
+            )
+            last_id = upper_id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("products", "rating_count")
+    op.drop_column("products", "rating_sum")
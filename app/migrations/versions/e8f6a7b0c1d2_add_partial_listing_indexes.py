@@ -0,0 +1,91 @@
+"""add partial listing indexes
+
+Revision ID: e8f6a7b0c1d2
+Revises: c1a9d2e3f4b5
+Create Date: 2026-10-17 20:41:08.613529
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8f6a7b0c1d2"
+down_revision: Union[str, Sequence[str], None] = "c1a9d2e3f4b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LISTED = sa.text("is_active AND stock > 0")
+ACTIVE = sa.text("is_active")
+
+# (имя, таблица, колонки, условие частичного индекса)
+NEW_INDEXES = (
+    ("ix_products_listed_id", "products", ["id"], LISTED),
+    ("ix_products_listed_price_id", "products", ["price", "id"], LISTED),
+    ("ix_products_listed_rating_id", "products", ["rating", "id"], LISTED),
+    ("ix_products_listed_category_id", "products", ["category_id", "id"], LISTED),
+    (
+        "ix_reviews_active_product_id_comment_date",
+        "reviews",
+        ["product_id", "comment_date", "id"],
+        ACTIVE,
+    ),
+    ("ix_reviews_active_comment_date", "reviews", ["comment_date", "id"], ACTIVE),
+    ("ix_orders_user_id_id", "orders", ["user_id", "id"], None),
+)
+
+# Индексы, которые заменяются новыми
+OLD_INDEXES = (
+    ("ix_products_price_id", "products", ["price", "id"], None),
+    ("ix_products_rating_id", "products", ["rating", "id"], None),
+    (
+        "ix_reviews_product_id_is_active_comment_date",
+        "reviews",
+        ["product_id", "is_active", "comment_date", "id"],
+        None,
+    ),
+    ("ix_orders_user_id", "orders", ["user_id"], None),
+)
+
+
+def create_concurrently(indexes) -> None:
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не работает внутри
+    # транзакции. Если построение прервалось, остаётся невалидный индекс,
+    # поэтому перед созданием он удаляется: миграцию можно просто повторить.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in indexes:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_where=where,
+                postgresql_concurrently=True,
+            )
+
+
+def drop_concurrently(indexes) -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in indexes:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Старые индексы удаляются только после того, как построены новые
+    create_concurrently(NEW_INDEXES)
+    drop_concurrently(OLD_INDEXES)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    create_concurrently(OLD_INDEXES)
+    drop_concurrently(NEW_INDEXES)
@@ -0,0 +1,48 @@
+"""make products rating not null
+
+Revision ID: f2b8c9d0e1a4
+Revises: e8f6a7b0c1d2
+Create Date: 2026-10-17 23:12:40.418257
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b8c9d0e1a4"
+down_revision: Union[str, Sequence[str], None] = "e8f6a7b0c1d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Продукты без рейтинга получают рейтинг из rating_sum / rating_count
+    # (или 0 без отзывов): ответы API читают строки без валидации.
+    op.execute(
+        "UPDATE products SET rating = CASE WHEN rating_count > 0 "
+        "THEN rating_sum / rating_count ELSE 0 END "
+        "WHERE rating IS NULL"
+    )
+    op.alter_column(
+        "products",
+        "rating",
+        existing_type=sa.Float(),
+        server_default="0",
+        nullable=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "products",
+        "rating",
+        existing_type=sa.Float(),
+        server_default=None,
+        nullable=True,
+    )
@@ -0,0 +1,49 @@
+"""add updated_at to products, categories and reviews
+
+Revision ID: f7d5a6b9c0e1
+Revises: e6c4f5a8b9d0
+Create Date: 2026-10-17 14:05:11.284913
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7d5a6b9c0e1"
+down_revision: Union[str, Sequence[str], None] = "e6c4f5a8b9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Существующие строки получают время миграции как начальную версию
+    op.add_column(
+        "products",
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+    )
+    op.add_column(
+        "categories",
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+    )
+    op.add_column(
+        "reviews",
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("reviews", "updated_at")
+    op.drop_column("categories", "updated_at")
+    op.drop_column("products", "updated_at")
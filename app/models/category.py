@@ -2,7 +2,10 @@
 Модуль содержит SQLAlchemy-модель для работы с категориями продуктов.
 """
 
-from sqlalchemy import Integer, ForeignKey, String, Boolean
+from datetime import datetime
+
+from sqlalchemy import Integer, ForeignKey, String, Boolean, DateTime
+from sqlalchemy.sql import func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -30,6 +33,7 @@ class Category(Base):
         name (str): Название категории.
         slug (str): Уникальный слаг (человекочитаемый идентификатор) категории.
         is_active (bool): Флаг активности категории. По умолчанию `True`.
+        updated_at (datetime): Версия строки: время последнего изменения. Обновляется в каждом UPDATE.
         product (list[Product]): Список продуктов, относящихся к данной категории. Связь "один ко многим" с таблицей `Product`.
 
     Отношения:
@@ -43,10 +47,14 @@ class Category(Base):
         Integer,  # Из класса категории сделать подкласс категории
         ForeignKey("categories.id", ondelete="CASCADE", onupdate="CASCADE"),
         nullable=True,
+        index=True,  # Для обхода дерева категорий от родителя к потомкам
     )
     name: Mapped[str] = mapped_column(String)
     slug: Mapped[str] = mapped_column(String, unique=True, index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
     product: Mapped[list["Product"]] = relationship(
         back_populates="category"
     )  # Отношение 1 к многим с таблицей Product
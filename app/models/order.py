@@ -0,0 +1,89 @@
+"""
+Модуль содержит SQLAlchemy-модели заказов и позиций заказа.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.products import Base
+
+# Статусы заказа
+ORDER_RESERVED = "reserved"  # Товар зарезервирован (остаток уменьшен), ждёт оплаты
+ORDER_PAID = "paid"
+ORDER_CANCELLED = "cancelled"
+ORDER_EXPIRED = "expired"  # Резерв истёк, остаток возвращён
+
+
+class Order(Base):
+    """
+    Модель заказа для базы данных.
+
+    Атрибуты:
+        id (int): Уникальный идентификатор заказа. Первичный ключ.
+        user_id (int): Идентификатор покупателя. Внешний ключ, ссылающийся на таблицу `users`.
+        status (str): Статус заказа: reserved, paid, cancelled или expired.
+        total (int): Сумма заказа по ценам на момент оформления.
+        created_at (datetime): Время оформления заказа.
+        expires_at (datetime): Время, до которого действует резерв остатка.
+        updated_at (datetime): Версия строки: время последнего изменения. Обновляется в каждом UPDATE.
+        items (list[OrderItem]): Позиции заказа.
+
+    Отношения:
+        Заказ принадлежит одному пользователю (`user_id`) и содержит позиции (`items`).
+    """
+
+    __tablename__ = "orders"
+    __table_args__ = (
+        # Фоновая очистка ищет истёкшие резервы по (status, expires_at)
+        Index("ix_orders_status_expires_at", "status", "expires_at"),
+        # История заказов пользователя листается по id от новых к старым
+        Index("ix_orders_user_id_id", "user_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default=ORDER_RESERVED
+    )
+    total: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
+
+    items: Mapped[list["OrderItem"]] = relationship(back_populates="order")
+
+
+class OrderItem(Base):
+    """
+    Модель позиции заказа для базы данных.
+
+    Атрибуты:
+        id (int): Уникальный идентификатор позиции. Первичный ключ.
+        order_id (int): Идентификатор заказа. Внешний ключ, ссылающийся на таблицу `orders`.
+        product_id (int): Идентификатор продукта. Внешний ключ, ссылающийся на таблицу `products`;
+            продукт, который есть в заказах, удалить нельзя.
+        quantity (int): Количество единиц продукта.
+        price (int): Цена единицы продукта на момент оформления заказа.
+        order (Order): Заказ, к которому относится позиция.
+    """
+
+    __tablename__ = "order_items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    order_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    product_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("products.id", ondelete="RESTRICT"), nullable=False
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    price: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    order: Mapped["Order"] = relationship(back_populates="items")
@@ -2,9 +2,22 @@
 Модуль содержит SQLAlchemy-модель для работы с продуктами.
 """
 
+from datetime import datetime
 from typing import Annotated
 
-from sqlalchemy import Integer, ForeignKey, String, Boolean, Float
+from sqlalchemy import (
+    DDL,
+    and_,
+    Integer,
+    ForeignKey,
+    String,
+    Boolean,
+    Float,
+    Index,
+    DateTime,
+    event,
+)
+from sqlalchemy.sql import func
 from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase
 
 from app.models.category import Base
@@ -27,8 +40,11 @@ class Product(Base):
         image_url (str): URL изображения продукта.
         stock (int): Количество продукта на складе.
         supplier_id (int): Идентификатор поставщика. Внешний ключ, ссылающийся на таблицу `users`.
-        rating (float): Рейтинг продукта.
+        rating (float): Рейтинг продукта, равный `rating_sum / rating_count`.
+        rating_sum (float): Сумма оценок активных отзывов.
+        rating_count (int): Количество активных отзывов.
         is_active (bool): Флаг активности продукта. По умолчанию `True`.
+        updated_at (datetime): Версия строки: время последнего изменения. Обновляется в каждом UPDATE.
         category_id (int): Идентификатор категории. Внешний ключ, ссылающийся на таблицу `categories`.
         category (Category): Категория, к которой относится продукт. Связь "многие к одному" с таблицей `Category`.
         review (list[Review]): Список отзывов о продукте. Связь "один ко многим" с таблицей `Review`.
@@ -38,6 +54,10 @@ class Product(Base):
     """
 
     __tablename__ = "products"
+    __table_args__ = (
+        # Инкрементальная выгрузка каталога по updated_since
+        Index("ix_products_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String)
@@ -49,8 +69,15 @@ class Product(Base):
     supplier_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True
     )
-    rating: Mapped[float] = mapped_column(Float)
+    rating: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0, server_default="0"
+    )
+    rating_sum: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
     category_id: Mapped[int] = mapped_column(
         ForeignKey("categories.id", ondelete="CASCADE")
     )
@@ -61,3 +88,41 @@ class Product(Base):
     review: Mapped[list["Review"]] = relationship(
         back_populates="product"
     )  # 1 продукт - много отзывов
+
+
+# Витрина (список продуктов и категории) показывает только активные продукты
+# в наличии. Частичные индексы по этому условию содержат лишь видимые
+# продукты и отдают страницу keyset-пагинации уже в нужном порядке.
+LISTED = and_(Product.is_active == True, Product.stock > 0)
+listed = {"postgresql_where": LISTED, "sqlite_where": LISTED}
+Index("ix_products_listed_id", Product.id, **listed)
+Index("ix_products_listed_price_id", Product.price, Product.id, **listed)
+Index("ix_products_listed_rating_id", Product.rating, Product.id, **listed)
+Index("ix_products_listed_category_id", Product.category_id, Product.id, **listed)
+
+
+# Полнотекстовый поиск по продуктам (только PostgreSQL).
+# Колонка `search_vector` генерируется базой из name (вес A) и description
+# (вес B) и не отображается в модель, чтобы схема оставалась переносимой
+# на другие СУБД. Конфигурация `russian` стеммит и русские, и латинские слова.
+SEARCH_CONFIG = "russian"
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+)
+
+event.listen(
+    Product.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE products ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Product.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)"
+    ).execute_if(dialect="postgresql"),
+)
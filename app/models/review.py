@@ -12,6 +12,7 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     DateTime,
+    Index,
     text,
 )
 from sqlalchemy.sql import func
@@ -32,6 +33,7 @@ class Review(Base):
         comment (str): Текст комментария к продукту. Максимальная длина 255 символов.
         comment_date (datetime): Дата и время создания отзыва. По умолчанию устанавливается текущее время на сервере.
         is_active (bool): Флаг активности отзыва. По умолчанию `True`.
+        updated_at (datetime): Версия строки: время последнего изменения. Обновляется в каждом UPDATE.
         product (Product): Продукт, к которому относится отзыв. Связь "многие к одному" с таблицей `Product`.
         user (User): Пользователь, оставивший отзыв. Связь "многие к одному" с таблицей `User`.
 
@@ -40,7 +42,6 @@ class Review(Base):
     """
 
     __tablename__ = "reviews"
-
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
@@ -52,6 +53,24 @@ class Review(Base):
     comment: Mapped[str] = mapped_column(String(255), nullable=False)
     comment_date: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now()
+    )
 
     product: Mapped["Product"] = relationship(back_populates="review")
     user: Mapped["User"] = relationship(back_populates="review")
+
+
+# Читаются только активные отзывы: товара — по product_id, ленты — все подряд;
+# и те и другие листаются по (comment_date, id) от новых к старым. Частичные
+# индексы отдают их уже в нужном порядке и не хранят удалённые отзывы.
+ACTIVE = Review.is_active == True
+active = {"postgresql_where": ACTIVE, "sqlite_where": ACTIVE}
+Index(
+    "ix_reviews_active_product_id_comment_date",
+    Review.product_id,
+    Review.comment_date,
+    Review.id,
+    **active,
+)
+Index("ix_reviews_active_comment_date", Review.comment_date, Review.id, **active)
@@ -3,3 +3,5 @@ from .products import router as product_router # Импортируем роут
 from .auth import router as auth_router # Импортируем роутер из auth
 from .reviews import router as review_router # Импортируем роутер из reviews
 
+from .service import router as service_router # Импортируем роутер из service
+from .orders import router as order_router # Импортируем роутер из orders
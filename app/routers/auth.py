@@ -2,22 +2,49 @@
 Модуль аутентификации для регистрации и авторизации пользователей.
 """
 
+import asyncio
+import hashlib
+import hmac
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, status, HTTPException, Response
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.security import (
+    HTTPBasic,
+    HTTPBasicCredentials,
+    HTTPBearer,
+    HTTPAuthorizationCredentials,
+)
 
-from sqlalchemy import select, insert
+from sqlalchemy import select, insert, event, inspect
+from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from passlib.context import CryptContext
 
 
 from app.models.user import User
-from app.schemas import CreateUser, UserResponse
+from app.schemas import (
+    CreateUser,
+    UserResponse,
+    CurrentUser,
+    TokenPair,
+    TokenRequest,
+)
 
 
+from app.backend.cache import TTLCache
 from app.backend.db_depends import get_session  # Импортирую функцию зависимость
+from app.backend.settings import setting
+from app.backend.tokens import (
+    ACCESS_TOKEN,
+    REFRESH_TOKEN,
+    TokenError,
+    create_token,
+    decode_token,
+    revocation_list,
+)
 
 session = Annotated[
     AsyncSession, Depends(get_session)
@@ -27,6 +54,79 @@ session = Annotated[
 router = APIRouter(prefix="/auth", tags=["auth 🤷🤷‍♂️👶"])
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBasic()  # Всплывающая форма входа
+optional_basic = HTTPBasic(auto_error=False)  # Basic как запасная схема для токенов
+bearer = HTTPBearer(auto_error=False)  # Authorization: Bearer <access_token>
+
+# bcrypt занимает десятки миллисекунд CPU, поэтому хеширование и проверка
+# паролей выполняются в ограниченном пуле потоков, а не в event loop.
+hash_executor = ThreadPoolExecutor(
+    max_workers=setting.AUTH_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+
+# username -> (HMAC-дайджест пароля, CurrentUser). Сам пароль в памяти не хранится,
+# а ключ HMAC живёт только в текущем процессе.
+credentials_cache = TTLCache(
+    maxsize=setting.AUTH_CACHE_SIZE, ttl=setting.AUTH_CACHE_TTL
+)
+_digest_key = secrets.token_bytes(32)
+
+
+async def hash_password(password: str) -> str:
+    """Хеширует пароль bcrypt в пуле потоков `hash_executor`."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, bcrypt_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """Проверяет пароль по bcrypt-хешу в пуле потоков `hash_executor`."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        hash_executor, bcrypt_context.verify, password, hashed_password
+    )
+
+
+def credentials_digest(password: str) -> bytes:
+    """Возвращает HMAC-SHA256 дайджест пароля для ключа кэша учётных данных."""
+    return hmac.new(_digest_key, password.encode(), hashlib.sha256).digest()
+
+
+def invalidate_user_credentials(username: str | None = None) -> None:
+    """
+    Удаляет закэшированные учётные данные пользователя.
+
+    Вызывается при смене пароля или ролей пользователя. Без аргументов
+    очищает кэш полностью.
+
+    Аргументы:
+        username (str | None): Имя пользователя или None для полной очистки.
+    """
+    if username is None:
+        credentials_cache.clear()
+    else:
+        credentials_cache.pop(username)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_flush(mapper, connection, target: User) -> None:
+    """Сбрасывает кэш пользователя, изменённого или удалённого через ORM flush."""
+    invalidate_user_credentials(target.username)
+    for old_username in inspect(target).attrs.username.history.deleted or ():
+        invalidate_user_credentials(old_username)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state) -> None:
+    """
+    Сбрасывает кэш при массовых `update(User)` / `delete(User)`.
+
+    Какие именно строки затронуты, без дополнительного запроса неизвестно,
+    поэтому кэш очищается целиком — такие операции редки.
+    """
+    if (
+        orm_execute_state.is_update or orm_execute_state.is_delete
+    ) and orm_execute_state.bind_mapper is User.__mapper__:
+        invalidate_user_credentials()
 
 
 @router.post("/", summary="Создать пользователя")
@@ -51,7 +151,7 @@ async def create_user(session: session, new_user: CreateUser) -> dict | str:
                 "last_name": new_user.last_name,
                 "username": new_user.username,
                 "email": new_user.email,
-                "hashed_password": bcrypt_context.hash(new_user.password),
+                "hashed_password": await hash_password(new_user.password),
             },
         ],
     )
@@ -65,30 +165,178 @@ async def create_user(session: session, new_user: CreateUser) -> dict | str:
 
 async def get_current_username(
     session: session, credentials: HTTPBasicCredentials = Depends(security)
-):
+) -> CurrentUser:
     """
     Аутентифицирует пользователя на основе предоставленных учетных данных.
 
+    Недавно проверенные учетные данные берутся из `credentials_cache`,
+    что позволяет пропустить и запрос к БД, и проверку bcrypt-хеша.
+
     Аргументы:
         session (AsyncSession): Асинхронная сессия базы данных.
         credentials (HTTPBasicCredentials): Учетные данные для HTTP Basic Authentication.
 
     Возвращает:
-        User: Объект пользователя, если аутентификация прошла успешно.
+        CurrentUser: Данные пользователя, если аутентификация прошла успешно.
 
     Исключения:
         HTTPException: Возникает, если аутентификация не удалась.
     """
+    digest = credentials_digest(credentials.password)
+    cached = credentials_cache.get(credentials.username)
+    if cached is not None and hmac.compare_digest(cached[0], digest):
+        return cached[1]
+
     user = await session.scalar(
         select(User).where(User.username == credentials.username)
     )
-    if not user or not bcrypt_context.verify(
+    if not user or not await verify_password(
         credentials.password, user.hashed_password
     ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Вы не авторизованы"
         )
-    return user
+    current_user = CurrentUser.model_validate(user)
+    credentials_cache.set(credentials.username, (digest, current_user))
+    return current_user
+
+
+def issue_tokens(user: CurrentUser) -> TokenPair:
+    """
+    Выпускает пару токенов (доступа и обновления) для пользователя.
+
+    Аргументы:
+        user (CurrentUser): Аутентифицированный пользователь.
+
+    Возвращает:
+        TokenPair: Токены доступа и обновления.
+    """
+    claims = {
+        "id": user.id,
+        "username": user.username,
+        "is_admin": bool(user.is_admin),
+        "is_supplier": bool(user.is_supplier),
+        "is_customer": bool(user.is_customer),
+    }
+    return TokenPair(
+        access_token=create_token(claims, ACCESS_TOKEN, setting.ACCESS_TOKEN_TTL),
+        refresh_token=create_token(
+            {"id": user.id}, REFRESH_TOKEN, setting.REFRESH_TOKEN_TTL
+        ),
+        expires_in=setting.ACCESS_TOKEN_TTL,
+    )
+
+
+def _token_claims(token: str, token_type: str) -> dict:
+    """Проверяет токен и переводит ошибку проверки в HTTP 401."""
+    try:
+        return decode_token(token, token_type)
+    except TokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+async def get_current_user(
+    session: session,
+    token: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)],
+    credentials: Annotated[HTTPBasicCredentials | None, Depends(optional_basic)],
+) -> CurrentUser:
+    """
+    Аутентифицирует пользователя по токену доступа или, если токена нет, по HTTP Basic.
+
+    Проверка токена не обращается к базе данных: id и роли берутся из самого токена.
+
+    Аргументы:
+        session (AsyncSession): Асинхронная сессия базы данных (только для Basic).
+        token (HTTPAuthorizationCredentials | None): Заголовок `Authorization: Bearer`.
+        credentials (HTTPBasicCredentials | None): Учетные данные HTTP Basic.
+
+    Возвращает:
+        CurrentUser: Данные пользователя.
+
+    Исключения:
+        HTTPException: Возникает, если аутентификация не удалась.
+    """
+    if token is not None:
+        return CurrentUser.model_validate(
+            _token_claims(token.credentials, ACCESS_TOKEN)
+        )
+    if credentials is not None:
+        return await get_current_username(session, credentials)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Вы не авторизованы",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+@router.post("/token", summary="Получить токены доступа по логину и паролю")
+async def login_for_token(
+    user: Annotated[CurrentUser, Depends(get_current_username)],
+) -> TokenPair:
+    """
+    Проверяет пароль (HTTP Basic) один раз и выпускает короткоживущий токен доступа.
+
+    Аргументы:
+        user (CurrentUser): Пользователь, прошедший HTTP Basic аутентификацию.
+
+    Возвращает:
+        TokenPair: Токены доступа и обновления.
+    """
+    return issue_tokens(user)
+
+
+@router.post("/refresh", summary="Обновить токены доступа")
+async def refresh_token(session: session, request: TokenRequest) -> TokenPair:
+    """
+    Выпускает новую пару токенов по токену обновления.
+
+    Использованный токен обновления отзывается. Роли пользователя перечитываются
+    из базы данных, поэтому изменения ролей вступают в силу при обновлении.
+
+    Аргументы:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        request (TokenRequest): Токен обновления.
+
+    Возвращает:
+        TokenPair: Новые токены доступа и обновления.
+
+    Исключения:
+        HTTPException: Возникает, если токен недействителен или пользователь не найден.
+    """
+    claims = _token_claims(request.token, REFRESH_TOKEN)
+    user = await session.scalar(select(User).where(User.id == claims["id"]))
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Вы не авторизованы"
+        )
+    revocation_list.revoke(claims["jti"], claims["exp"])
+    return issue_tokens(CurrentUser.model_validate(user))
+
+
+@router.post("/revoke", summary="Отозвать токен")
+async def revoke_token(request: TokenRequest) -> dict:
+    """
+    Отзывает токен доступа или обновления до истечения его срока действия.
+
+    Аргументы:
+        request (TokenRequest): Отзываемый токен.
+
+    Возвращает:
+        dict: Словарь с кодом статуса и результатом транзакции.
+
+    Исключения:
+        HTTPException: Возникает, если токен недействителен.
+    """
+    try:
+        claims = decode_token(request.token, ACCESS_TOKEN)
+    except TokenError:
+        claims = _token_claims(request.token, REFRESH_TOKEN)
+    revocation_list.revoke(claims["jti"], claims["exp"])
+    return {"status_code": status.HTTP_200_OK, "transaction": "Token revoked"}
 
 
 @router.get("/users/me")
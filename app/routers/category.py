@@ -5,49 +5,103 @@ API для взаимодействия с категориями товаров
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Request, Response
 
-from sqlalchemy import select, insert, update
+from sqlalchemy import insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from slugify import slugify
 
-from app.schemas import CreateCategory
+from app.schemas import CategoryOut, CreateCategory
 
 from app.models.category import Category  # Импортирую SQLAlchemy модель
-from app.backend.db_depends import get_session  # Импортирую функцию зависимость
+from app.backend.db_depends import (  # Импортирую функции зависимости
+    get_read_session,
+    get_session,
+)
+from app.backend import reads
+from app.backend.category_tree import category_tree
+from app.backend.response_cache import cached_response, response_cache
+from app.backend.suggest import suggest_index
+from app.backend.etag import etag_matches, has_conditional, not_modified, rows_etag
 
-from app.routers.auth import get_current_username
+from app.routers.auth import get_current_user
 
 
 session = Annotated[
     AsyncSession, Depends(get_session)
 ]  # Аннотация типа для зависимости сессии
+read_session = Annotated[
+    AsyncSession, Depends(get_read_session)
+]  # Сессия только для чтения: реплика или основная БД
 
 
 router = APIRouter(prefix="/category", tags=["category 🍔🍑🍅"])
 
 
-@router.get("/all_categories", summary="Получить все категории продуктов")
-async def get_all_categories(session: session):
+@router.get(
+    "/all_categories",
+    summary="Получить все категории продуктов",
+    response_model=list[CategoryOut],
+)
+@cached_response(tags=lambda **kwargs: ["category:all"])
+async def get_all_categories(
+    session: read_session, request: Request, response: Response
+):
     """Возвращает список всех активных категорий продуктов.
+    Если включено in-memory дерево категорий, список отдаётся из него.
+    ETag строится по версиям категорий; при совпадении с `If-None-Match`
+    возвращается 304.
     Args:
         session: Асинхронная сессия SQLAlchemy.
+        request: Входящий запрос (заголовок `If-None-Match`).
+        response: Ответ, в который выставляется заголовок `ETag`.
     Returns:
-        List[Category]: Список объектов Category.
+        list[CategoryOut]: Активные категории.
     Raises:
         HTTPException: Если не удалось выполнить запрос."""
-    query = select(Category).where(Category.is_active == True)
-    catherories = await session.execute(query)
-    all_catherories = catherories.scalars().all()
-    return all_catherories
+    if await category_tree.ensure_fresh():
+        etag = category_tree.etag()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return category_tree.active()
+    query = reads.active_categories_statement()
+    if has_conditional(request):
+        versions = await reads.fetch_all(
+            session,
+            query.with_only_columns(
+                reads.categories.c.id, reads.categories.c.updated_at
+            ),
+        )
+        etag = rows_etag("categories", versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    all_catherories = await reads.fetch_all(session, query)
+    response.headers["ETag"] = rows_etag("categories", all_catherories)
+    return CategoryOut.from_rows(all_catherories)
+
+
+@router.get("/tree", summary="Получить дерево категорий продуктов")
+async def get_category_tree():
+    """Возвращает дерево активных категорий из памяти процесса.
+    Returns:
+        list[dict]: Корневые категории с вложенными списками `children`.
+    Raises:
+        HTTPException: Если in-memory дерево категорий отключено."""
+    if not await category_tree.ensure_fresh():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Category tree cache is disabled",
+        )
+    return category_tree.nested()
 
 
 @router.post("/create", summary="Создать категорию продуктов")
 async def create_category(
     session: session,
     category: CreateCategory,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
 ) -> dict:
     """Создает новую категорию продуктов.
     Args:
@@ -61,15 +115,22 @@ async def create_category(
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="You cannot add categories."
         )
-    category_create = insert(Category).values(
-        {
-            "parent_id": category.parent_id,
-            "name": category.name,
-            "slug": slugify(category.name),
-        },
+    category_create = (
+        insert(Category)
+        .values(
+            {
+                "parent_id": category.parent_id,
+                "name": category.name,
+                "slug": slugify(category.name),
+            },
+        )
+        .returning(Category.id)
     )
-    await session.execute(category_create)
+    category_id = await session.scalar(category_create)
     await session.commit()
+    await category_tree.reload(session)
+    suggest_index.put_category(category_id, category.name, slugify(category.name))
+    response_cache.invalidate("category:*")
     return {"status_code": status.HTTP_201_CREATED, "transaction": "Successful"}
 
 
@@ -78,7 +139,7 @@ async def update_category(
     session: session,
     category_id: int,
     new_data: CreateCategory,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
 ):
     """Обновляет данные категории продуктов.
     Args:
@@ -95,12 +156,6 @@ async def update_category(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You cannot update categories.",
         )
-    category_update = select(Category).where(Category.id == category_id)
-    result = await session.execute(category_update)
-    if not result:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found"
-        )
     query = (
         update(Category)
         .values(
@@ -111,9 +166,18 @@ async def update_category(
             },
         )
         .filter_by(id=category_id)
+        .returning(Category.is_active)
     )
-    await session.execute(query)
+    is_active = await session.scalar(query)
+    if is_active is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found"
+        )
     await session.commit()
+    await category_tree.reload(session)
+    if is_active:
+        suggest_index.put_category(category_id, new_data.name, slugify(new_data.name))
+    response_cache.invalidate("category:*")
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Category update is successful",
@@ -124,7 +188,7 @@ async def update_category(
 async def delete_category(
     session: session,
     category_id: int,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
 ) -> dict:
     """Выполняет мягкое удаление категории (is_active=False).
     Args:
@@ -140,16 +204,20 @@ async def delete_category(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You cannot delete categories.",
         )
-    category_delete = select(Category).where(Category.id == category_id)
-    result = await session.execute(category_delete)
-
-    if not result.scalars().one_or_none():
+    query = (
+        update(Category)
+        .values(is_active=False)
+        .filter_by(id=category_id)
+        .returning(Category.id)
+    )
+    if await session.scalar(query) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There is no category found"
         )
-    query = update(Category).values(is_active=False).filter_by(id=category_id)
-    await session.execute(query)
     await session.commit()
+    await category_tree.reload(session)
+    suggest_index.remove_category(category_id)
+    response_cache.invalidate("category:*")
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Category delete is successful",
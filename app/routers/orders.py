@@ -0,0 +1,211 @@
+"""
+API для оформления заказов.
+Оформление резервирует остаток всех позиций одним условным UPDATE
+(см. `app.backend.reservations`), поэтому параллельные заказы не продают
+больше, чем есть на складе. Неоплаченный заказ держит резерв ограниченное
+время, после чего остаток возвращает фоновая задача.
+"""
+
+from typing import Annotated, Any, Dict
+
+from fastapi import APIRouter, Depends, status, HTTPException, Query
+
+from sqlalchemy import update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas import CreateOrder, CurrentUser
+
+from app.models.order import (
+    ORDER_CANCELLED,
+    ORDER_PAID,
+    ORDER_RESERVED,
+    Order,
+)
+from app.backend import reads
+from app.backend.db_depends import get_session
+from app.backend.reservations import (
+    InsufficientStock,
+    invalidate_products,
+    place_order,
+    release_orders,
+)
+from app.backend.settings import setting
+
+from app.routers.auth import get_current_user
+
+
+session = Annotated[
+    AsyncSession, Depends(get_session)
+]  # Аннотация типа для зависимости сессии
+
+
+router = APIRouter(prefix="/orders", tags=["orders 🛒"])
+
+
+async def order_or_404(session: AsyncSession, order_id: int, user: CurrentUser):
+    """Возвращает строку заказа пользователя (администратору — любой) или 404."""
+    order = await reads.fetch_one(session, reads.order_statement(order_id))
+    if order is None or not (user.is_admin or order.user_id == user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
+        )
+    return order
+
+
+def user_order(order_id: int, user: CurrentUser) -> list:
+    """Условие на заказ пользователя (администратору — любой) для UPDATE."""
+    if user.is_admin:
+        return [Order.id == order_id]
+    return [Order.id == order_id, Order.user_id == user.id]
+
+
+@router.post("/checkout", summary="Оформить заказ", status_code=status.HTTP_201_CREATED)
+async def checkout(
+    session: session,
+    order: CreateOrder,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> Dict[str, Any]:
+    """Оформление заказа с резервированием остатка.
+    Остаток всех позиций уменьшается одним условным UPDATE: если хотя бы
+    одной позиции не хватает, заказ не создаётся и остатки не меняются.
+    Args:
+        order (CreateOrder): Позиции заказа (одинаковые продукты складываются).
+    Returns:
+        Dict[str, Any]: Идентификатор, сумма, статус заказа и время жизни резерва.
+    Raises:
+        HTTPException: 409, если остатка не хватает (в `detail` — id продуктов).
+    """
+    quantities: dict[int, int] = {}
+    for line in order.items:
+        quantities[line.product_id] = quantities.get(line.product_id, 0) + line.quantity
+    try:
+        order_id, total = await place_order(session, user.id, list(quantities.items()))
+    except InsufficientStock as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Insufficient stock", "product_ids": e.product_ids},
+        )
+    return {
+        "order_id": order_id,
+        "total": total,
+        "status": ORDER_RESERVED,
+        "expires_in": setting.ORDER_RESERVATION_TTL,
+    }
+
+
+@router.get("/", summary="Получить свои заказы")
+async def my_orders(
+    session: session,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[Dict[str, Any]]:
+    """Последние заказы текущего пользователя.
+    Args:
+        limit: Максимальное количество заказов.
+    Returns:
+        list[Dict[str, Any]]: Заказы от новых к старым.
+    """
+    result = await reads.fetch_all(session, reads.user_orders_statement(user.id, limit))
+    return [row._asdict() for row in result]
+
+
+@router.get("/{order_id}", summary="Получить заказ")
+async def order_detail(
+    session: session,
+    order_id: int,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> Dict[str, Any]:
+    """Заказ с позициями.
+    Args:
+        order_id (int): Идентификатор заказа.
+    Returns:
+        Dict[str, Any]: Заказ и его позиции (`items`).
+    Raises:
+        HTTPException: Если заказ не найден или принадлежит другому пользователю.
+    """
+    order = await order_or_404(session, order_id, user)
+    items = await reads.fetch_all(session, reads.order_items_statement(order_id))
+    return {
+        "id": order.id,
+        "status": order.status,
+        "total": order.total,
+        "created_at": order.created_at,
+        "expires_at": order.expires_at,
+        "items": [row._asdict() for row in items],
+    }
+
+
+@router.post("/{order_id}/pay", summary="Подтвердить оплату заказа")
+async def pay_order(
+    session: session,
+    order_id: int,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> Dict[str, Any]:
+    """Перевод зарезервированного заказа в статус paid.
+    Владелец, статус и срок резерва проверяются в том же UPDATE, поэтому
+    оплата не пересекается с фоновой отменой истёкшего резерва. Заказ
+    отдельно читается, только если UPDATE не изменил строку (404 или 409).
+    Args:
+        order_id (int): Идентификатор заказа.
+    Returns:
+        Dict[str, Any]: Идентификатор и новый статус заказа.
+    Raises:
+        HTTPException: 404, если заказ не найден; 409, если резерв уже
+            истёк или заказ не ожидает оплаты.
+    """
+    paid = await session.scalar(
+        update(Order)
+        .where(
+            *user_order(order_id, user),
+            Order.status == ORDER_RESERVED,
+            Order.expires_at > func.now(),
+        )
+        .values(status=ORDER_PAID)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    if paid is None:
+        await session.rollback()
+        await order_or_404(session, order_id, user)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order is not awaiting payment",
+        )
+    await session.commit()
+    return {"order_id": order_id, "status": ORDER_PAID}
+
+
+@router.post("/{order_id}/cancel", summary="Отменить заказ")
+async def cancel_order(
+    session: session,
+    order_id: int,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> Dict[str, Any]:
+    """Отмена неоплаченного заказа с возвратом остатка.
+    Как и при оплате, владелец и статус проверяются в самом UPDATE.
+    Args:
+        order_id (int): Идентификатор заказа.
+    Returns:
+        Dict[str, Any]: Идентификатор и новый статус заказа.
+    Raises:
+        HTTPException: 404, если заказ не найден; 409, если заказ уже
+            оплачен, отменён или истёк.
+    """
+    cancelled = await session.scalar(
+        update(Order)
+        .where(*user_order(order_id, user), Order.status == ORDER_RESERVED)
+        .values(status=ORDER_CANCELLED)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    if cancelled is None:
+        await session.rollback()
+        await order_or_404(session, order_id, user)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only reserved orders can be cancelled",
+        )
+    slugs = await release_orders(session, [order_id])
+    await session.commit()
+    invalidate_products(slugs)
+    return {"order_id": order_id, "status": ORDER_CANCELLED}
@@ -3,54 +3,318 @@ API для взаимодействия с продуктами.
 Предоставляет CRUD-операции для управления продуктами.
 """
 
-from typing import Annotated, List, Dict, Any
+from datetime import datetime, timezone
+from functools import partial
+from typing import Annotated, Dict, Any, Literal
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    status,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 
-from sqlalchemy import select, insert, update, and_, delete
+from sqlalchemy import exc, select, insert, update, delete, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from slugify import slugify
 
-from app.schemas import CreateProduct
+from app.schemas import (
+    CreateProduct,
+    CurrentUser,
+    Page,
+    ProductOut,
+    UpdateProductStock,
+)
 
 from app.models.category import Category
 from app.models.products import Product  # Импортирую SQLAlchemy модель
-from app.backend.db_depends import get_session  # Импортирую функцию зависимость
+from app.backend.db import is_postgres
+from app.backend.db_depends import (  # Импортирую функции зависимости
+    get_read_session,
+    get_session,
+)
+from app.backend.category_tree import category_tree
+from app.backend.response_cache import cached_response, response_cache
+from app.backend.search import (
+    like_search_statement,
+    render_highlight,
+    search_statement,
+)
+from app.backend.export import EXPORT_COLUMNS, MEDIA_TYPES, stream_export
+from app.backend.bulk import (
+    PARSERS,
+    ImportReportResponse,
+    ProductImporter,
+    iter_lines,
+    stock_update_rows,
+    stock_update_statement,
+)
+from app.backend import reads
+from app.backend.settings import setting
+from app.backend.suggest import MAX_KEY_LENGTH, MAX_SUGGESTIONS, suggest_index
+from app.backend.etag import (
+    etag_matches,
+    has_conditional,
+    make_etag,
+    not_modified,
+    rows_etag,
+)
+from app.backend.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    is_cursor_int,
+    make_page,
+)
 
-from app.routers.auth import get_current_username
+from app.routers.auth import get_current_user
 
 session = Annotated[
     AsyncSession, Depends(get_session)
 ]  # Аннотация типа для зависимости сессии
+read_session = Annotated[
+    AsyncSession, Depends(get_read_session)
+]  # Сессия только для чтения: реплика или основная БД
 
 
 router = APIRouter(prefix="/products", tags=["products 🥭🍎🍐"])
 
+page_limit = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
 
-@router.get("/", summary="Получить все продукты")
-async def all_products(session: session):
-    """Получение всех активных продуктов с ненулевым остатком.
+
+def owned_by(user: CurrentUser) -> list:
+    """Условие на изменяемые продукты: администратор меняет любые, поставщик — только свои."""
+    return [] if user.is_admin else [Product.supplier_id == user.id]
+
+
+async def unchanged_product_error(
+    session: AsyncSession, product_slug: str
+) -> HTTPException:
+    """Ошибка для изменения продукта, которое не затронуло ни одной строки.
+    Запрос на существование продукта выполняется только в этом случае.
+    Args:
+        product_slug (str): Slug продукта.
     Returns:
-        List[Product]: Список объектов Product.
+        HTTPException: 403, если продукт принадлежит другому поставщику, иначе 404.
+    """
+    product_id = await session.scalar(select(Product.id).filter_by(slug=product_slug))
+    if product_id is not None:
+        return HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to use this method.",
+        )
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="There is no product found"
+    )
+
+
+def valid_sort_value(sort: str, value: Any) -> bool:
+    """Подходит ли значение ключа сортировки из курсора к колонке `sort`."""
+    if sort == "rating":
+        # Рейтинг — вещественный и может быть NULL
+        return value is None or is_cursor_int(value) or isinstance(value, float)
+    return is_cursor_int(value)
+
+
+@router.get("/", summary="Получить все продукты", response_model=Page[ProductOut])
+@cached_response(tags=lambda **kwargs: ["product:list"])
+async def all_products(
+    session: read_session,
+    request: Request,
+    response: Response,
+    sort: Literal["id", "price", "rating"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: str | None = None,
+    limit: page_limit = DEFAULT_PAGE_SIZE,
+):
+    """Получение страницы активных продуктов с ненулевым остатком.
+    Пагинация курсорная (keyset) по паре (ключ сортировки, id),
+    поэтому любая страница стоит столько же, сколько первая.
+    ETag страницы строится по версиям (`updated_at`) её строк; при совпадении
+    с `If-None-Match` возвращается 304 без выборки самих продуктов.
+    Args:
+        request: Входящий запрос (заголовок `If-None-Match`).
+        response: Ответ, в который выставляется заголовок `ETag`.
+        sort: Ключ сортировки: id, price или rating.
+        order: Направление сортировки: asc или desc.
+        cursor: Курсор из `next_cursor` предыдущей страницы.
+        limit: Размер страницы.
+    Returns:
+        Page[ProductOut]: Продукты страницы (`items`) и курсор следующей
+            страницы (`next_cursor`).
     Raises:
-        HTTPException: Если продукты не найдены.
+        HTTPException: Если продукты не найдены или курсор недействителен.
     """
-    products = select(Product).where(and_(Product.is_active == True, Product.stock > 0))
-    query = await session.execute(products)
-    products_all = query.scalars().all()
-    if not products_all:
+    after = None
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != 4 or values[:2] != [sort, order]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor does not match sort order",
+            )
+        if not (valid_sort_value(sort, values[2]) and is_cursor_int(values[3])):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        after = (values[2], values[3])
+    products = reads.product_page_statement(sort, order == "desc", after, limit + 1)
+    page_key = str(request.query_params)
+    if has_conditional(request):
+        versions = await reads.fetch_all(
+            session,
+            products.with_only_columns(
+                reads.products.c.id, reads.products.c.updated_at
+            ),
+        )
+        etag = rows_etag(page_key, versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    all_rows = await reads.fetch_all(session, products)
+    rows, next_cursor = make_page(
+        all_rows, limit, lambda row: (sort, order, getattr(row, sort), row.id)
+    )
+    if not rows and cursor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There are no product"
         )
-    return products_all
+    response.headers["ETag"] = rows_etag(page_key, all_rows)
+    return Page[ProductOut](items=ProductOut.from_rows(rows), next_cursor=next_cursor)
+
+
+@router.get("/search", summary="Полнотекстовый поиск продуктов")
+@cached_response(tags=lambda **kwargs: ["product:list"])
+async def search_products(
+    session: read_session,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    cursor: str | None = None,
+    limit: page_limit = DEFAULT_PAGE_SIZE,
+):
+    """Поиск активных продуктов с ненулевым остатком по названию и описанию.
+    Результаты упорядочены по релевантности (`ts_rank`), совпадения
+    подсвечены тегами <b>...</b> в `name_highlight` и `description_highlight`;
+    остальной текст в этих полях экранирован как HTML.
+    Args:
+        q: Поисковый запрос: слова, "фразы в кавычках", OR, -исключения.
+        cursor: Курсор из `next_cursor` предыдущей страницы.
+        limit: Размер страницы.
+    Returns:
+        dict: Найденные продукты (`items`) и курсор следующей страницы (`next_cursor`).
+    Raises:
+        HTTPException: Если курсор недействителен.
+    """
+    after = None
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != 2 or not all(
+            isinstance(value, (int, float)) for value in values
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        after = (values[0], values[1])
+    build = search_statement if is_postgres(session) else like_search_statement
+    found = await reads.fetch_all(session, build(q, limit + 1, after))
+    rows, next_cursor = make_page(found, limit, lambda row: (row.rank, row.id))
+    items = [
+        {
+            **row._asdict(),
+            "name_highlight": render_highlight(row.name_highlight),
+            "description_highlight": render_highlight(row.description_highlight),
+        }
+        for row in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/suggest", summary="Подсказки по началу названия")
+async def suggest_products(
+    prefix: Annotated[str, Query(min_length=1, max_length=MAX_KEY_LENGTH)],
+    limit: Annotated[int, Query(ge=1, le=MAX_SUGGESTIONS)] = 10,
+):
+    """Автодополнение названий продуктов и категорий из индекса в памяти.
+    Префикс сравнивается с началом каждого слова названия без учёта регистра.
+    Обращения к БД нет, кроме загрузки индекса и периодического обновления
+    (`Settings.SUGGEST_REFRESH_INTERVAL`).
+    Args:
+        prefix: Введённое начало названия.
+        limit: Максимальное количество подсказок каждого вида.
+    Returns:
+        dict: Продукты с наибольшим рейтингом (`products`) и категории (`categories`).
+    """
+    await suggest_index.ensure_fresh()
+    return suggest_index.suggest(prefix, limit)
+
+
+@router.get("/export", summary="Потоковая выгрузка каталога в NDJSON или CSV")
+async def export_products(
+    session: read_session,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    category_slug: str | None = None,
+    updated_since: datetime | None = None,
+    include_inactive: bool = False,
+) -> StreamingResponse:
+    """Выгрузка каталога продуктов, упорядоченного по id, потоком.
+    Строки читаются серверным курсором и отдаются кусками, поэтому память
+    не растёт с размером каталога.
+    Для инкрементальной выгрузки передайте `updated_since` (время прошлой
+    выгрузки) и `include_inactive=true`, чтобы получить и снятые с продажи товары.
+    Args:
+        format: Формат выгрузки: ndjson (объект JSON на строку) или csv.
+        category_slug: Выгружать только продукты категории и её подкатегорий.
+        updated_since: Выгружать только продукты, изменённые начиная с этого момента.
+        include_inactive: Выгружать и неактивные продукты.
+    Returns:
+        StreamingResponse: Поток строк каталога.
+    Raises:
+        HTTPException: Если категория не найдена.
+    """
+    products = select(*EXPORT_COLUMNS).order_by(Product.id)
+    if category_slug is not None:
+        if await category_tree.ensure_fresh():
+            descendants = category_tree.descendants(category_slug)
+            category_ids = sorted(descendants) if descendants is not None else None
+        else:
+            category = await reads.fetch_one(
+                session, reads.category_id_statement(category_slug)
+            )
+            category_ids = (
+                select(
+                    reads.category_subtree(reads.categories.c.id == category.id).c.id
+                )
+                if category is not None
+                else None
+            )
+        if category_ids is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
+            )
+        products = products.where(Product.category_id.in_(category_ids))
+    if updated_since is not None:
+        if updated_since.tzinfo is not None:
+            # updated_at хранится без часового пояса, в UTC сервера БД
+            updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+        products = products.where(Product.updated_at >= updated_since)
+    if not include_inactive:
+        products = products.where(Product.is_active == True)
+    return StreamingResponse(
+        stream_export(products, format, partial(AsyncSession, session.bind)),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
 
 
 @router.post("/create", summary="Создать продукт")  # Done
 async def create_product(
     session: session,
     product: CreateProduct,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
 ) -> Dict[str, Any]:
     """Создание нового продукта.
     Args:
@@ -65,90 +329,247 @@ async def create_product(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to use this method.",
         )
-    category_query = select(Category).where(Category.id == product.category)
-    category_result = await session.execute(category_query)
-    category = category_result.scalars().first()
-
-    if not category:
+    slug = slugify(product.name)
+    values = {
+        "name": product.name,
+        "slug": slug,
+        "description": product.description,
+        "price": product.price,
+        "image_url": product.image_url,
+        "stock": product.stock,
+        "supplier_id": int(user.id),
+        "rating": 0.0,
+    }
+    # INSERT ... SELECT из categories: продукт вставляется, только если
+    # категория существует, без отдельного запроса на проверку
+    product_create = (
+        insert(Product)
+        .from_select(
+            [*values, "category_id"],
+            select(*map(literal, values.values()), Category.id).where(
+                Category.id == product.category
+            ),
+        )
+        .returning(Product.id)
+    )
+    product_id = await session.scalar(product_create)
+    if product_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Категория с ID {product.category} не найдена",
         )
-    product_create = insert(Product).values(
-        {
-            "name": product.name,
-            "slug": slugify(product.name),
-            "description": product.description,
-            "price": product.price,
-            "image_url": product.image_url,
-            "stock": product.stock,
-            "supplier_id": int(user.id),
-            "rating": 0.0,
-            "category_id": product.category,
-        },
-    )
-    await session.execute(product_create)
     await session.commit()
+    suggest_index.put_product(product_id, product.name, slug, 0.0)
+    response_cache.invalidate("product:list")
     return {"status_code": status.HTTP_201_CREATED, "transaction": "Successful"}
 
 
+@router.post("/bulk", summary="Пакетный импорт продуктов из NDJSON или CSV")
+async def bulk_import_products(
+    request: Request,
+    user: Annotated[get_current_user, Depends(get_current_user)],
+    format: Literal["ndjson", "csv"] = "ndjson",
+) -> ImportReportResponse:
+    """Пакетное создание и обновление продуктов.
+    Тело запроса — поток строк NDJSON (объект `CreateProduct` на строку) или CSV
+    с заголовком (колонки `CreateProduct`). Строки записываются пачками по
+    `BULK_BATCH_SIZE`; продукт с уже существующим slug обновляется (поставщик
+    может обновлять только свои продукты).
+    Args:
+        request: Входящий запрос, тело которого читается потоком.
+        format: Формат тела: ndjson или csv.
+    Returns:
+        ImportReportResponse: Поток NDJSON-отчёта: строка на каждую строку
+        входных данных (`created`, `updated`, `rejected` или `error`)
+        и итоговая строка `summary`.
+    Raises:
+        HTTPException: Если пользователь не администратор и не поставщик.
+    """
+    if not (user.is_admin or user.is_supplier):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to use this method.",
+        )
+    importer = ProductImporter(user, setting.BULK_BATCH_SIZE)
+    records = PARSERS[format](iter_lines(request.stream()))
+    return ImportReportResponse(importer.run(records), media_type=MEDIA_TYPES["ndjson"])
+
+
+@router.patch("/bulk", summary="Пакетное изменение цены и остатка продуктов")
+async def bulk_update_products(
+    session: session,
+    items: Annotated[list[UpdateProductStock], Body(min_length=1, max_length=10_000)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
+) -> Dict[str, Any]:
+    """Изменение цены и (или) остатка нескольких продуктов.
+    Изменения применяются одним `UPDATE ... FROM (VALUES ...)` на пачку из
+    `BULK_BATCH_SIZE` элементов в одной транзакции. Поставщик может менять
+    только свои продукты: условие владения проверяется в том же запросе.
+    Если один продукт указан несколько раз (в том числе один раз по id,
+    а другой по slug), применяется последний элемент: slug сначала
+    переводятся в id одним запросом.
+    Args:
+        items (list[UpdateProductStock]): Изменения: `id` или `slug` продукта,
+            новая `price` и (или) `stock`.
+    Returns:
+        Dict[str, Any]: Изменённые (`updated`) и отклонённые (`rejected`)
+        элементы с их номерами (`index`) в запросе.
+    Raises:
+        HTTPException: Если пользователь не администратор и не поставщик.
+    """
+    if not (user.is_admin or user.is_supplier):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to use this method.",
+        )
+    # Последний элемент для каждого продукта. Slug переводятся в id, чтобы
+    # продукт, указанный и по id, и по slug, не дал две строки VALUES на одну
+    # строку таблицы; неизвестные slug остаются ключами и будут отклонены
+    slugs = {item.slug for item in items if item.id is None}
+    slug_ids = {}
+    if slugs:
+        slug_ids = dict(
+            (
+                await session.execute(
+                    select(Product.slug, Product.id).where(Product.slug.in_(slugs))
+                )
+            ).all()
+        )
+    keys = [
+        item.id if item.id is not None else slug_ids.get(item.slug, item.slug)
+        for item in items
+    ]
+    latest = {key: index for index, key in enumerate(keys)}
+    positions = sorted(latest.values())
+    supplier_id = None if user.is_admin else user.id
+    updated = []
+    for start in range(0, len(positions), setting.BULK_BATCH_SIZE):
+        batch = [
+            (index, items[index])
+            for index in positions[start : start + setting.BULK_BATCH_SIZE]
+        ]
+        if is_postgres(session):
+            result = await session.execute(stock_update_statement(batch, supplier_id))
+        else:
+            result = await stock_update_rows(session, batch, supplier_id)
+        updated.extend(
+            {
+                "index": row.position,
+                "id": row.id,
+                "slug": row.slug,
+                "price": row.price,
+                "stock": row.stock,
+            }
+            for row in result
+        )
+    await session.commit()
+    updated.sort(key=lambda row: row["index"])
+    if updated:
+        response_cache.invalidate(
+            "product:list", *(f"product:{row['slug']}" for row in updated)
+        )
+    updated_positions = {row["index"] for row in updated}
+    rejected = [
+        {
+            "index": index,
+            "id": item.id,
+            "slug": item.slug,
+            "detail": (
+                "Product not found or not owned by you"
+                if latest[keys[index]] == index
+                else "Superseded by a later item"
+            ),
+        }
+        for index, item in enumerate(items)
+        if index not in updated_positions
+    ]
+    return {"updated": updated, "rejected": rejected}
+
+
 @router.get("/{category_slug}", summary="Получить продукты определенной категории")
 async def product_by_category(
-    session: session, category_slug: str
-) -> List[Dict[int, str]]:
-    """API получения товаров определенной категории"""
-    id_list = []
-    prod_list = []
-    check_category = select(Category).filter_by(slug=category_slug)
-    check_query = await session.execute(check_category)
-    check_result = check_query.scalars().one_or_none()
-    if check_result is not None:
-        id_list.append(int(check_result.id))
-        print(id_list)
-
-        check_subcategory = select(Category).where(Category.parent_id == id_list[0])
-        check_subquery = await session.execute(check_subcategory)
-        check_subresult = check_subquery.scalars().all()
-        print(check_subresult)
-
-        if check_subresult is not None:
-            for el in check_subresult:
-                id_list.append(int(el.id))
-        print(id_list)
-        all_products_by_id = select(Product).where(
-            and_(
-                Product.category_id.in_(id_list),
-                Product.is_active == True,
-                Product.stock > 0,
+    session: read_session,
+    category_slug: str,
+    cursor: str | None = None,
+    limit: page_limit = DEFAULT_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """API получения товаров определенной категории и всех её подкатегорий.
+    Поддерево категорий берётся из in-memory дерева категорий, а если оно
+    отключено — раскрывается рекурсивным CTE в том же запросе, что и продукты.
+    Args:
+        category_slug (str): Slug категории.
+        cursor: Курсор из `next_cursor` предыдущей страницы.
+        limit: Размер страницы.
+    Returns:
+        Dict[str, Any]: Продукты страницы (`items`) и курсор следующей страницы (`next_cursor`).
+    Raises:
+        HTTPException: Если категория не найдена.
+    """
+    if await category_tree.ensure_fresh():
+        descendants = category_tree.descendants(category_slug)
+        if descendants is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
             )
-        )
-        res_query = await session.execute(all_products_by_id)
-        res_scal = res_query.scalars().all()
-        for el in res_scal:
-            prod_list.append({el.id: el.name})
-            print(prod_list)
-        return prod_list
-
+        category_ids = sorted(descendants)
     else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
+        category_ids = select(
+            reads.category_subtree(reads.categories.c.slug == category_slug).c.id
         )
+    after_id = None
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not is_cursor_int(values[0]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        after_id = values[0]
+    found = await reads.fetch_all(
+        session, reads.category_products_statement(category_ids, after_id, limit + 1)
+    )
+    rows, next_cursor = make_page(found, limit, lambda row: (row.id,))
+    if not rows and cursor is None and not category_tree.enabled:
+        # Пустой результат: отдельно проверяем, существует ли сама категория
+        category = await reads.fetch_one(
+            session, reads.category_id_statement(category_slug)
+        )
+        if category is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
+            )
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
 
 
 @router.get("/detail/{product_slug}", summary="Получить детальную информацию о товаре")
-async def product_detail(session: session, product_slug: str) -> Dict[str, str]:
+@cached_response(tags=lambda product_slug, **kwargs: [f"product:{product_slug}"])
+async def product_detail(
+    session: read_session, request: Request, response: Response, product_slug: str
+) -> Dict[str, str]:
     """Получение детальной информации о продукте по его slug.
+    Если `If-None-Match` совпадает с версией продукта, возвращается 304
+    без загрузки описания.
     Args:
+        request (Request): Входящий запрос (заголовок `If-None-Match`).
+        response (Response): Ответ, в который выставляется заголовок `ETag`.
         product_slug (str): Slug продукта.
     Returns:
         Dict[str, str]: Детальная информация о продукте.
     Raises:
         HTTPException: Если продукт не найден.
     """
-    detail = select(Product).filter_by(slug=product_slug)
-    query = await session.execute(detail)
-    result = query.scalars().one_or_none()
+    detail = reads.product_detail_statement(product_slug)
+    if has_conditional(request):
+        row = await reads.fetch_one(
+            session,
+            detail.with_only_columns(reads.products.c.id, reads.products.c.updated_at),
+        )
+        if row is not None:
+            etag = make_etag(row.id, row.updated_at)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+    result = await reads.fetch_one(session, detail)
     if result:
+        response.headers["ETag"] = make_etag(result.id, result.updated_at)
         return {"Детальная информация": result.description}
     else:
         raise HTTPException(
@@ -163,7 +584,7 @@ async def update_product(
     session: session,
     product_slug: str,
     product: CreateProduct,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
 ) -> Dict[str, str]:
     """Обновление информации о продукте.
     Args:
@@ -172,47 +593,44 @@ async def update_product(
     Returns:
         Dict[str, str]: Сообщение об успехе.
     Raises:
-        HTTPException: Если продукт не найден.
+        HTTPException: 404, если продукт не найден; 403, если он принадлежит
+            другому поставщику.
     """
-    check_query = select(Product).filter_by(slug=product_slug)
-    query = await session.execute(check_query)
-    result = query.scalars().one_or_none()
-    if not (user.is_admin or (user.is_supplier and user.id == result.supplier_id)):
+    if not (user.is_admin or user.is_supplier):
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="You are not authorized to use this method",
-        )
-    if result:
-        new_product = (
-            update(Product)
-            .values(
-                {
-                    "name": product.name,
-                    "description": product.description,
-                    "price": product.price,
-                    "image_url": product.image_url,
-                    "stock": product.stock,
-                    "rating": 0.0,
-                    "category_id": product.category,
-                },
-            )
-            .filter_by(slug=product_slug)
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to use this method.",
         )
-        await session.execute(new_product)
-        await session.commit()
-        await session.refresh(result)  # Обновляем объект после коммита
-        return {"Детальная информация": result.description}
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="There is no product found"
+    query = (
+        update(Product)
+        .where(Product.slug == product_slug, *owned_by(user))
+        .values(
+            {
+                "name": product.name,
+                "description": product.description,
+                "price": product.price,
+                "image_url": product.image_url,
+                "stock": product.stock,
+                "category_id": product.category,
+            },
         )
+        .returning(Product.id, Product.name, Product.description, Product.rating)
+        .execution_options(synchronize_session=False)
+    )
+    result = (await session.execute(query)).one_or_none()
+    if result is None:
+        raise await unchanged_product_error(session, product_slug)
+    await session.commit()
+    response_cache.invalidate("product:list", f"product:{product_slug}")
+    suggest_index.put_product(result.id, result.name, product_slug, result.rating)
+    return {"Детальная информация": result.description}
 
 
 @router.delete("/delete", summary="Удалить товар")
 async def delete_product(
     session: session,
     product_slug: str,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
 ) -> Dict[str, Any]:
     """Удаление продукта по его slug.
     Args:
@@ -220,26 +638,38 @@ async def delete_product(
     Returns:
         Dict[str, Any]: Статус и сообщение об успехе.
     Raises:
-        HTTPException: Если продукт не найден.
+        HTTPException: 403 для всех, кроме администраторов; 404, если продукт
+            не найден; 409, если продукт есть в заказах (его можно только
+            снять с продажи).
     """
     if not user.is_admin or user.is_supplier:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to use this method.",
         )
-    check_product = select(Product).filter_by(slug=product_slug)
-    check_query = await session.execute(check_product)
-    result = check_query.scalars().one_or_none()
-    print(result)
-    if result is not None:
-        product_delete = delete(Product).filter_by(slug=product_slug)
-        query = await session.execute(product_delete)
-        session.commit()
-        return {
-            "status_code": status.HTTP_200_OK,
-            "transaction": "Product delete is successful",
-        }
-    else:
+    try:
+        product_id = await session.scalar(
+            delete(Product)
+            .where(Product.slug == product_slug)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+    except exc.IntegrityError:
+        # order_items.product_id ... ON DELETE RESTRICT: позиции заказов
+        # ссылаются на продукт, и суммы заказов должны с ними сходиться
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Product is referenced by orders; deactivate it instead",
+        )
+    if product_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There is no product found"
         )
+    await session.commit()
+    suggest_index.remove_product(product_id)
+    response_cache.invalidate("product:list", f"product:{product_slug}")
+    return {
+        "status_code": status.HTTP_200_OK,
+        "transaction": "Product delete is successful",
+    }
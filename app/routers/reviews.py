@@ -1,105 +1,117 @@
 """
 API для взаимодействия с отзывами о товарах.
 Предоставляет методы для добавления, получения и удаления отзывов, а также обновления рейтинга товаров.
+Рейтинг товара обновляется инкрементально: дельта оценки уходит в фоновую очередь
+(см. `app.backend.rating_queue`) или, если очередь недоступна, применяется в транзакции отзыва.
 """
 
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request, Response
 
-from sqlalchemy import select, insert, update, func, cast, Numeric
+from sqlalchemy import select, insert, update, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-from app.schemas import UsersReview  # Класс-модель создания отзыва
+from app.schemas import (  # Класс-модель создания отзыва и модели ответов
+    Page,
+    ProductReviewsPage,
+    ReviewOut,
+    ReviewWithProductOut,
+    UsersReview,
+)
 
 from app.models.review import Review  # Импортирую SQLAlchemy модель
 from app.models.products import Product
-from app.backend.db_depends import get_session  # Импортирую функцию зависимость
+from app.backend.db_depends import (  # Импортирую функции зависимости
+    get_read_session,
+    get_session,
+)
+from app.backend import reads
+from app.backend.rating_queue import commit_with_rating_delta
+from app.backend.response_cache import cached_response, response_cache
+from app.backend.etag import etag_matches, has_conditional, not_modified, rows_etag
+from app.backend.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    decode_datetime,
+    make_page,
+)
 
-from app.routers.auth import get_current_username  # Получение пользователя
+from app.routers.auth import get_current_user  # Получение пользователя
 
 
 session = Annotated[
     AsyncSession, Depends(get_session)
 ]  # Аннотация типа для зависимости сессии
+read_session = Annotated[
+    AsyncSession, Depends(get_read_session)
+]  # Сессия только для чтения: реплика или основная БД
 
 
 router = APIRouter(prefix="/review", tags=["review 💘💖💔"])
 
+page_limit = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
 
-async def update_rating(session: AsyncSession, product_id: int) -> None:
-    """
-    Обновляет рейтинг продукта на основе среднего значения оценок из отзывов.
 
-    Аргументы:
-        session (AsyncSession): Асинхронная сессия базы данных.
-        product_id (int): Идентификатор продукта, для которого нужно обновить рейтинг.
+def after_review_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    """
+    Разбирает курсор keyset-пагинации отзывов.
 
-    Возвращает:
-        None
+    Отзывы отсортированы по `(comment_date, id)` от новых к старым,
+    поэтому следующая страница начинается строго после пары из курсора.
     """
-    # 1. Вычисляем средний рейтинг
-    stmt = (
-        select(func.avg(cast(Review.rating, Numeric)).label("average_rating"))
-        .where(Review.product_id == product_id)
-        .where(Review.is_active == True)
-    )
-    result = await session.execute(stmt)
-    average_rating = result.scalars().first()
-
-    # 2. Обновляем рейтинг продукта (если средний рейтинг не None)
-    if average_rating is not None:
-        update_stmt = (
-            update(Product)
-            .where(Product.id == product_id)
-            .values(
-                rating=average_rating
-            )  # Исправлено: обновляем поле `rating`, а не `id`!
+    if cursor is None:
+        return None
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not isinstance(values[1], int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
         )
-        await session.execute(update_stmt)
-        await session.commit()
+    return decode_datetime(values[0]), values[1]
 
 
 @router.get(
-    "/all_reviews", summary="Метод получения всех отзывов и рейтингов о товарах"
+    "/all_reviews",
+    summary="Метод получения всех отзывов и рейтингов о товарах",
+    response_model=Page[ReviewWithProductOut],
 )
-async def all_reviews(session: session):
+async def all_reviews(
+    session: read_session,
+    cursor: str | None = None,
+    limit: page_limit = DEFAULT_PAGE_SIZE,
+):
     """
-    Возвращает все активные отзывы о товарах.
+    Возвращает страницу активных отзывов о товарах, от новых к старым.
+
+    Название продукта подтягивается тем же запросом через JOIN,
+    а из таблиц выбираются только нужные колонки.
 
     Аргументы:
         session (AsyncSession): Асинхронная сессия базы данных.
+        cursor (str | None): Курсор из `next_cursor` предыдущей страницы.
+        limit (int): Размер страницы.
 
     Возвращает:
-        dict: Словарь, где ключи - идентификаторы отзывов, а значения - информация о продукте, рейтинге, комментарии и дате.
+        Page[ReviewWithProductOut]: Отзывы страницы (`items`) и курсор
+            следующей страницы (`next_cursor`).
 
     Исключения:
         HTTPException: Возникает, если отзывов нет.
     """
-    comments = {}
-    query = select(Review).where(Review.is_active == True)
-    result = await session.execute(query)
-    scal_res = result.scalars().all()
-
-    if scal_res:
-        for el in scal_res:
-            scal_res = result.scalars().all()
-            prod_name = await session.execute(
-                select(Product).where(Product.id == el.product_id)
-            )
-            product = prod_name.scalars().one()
-            comments[el.id] = {
-                "product": product.name,
-                "rating": el.rating,
-                "comment": el.comment,
-                "comment data": el.comment_date,
-            }
-        return comments
-    else:
+    found = await reads.fetch_all(
+        session, reads.review_feed_statement(after_review_cursor(cursor), limit + 1)
+    )
+    rows, next_cursor = make_page(found, limit, lambda row: (row.comment_date, row.id))
+    if not rows and cursor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There is no reviews."
         )
+    return Page[ReviewWithProductOut](
+        items=ReviewWithProductOut.from_rows(rows), next_cursor=next_cursor
+    )
 
 
 @router.post(
@@ -108,7 +120,7 @@ async def all_reviews(session: session):
 async def add_review(
     session: session,
     review: UsersReview,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
 ) -> dict:
     """
     Добавляет новый отзыв о товаре.
@@ -129,30 +141,30 @@ async def add_review(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to use this method.",
         )
-    potential_product = select(Product).where(Product.id == review.product_id)
-    query = await session.execute(potential_product)
-    result = query.scalars().one_or_none()
-    if result:
-        insert_query = await session.execute(
-            insert(Review).values(
-                [
-                    {
-                        "user_id": review.user_id,
-                        "product_id": review.product_id,
-                        "rating": review.rating,
-                        "comment": review.comment,
-                    },
-                ]
-            )
+    # INSERT ... SELECT из products: отзыв вставляется, только если продукт
+    # существует, а slug продукта для сброса кэша возвращается тем же запросом
+    product = Product.id == review.product_id
+    query = (
+        insert(Review)
+        .from_select(
+            ["user_id", "product_id", "rating", "comment"],
+            select(
+                literal(review.user_id),
+                Product.id,
+                literal(review.rating),
+                literal(review.comment),
+            ).where(product),
         )
-        await session.commit()
-        await update_rating(session, review.product_id)
-        return {"status_code": status.HTTP_201_CREATED, "transaction": "Successful"}
-
-    else:
+        .returning(select(Product.slug).where(product).scalar_subquery())
+    )
+    slug = await session.scalar(query)
+    if slug is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There are no product"
         )
+    await commit_with_rating_delta(session, review.product_id, review.rating, 1)
+    response_cache.invalidate(f"review:{slug}")
+    return {"status_code": status.HTTP_201_CREATED, "transaction": "Successful"}
 
 
 @router.patch(
@@ -160,7 +172,7 @@ async def add_review(
 )
 async def delete_reviews(
     session: session,
-    user: Annotated[get_current_username, Depends(get_current_username)],
+    user: Annotated[get_current_user, Depends(get_current_user)],
     review_id: int,
 ):
     """
@@ -182,27 +194,28 @@ async def delete_reviews(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not authorized to use this method.",
         )
-    check_query = await session.execute(select(Review).filter_by(id=review_id))
-    answer_query = check_query.scalars().one_or_none()
-    if not answer_query:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="There is no review"
-        )
+    # Условие is_active гарантирует, что повторное удаление не вычтет оценку дважды
     query = (
         update(Review)
         .values(
             {"is_active": False},
         )
-        .filter_by(id=review_id)
-    )
-    await session.execute(query)
-    await session.commit()
-
-    query_for_recount = await session.execute(
-        select(Review).where(Review.id == review_id)
+        .filter_by(id=review_id, is_active=True)
+        .returning(Review.product_id, Review.rating)
     )
-    review_for_recount = query_for_recount.scalars().one()
-    await update_rating(session, review_for_recount.product_id)
+    deactivated = (await session.execute(query)).one_or_none()
+    if deactivated is None:
+        # Ничего не изменилось: отзыв уже удалён (повторный запрос успешен) или его нет
+        exists = await session.scalar(select(Review.id).filter_by(id=review_id))
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="There is no review"
+            )
+    else:
+        await commit_with_rating_delta(
+            session, deactivated.product_id, -deactivated.rating, -1
+        )
+        response_cache.invalidate("review:*")
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Review delete is successful",
@@ -212,37 +225,65 @@ async def delete_reviews(
 @router.get(
     "/products_reviews/{slug}",
     summary="Метод получения отзывов и его рейтингов об определенном товаре",
+    response_model=ProductReviewsPage,
 )
-async def products_reviews(session: session, slug: str):
+@cached_response(tags=lambda slug, **kwargs: [f"review:{slug}", f"product:{slug}"])
+async def products_reviews(
+    session: read_session,
+    request: Request,
+    response: Response,
+    slug: str,
+    cursor: str | None = None,
+    limit: page_limit = DEFAULT_PAGE_SIZE,
+):
     """
-    Возвращает отзывы и рейтинги для определенного товара по его слагу.
+    Возвращает страницу отзывов и рейтингов для определенного товара по его слагу.
+
+    ETag строится по версиям продукта и отзывов страницы; при совпадении
+    с `If-None-Match` возвращается 304 без выборки текстов отзывов.
 
     Аргументы:
         session (AsyncSession): Асинхронная сессия базы данных.
+        request (Request): Входящий запрос (заголовок `If-None-Match`).
+        response (Response): Ответ, в который выставляется заголовок `ETag`.
         slug (str): Уникальный слаг продукта.
+        cursor (str | None): Курсор из `next_cursor` предыдущей страницы.
+        limit (int): Размер страницы.
 
     Возвращает:
-        dict: Словарь с названием продукта и списком отзывов.
+        ProductReviewsPage: Название продукта (`product`), отзывы страницы
+            (`items`) и курсор следующей страницы (`next_cursor`).
 
     Исключения:
         HTTPException: Возникает, если продукт не найден.
     """
-    product_revies = {}
-    query = select(Product).where(Product.slug == slug, Product.is_active == True)
-    result = await session.execute(query)
-    product = result.scalars().one_or_none()
+    product = await reads.fetch_one(session, reads.active_product_statement(slug))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="There is no product with this slug",
         )
-    product_revies[product.name] = []
-    review_query = await session.execute(
-        select(Review).where(Review.product_id == product.id, Review.is_active == True)
+    review_query = reads.product_reviews_statement(
+        product.id, after_review_cursor(cursor), limit + 1
     )
-    reviews = review_query.scalars().all()
-    for review in reviews:
-        product_revies[product.name].append(
-            {"Rating": review.rating, "Comment": review.comment}
+    page_key = (str(request.query_params), product.id, product.updated_at)
+    if has_conditional(request):
+        versions = await reads.fetch_all(
+            session,
+            review_query.with_only_columns(
+                reads.reviews.c.id, reads.reviews.c.updated_at
+            ),
         )
-    return product_revies
+        etag = rows_etag(page_key, versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    all_rows = await reads.fetch_all(session, review_query)
+    rows, next_cursor = make_page(
+        all_rows, limit, lambda row: (row.comment_date, row.id)
+    )
+    response.headers["ETag"] = rows_etag(page_key, all_rows)
+    return ProductReviewsPage(
+        product=product.name,
+        items=ReviewOut.from_rows(rows),
+        next_cursor=next_cursor,
+    )
@@ -0,0 +1,95 @@
+"""
+API служебных метрик приложения.
+Отдаёт счётчики внутренних кэшей и фоновых очередей для мониторинга.
+"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status, HTTPException
+
+from app.backend.db import engine
+from app.backend.rating_queue import rating_queue
+from app.backend.replicas import read_replicas
+from app.backend.reservations import reservation_sweeper
+from app.backend.response_cache import response_cache
+from app.schemas import CurrentUser
+
+from app.routers.auth import get_current_user
+
+
+router = APIRouter(prefix="/service", tags=["service ⚙️"])
+
+
+def ensure_admin(user: CurrentUser) -> None:
+    """Проверяет, что пользователь является администратором."""
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must be admin user for this",
+        )
+
+
+@router.get("/cache", summary="Счётчики кэша ответов")
+async def cache_stats(user: Annotated[CurrentUser, Depends(get_current_user)]) -> dict:
+    """Возвращает счётчики кэша ответов: записи, попадания, промахи, вытеснения.
+    Args:
+        user (CurrentUser): Текущий пользователь (должен быть администратором).
+    Returns:
+        dict: Счётчики кэша ответов.
+    Raises:
+        HTTPException: Если пользователь не является администратором.
+    """
+    ensure_admin(user)
+    return response_cache.stats()
+
+
+@router.get("/rating_queue", summary="Метрики очереди пересчёта рейтингов")
+async def rating_queue_stats(
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> dict:
+    """Возвращает глубину очереди и статистику сбросов дельт рейтинга.
+    Args:
+        user (CurrentUser): Текущий пользователь (должен быть администратором).
+    Returns:
+        dict: Метрики очереди.
+    Raises:
+        HTTPException: Если пользователь не является администратором.
+    """
+    ensure_admin(user)
+    return rating_queue.stats()
+
+
+@router.get("/reservations", summary="Метрики фоновой отмены истёкших резервов")
+async def reservation_stats(
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+) -> dict:
+    """Возвращает количество проходов и отменённых заказов фоновой задачи.
+    Args:
+        user (CurrentUser): Текущий пользователь (должен быть администратором).
+    Returns:
+        dict: Метрики фоновой отмены.
+    Raises:
+        HTTPException: Если пользователь не является администратором.
+    """
+    ensure_admin(user)
+    return reservation_sweeper.stats()
+
+
+@router.get("/pool", summary="Состояние пула подключений к БД")
+async def pool_stats(user: Annotated[CurrentUser, Depends(get_current_user)]) -> dict:
+    """Возвращает занятость пула подключений и гистограмму времени ожидания.
+    Args:
+        user (CurrentUser): Текущий пользователь (должен быть администратором).
+    Returns:
+        dict: Выданные и свободные подключения, переполнение, ожидающие
+            запросы, таймауты и кумулятивная гистограмма ожидания в секундах;
+            в `replicas` — то же для каждой реплики и её доступность.
+    Raises:
+        HTTPException: Если пользователь не является администратором.
+    """
+    ensure_admin(user)
+    return {
+        **engine.pool.stats(),
+        "replicas": read_replicas.stats(),
+        "replica_primary_fallbacks": read_replicas.primary_fallbacks,
+    }
@@ -2,10 +2,10 @@
 Pydantic модели для категорий, продуктов, отзывов
 """
 
-from typing import Optional
+from typing import Generic, Iterable, Optional, TypeVar
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class CreateCategory(BaseModel):
@@ -26,6 +26,107 @@ class CreateProduct(BaseModel):
     category: int
 
 
+class UpdateProductStock(BaseModel):
+    """Класс-модель пакетного изменения цены и остатка продукта.
+    Продукт задаётся ровно одним из полей `id` или `slug`."""
+
+    id: Optional[int] = None
+    slug: Optional[str] = None
+    price: Optional[int] = Field(default=None, ge=0, le=2**31 - 1)
+    stock: Optional[int] = Field(default=None, ge=0, le=2**31 - 1)
+
+    @model_validator(mode="after")
+    def check_fields(self) -> "UpdateProductStock":
+        if (self.id is None) == (self.slug is None):
+            raise ValueError("Exactly one of id or slug is required")
+        if self.price is None and self.stock is None:
+            raise ValueError("At least one of price or stock is required")
+        return self
+
+
+class OrderLine(BaseModel):
+    """Класс-модель позиции заказа"""
+
+    product_id: int
+    quantity: int = Field(ge=1, le=10_000)
+
+
+class CreateOrder(BaseModel):
+    """Класс-модель оформления заказа"""
+
+    items: list[OrderLine] = Field(min_length=1, max_length=100)
+
+
+class RowModel(BaseModel):
+    """Базовая модель ответа, собираемая из строк Core-запроса"""
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> list:
+        """Собирает модели из строк `Row` без повторной валидации.
+        Колонки запроса называются так же, как поля модели (лишние, например
+        `updated_at` для ETag, отбрасываются); типы уже гарантирует схема БД,
+        поэтому используется `model_construct`."""
+        return [cls.model_construct(**row._mapping) for row in rows]
+
+
+class ProductOut(RowModel):
+    """Модель продукта в списках"""
+
+    id: int
+    name: str
+    slug: str
+    description: str
+    price: int
+    image_url: str
+    stock: int
+    rating: float
+    category_id: int
+    supplier_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+
+class CategoryOut(RowModel):
+    """Модель категории в списках"""
+
+    id: int
+    parent_id: Optional[int] = None
+    name: str
+    slug: str
+    is_active: bool
+
+
+class ReviewOut(RowModel):
+    """Модель отзыва на странице отзывов продукта"""
+
+    id: int
+    rating: float
+    comment: str
+    comment_date: datetime
+    updated_at: Optional[datetime] = None
+
+
+class ReviewWithProductOut(ReviewOut):
+    """Модель отзыва в общей ленте: с названием продукта"""
+
+    product: str
+
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    """Страница курсорной пагинации"""
+
+    items: list[ItemT]
+    next_cursor: Optional[str] = None
+
+
+class ProductReviewsPage(Page[ReviewOut]):
+    """Страница отзывов продукта с его названием"""
+
+    product: str
+
+
 class CreateUser(BaseModel):
     """Класс-модель создания пользователя"""
 
@@ -59,3 +160,36 @@ class UsersReview(BaseModel):
     product_id: int
     is_active: bool = True
     comment_date: Optional[datetime] = None
+
+
+class CurrentUser(BaseModel):
+    """Модель аутентифицированного пользователя (принципала) без хеша пароля"""
+
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    is_active: bool = True
+    is_admin: bool = False
+    is_supplier: bool = False
+    is_customer: bool = True
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
+class TokenPair(BaseModel):
+    """Модель ответа с токенами доступа и обновления"""
+
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
+class TokenRequest(BaseModel):
+    """Класс-модель запроса на обновление или отзыв токена"""
+
+    token: str
@@ -0,0 +1,17 @@
+"""
+Нагрузочные и микробенчмарки FastAPI-Ecommerce.
+
+Скрипты запускаются как модули из корня репозитория, например:
+
+    python -m bench.search --rows 1000000
+
+и используют базу данных из настроек приложения (`app/backend/.env`).
+Данные микробенчмарков создаются в отдельной схеме `bench` и не затрагивают
+рабочие таблицы.
+
+Нагрузочный тест (`bench.load`) и генератор каталога (`bench.catalog`)
+пересоздают таблицы приложения: их запускают на отдельной базе бенчмарков
+с флагом `--reset` или на SQLite в памяти:
+
+    DEBUG=true DATABASE_URL=sqlite+aiosqlite:///:memory: python -m bench.load
+"""
@@ -0,0 +1,136 @@
+"""
+Бенчмарк пакетного импорта продуктов (`POST /products/bulk`).
+
+Генерирует поток синтетических продуктов, отправляет его в приложение
+через ASGI-транспорт httpx (без сети) и замеряет пропускную способность
+в строках в секунду. Первый проход вставляет продукты, второй обновляет
+те же slug (upsert). После замеров продукты удаляются.
+
+Нужен существующий пользователь-администратор или поставщик и хотя бы
+одна категория. Запуск:
+
+    python -m bench.bulk_import --rows 50000 --username admin
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import AsyncIterator
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, select
+
+from app.backend.db import engine, session as db_session
+from app.main import app
+from app.models.category import Category
+from app.models.products import Product
+from app.models.user import User
+from app.routers.auth import issue_tokens
+from app.schemas import CurrentUser
+
+SLUG_PREFIX = "bench-bulk-"
+WORDS = "phone case charger cable wireless screen camera battery laptop".split()
+CHUNK_ROWS = 500  # Строк в одном куске тела запроса
+
+
+def make_rows(rows: int, categories: list[int], seed: int, revision: int) -> list[dict]:
+    """Синтетические продукты; slug зависит только от номера строки."""
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"bench bulk {i} {WORDS[i % len(WORDS)]}",
+            "description": " ".join(rng.choices(WORDS, k=12)),
+            "price": rng.randint(1, 10_000) + revision,
+            "image_url": f"https://example.com/{i}.png",
+            "stock": rng.randint(0, 100),
+            "category": categories[i % len(categories)],
+        }
+        for i in range(rows)
+    ]
+
+
+async def ndjson_body(rows: list[dict]) -> AsyncIterator[bytes]:
+    for start in range(0, len(rows), CHUNK_ROWS):
+        yield "".join(
+            json.dumps(row) + "\n" for row in rows[start : start + CHUNK_ROWS]
+        ).encode()
+
+
+async def csv_body(rows: list[dict]) -> AsyncIterator[bytes]:
+    fields = list(rows[0])
+    yield (",".join(fields) + "\n").encode()
+    for start in range(0, len(rows), CHUNK_ROWS):
+        yield "".join(
+            ",".join(str(row[field]) for field in fields) + "\n"
+            for row in rows[start : start + CHUNK_ROWS]
+        ).encode()
+
+
+BODIES = {
+    "ndjson": ndjson_body,
+    "csv": csv_body,
+}
+
+
+async def run_import(
+    client: AsyncClient, token: str, rows: list[dict], fmt: str
+) -> dict:
+    """Отправляет один импорт и возвращает итоговую строку отчёта и время."""
+    started = time.perf_counter()
+    response = await client.post(
+        "/products/bulk",
+        params={"format": fmt},
+        content=BODIES[fmt](rows),
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    summary = json.loads(response.text.splitlines()[-1])["summary"]
+    return {**summary, "seconds": elapsed, "rows_per_second": len(rows) / elapsed}
+
+
+async def cleanup() -> None:
+    async with db_session() as ss:
+        await ss.execute(delete(Product).where(Product.slug.startswith(SLUG_PREFIX)))
+        await ss.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with db_session() as ss:
+        user = await ss.scalar(select(User).filter_by(username=args.username))
+        categories = list(await ss.scalars(select(Category.id).order_by(Category.id)))
+    if user is None or not categories:
+        raise SystemExit("Нужны пользователь --username и хотя бы одна категория")
+    token = issue_tokens(CurrentUser.model_validate(user)).access_token
+    await cleanup()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for fmt in args.formats:
+            for revision, label in enumerate(("insert", "upsert")):
+                rows = make_rows(args.rows, categories, args.seed, revision)
+                result = await run_import(client, token, rows, fmt)
+                print(
+                    f"{fmt:<8}{label:<8}{args.rows:>9} rows"
+                    f"{result['seconds']:>9.2f}s{result['rows_per_second']:>12.0f} rows/s"
+                    f"  created={result['created']} updated={result['updated']}"
+                    f" rejected={result['rejected']} error={result['error']}"
+                )
+            if not args.keep:
+                await cleanup()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк пакетного импорта")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--formats", nargs="+", choices=list(BODIES), default=list(BODIES)
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Не удалять импортированные продукты"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,367 @@
+"""
+Генератор синтетического каталога для нагрузочных тестов.
+
+По зерну (`--seed`) и размерам строит воспроизводимый каталог:
+
+- пользователи: администратор (`user1`), поставщики (каждый двадцатый)
+  и покупатели; у всех пароль `BENCH_PASSWORD`;
+- дерево категорий глубиной `--depth`, по `--branching` потомков у узла;
+  продукты лежат в листовых категориях;
+- `--products` продуктов и `--reviews` отзывов. Популярность продуктов
+  распределена по закону Ципфа (`--zipf`): отзывы и запросы нагрузочного
+  теста чаще всего приходятся на небольшую долю «горячих» продуктов.
+
+Рейтинги продуктов (`rating_sum`, `rating_count`, `rating`) согласованы
+с активными отзывами. Описание каталога (`build_catalog`) не требует базы:
+при тех же параметрах оно совпадает с тем, что было записано `seed`, поэтому
+нагрузочный тест может работать с уже заполненной базой.
+
+Генератор пересоздаёт таблицы приложения, поэтому запускать его можно только
+на отдельной базе бенчмарков (или на SQLite в памяти). Запуск:
+
+    python -m bench.catalog --products 100000 --reviews 1000000 --reset
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import bindparam, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.backend.db import Base, engine
+from app.models.category import Category
+from app.models.products import Product
+from app.models.review import Review
+from app.models.user import User
+from app.routers.auth import bcrypt_context
+from bench.search import WORDS
+
+BENCH_PASSWORD = "bench"
+# Все даты отзывов отсчитываются от фиксированного момента, а не от now()
+BASE_DATE = datetime(2026, 1, 1)
+BATCH_SIZE = 5_000
+
+
+@dataclass(frozen=True)
+class CatalogConfig:
+    """
+    Параметры синтетического каталога.
+
+    Атрибуты:
+        users (int): Количество пользователей.
+        products (int): Количество продуктов.
+        reviews (int): Количество отзывов.
+        depth (int): Глубина дерева категорий.
+        branching (int): Количество потомков у каждой категории.
+        zipf (float): Показатель распределения популярности продуктов.
+        seed (int): Зерно генератора случайных чисел.
+    """
+
+    users: int = 1_000
+    products: int = 10_000
+    reviews: int = 100_000
+    depth: int = 3
+    branching: int = 4
+    zipf: float = 1.1
+    seed: int = 42
+
+
+class Zipf:
+    """
+    Распределение Ципфа на рангах 0..n-1: P(k) ~ 1 / (k + 1) ** s.
+
+    Атрибуты:
+        cumulative (list[float]): Накопленные веса рангов.
+    """
+
+    def __init__(self, n: int, s: float) -> None:
+        self.cumulative = list(
+            itertools.accumulate(1 / (k**s) for k in range(1, n + 1))
+        )
+
+    def rank(self, rng: random.Random) -> int:
+        """Случайный ранг (0 — самый популярный)."""
+        return bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])
+
+
+@dataclass
+class Catalog:
+    """
+    Описание сгенерированного каталога, по которому строятся запросы.
+
+    Атрибуты:
+        config (CatalogConfig): Параметры генерации.
+        categories (list[tuple[int, Optional[int]]]): Пары (id, parent_id)
+            в порядке обхода в ширину.
+        leaves (list[int]): id листовых категорий.
+        names (list[str]): Названия продуктов; продукт с id `i` — `names[i - 1]`.
+        by_popularity (list[int]): id продуктов от самого популярного.
+        suppliers (list[int]): id поставщиков.
+        customers (list[int]): id покупателей.
+    """
+
+    config: CatalogConfig
+    categories: list[tuple[int, Optional[int]]]
+    leaves: list[int]
+    names: list[str]
+    by_popularity: list[int]
+    suppliers: list[int]
+    customers: list[int]
+    popularity: Zipf = field(repr=False)
+
+    def popular_product(self, rng: random.Random) -> int:
+        """id продукта, выбранного с учётом популярности."""
+        return self.by_popularity[self.popularity.rank(rng)]
+
+
+def category_slug(category_id: int) -> str:
+    return f"category-{category_id}"
+
+
+def product_slug(product_id: int) -> str:
+    return f"product-{product_id}"
+
+
+def username(user_id: int) -> str:
+    return f"user{user_id}"
+
+
+def build_catalog(config: CatalogConfig) -> Catalog:
+    """
+    Строит описание каталога без обращения к базе.
+
+    Args:
+        config (CatalogConfig): Параметры генерации.
+
+    Returns:
+        Catalog: Категории, названия и популярность продуктов, пользователи.
+    """
+    rng = random.Random(f"{config.seed}:catalog")
+    categories: list[tuple[int, Optional[int]]] = []
+    level: list[Optional[int]] = [None]
+    for _ in range(config.depth):
+        children = []
+        for parent_id in level:
+            for _ in range(config.branching):
+                categories.append((len(categories) + 1, parent_id))
+                children.append(len(categories))
+        level = children
+    names = [
+        f"{rng.choice(WORDS)} {rng.choice(WORDS)} {product_id}"
+        for product_id in range(1, config.products + 1)
+    ]
+    by_popularity = list(range(1, config.products + 1))
+    rng.shuffle(by_popularity)
+    user_ids = range(2, config.users + 1)
+    return Catalog(
+        config=config,
+        categories=categories,
+        leaves=level,
+        names=names,
+        by_popularity=by_popularity,
+        suppliers=[user_id for user_id in user_ids if user_id % 20 == 0] or [1],
+        customers=[user_id for user_id in user_ids if user_id % 20 != 0] or [1],
+        popularity=Zipf(config.products, config.zipf),
+    )
+
+
+def user_rows(catalog: Catalog) -> Iterator[dict]:
+    hashed_password = bcrypt_context.hash(BENCH_PASSWORD)
+    suppliers = set(catalog.suppliers)
+    for user_id in range(1, catalog.config.users + 1):
+        yield {
+            "id": user_id,
+            "first_name": "Bench",
+            "last_name": str(user_id),
+            "username": username(user_id),
+            "email": f"{username(user_id)}@example.com",
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "is_admin": user_id == 1,
+            "is_supplier": user_id in suppliers,
+            "is_customer": user_id not in suppliers,
+        }
+
+
+def category_rows(catalog: Catalog) -> Iterator[dict]:
+    for category_id, parent_id in catalog.categories:
+        yield {
+            "id": category_id,
+            "parent_id": parent_id,
+            "name": f"Category {category_id}",
+            "slug": category_slug(category_id),
+            "is_active": True,
+        }
+
+
+def product_rows(catalog: Catalog) -> Iterator[dict]:
+    rng = random.Random(f"{catalog.config.seed}:products")
+    for product_id, name in enumerate(catalog.names, start=1):
+        yield {
+            "id": product_id,
+            "name": name,
+            "slug": product_slug(product_id),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(10, 30))),
+            "price": rng.randint(100, 100_000),
+            "image_url": f"https://example.com/{product_id}.png",
+            # Около 10% продуктов закончились, около 3% сняты с продажи
+            "stock": 0 if rng.random() < 0.1 else rng.randint(1, 1_000),
+            "supplier_id": rng.choice(catalog.suppliers),
+            "rating": 0.0,
+            "rating_sum": 0.0,
+            "rating_count": 0,
+            "is_active": rng.random() >= 0.03,
+            "category_id": rng.choice(catalog.leaves),
+        }
+
+
+def review_rows(catalog: Catalog) -> Iterator[dict]:
+    rng = random.Random(f"{catalog.config.seed}:reviews")
+    for review_id in range(1, catalog.config.reviews + 1):
+        yield {
+            "id": review_id,
+            "user_id": rng.choice(catalog.customers),
+            "product_id": catalog.popular_product(rng),
+            "rating": float(rng.randint(1, 10)),
+            "comment": " ".join(rng.choices(WORDS, k=rng.randint(3, 12))),
+            "comment_date": BASE_DATE - timedelta(seconds=rng.randrange(365 * 86400)),
+            "is_active": rng.random() >= 0.05,
+        }
+
+
+def batches(rows: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+async def seed(engine: AsyncEngine, catalog: Catalog) -> None:
+    """
+    Пересоздаёт таблицы приложения и записывает в них каталог.
+
+    Args:
+        engine (AsyncEngine): Движок отдельной базы бенчмарков.
+        catalog (Catalog): Описание каталога из `build_catalog`.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    ratings: dict[int, list[float]] = {}
+    async with engine.begin() as conn:
+        for model, rows in (
+            (User, user_rows(catalog)),
+            (Category, category_rows(catalog)),
+            (Product, product_rows(catalog)),
+        ):
+            for batch in batches(rows, BATCH_SIZE):
+                await conn.execute(insert(model.__table__), batch)
+        for batch in batches(review_rows(catalog), BATCH_SIZE):
+            await conn.execute(insert(Review.__table__), batch)
+            for row in batch:
+                if row["is_active"]:
+                    total = ratings.setdefault(row["product_id"], [0.0, 0])
+                    total[0] += row["rating"]
+                    total[1] += 1
+
+        products = Product.__table__
+        rating_update = (
+            update(products)
+            .where(products.c.id == bindparam("product_id"))
+            .values(
+                rating_sum=bindparam("rating_sum"),
+                rating_count=bindparam("rating_count"),
+                rating=bindparam("rating_value"),
+            )
+        )
+        rows = (
+            {
+                "product_id": product_id,
+                "rating_sum": rating_sum,
+                "rating_count": rating_count,
+                "rating_value": rating_sum / rating_count,
+            }
+            for product_id, (rating_sum, rating_count) in ratings.items()
+        )
+        for batch in batches(rows, BATCH_SIZE):
+            await conn.execute(rating_update, batch)
+
+        if conn.dialect.name == "postgresql":
+            # id заданы явно: сдвигаем последовательности, чтобы новые строки
+            # (заказы, отзывы, продукты из нагрузочного теста) не конфликтовали
+            for table in ("users", "categories", "products", "reviews"):
+                await conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'),"
+                        f" (SELECT max(id) FROM {table}))"
+                    )
+                )
+        await conn.execute(text("ANALYZE"))
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Добавляет параметры каталога и флаг `--reset` в парсер аргументов."""
+    defaults = CatalogConfig()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--reviews", type=int, default=defaults.reviews)
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--branching", type=int, default=defaults.branching)
+    parser.add_argument("--zipf", type=float, default=defaults.zipf)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Разрешить пересоздание таблиц (только для отдельной базы бенчмарков)",
+    )
+
+
+def config_from_args(args: argparse.Namespace) -> CatalogConfig:
+    return CatalogConfig(
+        users=args.users,
+        products=args.products,
+        reviews=args.reviews,
+        depth=args.depth,
+        branching=args.branching,
+        zipf=args.zipf,
+        seed=args.seed,
+    )
+
+
+def check_reset_allowed(engine: AsyncEngine, reset: bool) -> None:
+    """Не даёт пересоздать таблицы без явного `--reset` (кроме SQLite в памяти)."""
+    in_memory = engine.dialect.name == "sqlite" and engine.url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+    if not (reset or in_memory):
+        raise SystemExit(
+            f"Генератор пересоздаёт таблицы в {engine.url.render_as_string()}:"
+            " укажите --reset, если это отдельная база бенчмарков"
+        )
+
+
+async def main(args: argparse.Namespace) -> None:
+    check_reset_allowed(engine, args.reset)
+    catalog = build_catalog(config_from_args(args))
+    started = time.perf_counter()
+    await seed(engine, catalog)
+    print(
+        f"{args.users} users, {len(catalog.categories)} categories,"
+        f" {args.products} products, {args.reviews} reviews"
+        f" in {time.perf_counter() - started:.1f}s"
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генератор синтетического каталога")
+    add_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
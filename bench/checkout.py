@@ -0,0 +1,141 @@
+"""
+Нагрузочный тест оформления заказов на один «горячий» продукт.
+
+Создаёт продукт с остатком `--stock`, одновременно отправляет `--concurrency`
+запросов `POST /orders/checkout` по одной штуке через ASGI-транспорт httpx
+и проверяет, что продано ровно min(concurrency, stock) единиц: остаток не
+ушёл в минус, а сумма позиций заказов равна списанному остатку. Печатает
+пропускную способность и перцентили задержки. После замеров продукт и
+заказы удаляются.
+
+Нужен существующий пользователь и хотя бы одна категория. Запуск:
+
+    python -m bench.checkout --concurrency 500 --stock 200 --username admin
+"""
+
+import argparse
+import asyncio
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, func, insert, select
+
+from app.backend.db import engine, session as db_session
+from app.main import app
+from app.models.category import Category
+from app.models.order import Order, OrderItem
+from app.models.products import Product
+from app.models.user import User
+from app.routers.auth import issue_tokens
+from app.schemas import CurrentUser
+from bench.report import percentiles, print_table
+
+SLUG = "bench-checkout-hot"
+
+
+async def create_product(user_id: int, category_id: int, stock: int) -> int:
+    async with db_session() as ss:
+        await ss.execute(delete(Product).filter_by(slug=SLUG))
+        product_id = await ss.scalar(
+            insert(Product)
+            .values(
+                name="bench checkout hot",
+                slug=SLUG,
+                description="bench",
+                price=100,
+                image_url="https://example.com/hot.png",
+                stock=stock,
+                supplier_id=user_id,
+                category_id=category_id,
+                rating=0.0,
+                is_active=True,
+            )
+            .returning(Product.id)
+        )
+        await ss.commit()
+    return product_id
+
+
+async def checkout(
+    client: AsyncClient, token: str, product_id: int, latencies: list[float]
+) -> int:
+    started = time.perf_counter()
+    response = await client.post(
+        "/orders/checkout",
+        json={"items": [{"product_id": product_id, "quantity": 1}]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    latencies.append(time.perf_counter() - started)
+    return response.status_code
+
+
+async def verify(
+    product_id: int, concurrency: int, stock: int, codes: list[int]
+) -> None:
+    """Проверяет отсутствие перепродажи; при нарушении завершает процесс с ошибкой."""
+    async with db_session() as ss:
+        left = await ss.scalar(select(Product.stock).filter_by(id=product_id))
+        sold = await ss.scalar(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).filter_by(
+                product_id=product_id
+            )
+        )
+    expected = min(concurrency, stock)
+    created, conflicts = codes.count(201), codes.count(409)
+    print(
+        f"created={created} conflicts={conflicts} other={len(codes) - created - conflicts}"
+        f" sold={sold} stock_left={left}"
+    )
+    if created != expected or sold != expected or left != stock - expected:
+        raise SystemExit("Перепродажа или потеря заказов: проверка не пройдена")
+
+
+async def cleanup(product_id: int) -> None:
+    async with db_session() as ss:
+        orders = select(OrderItem.order_id).filter_by(product_id=product_id)
+        await ss.execute(delete(Order).where(Order.id.in_(orders)))
+        await ss.execute(delete(Product).filter_by(id=product_id))
+        await ss.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with db_session() as ss:
+        user = await ss.scalar(select(User).filter_by(username=args.username))
+        category_id = await ss.scalar(select(Category.id).order_by(Category.id))
+    if user is None or category_id is None:
+        raise SystemExit("Нужны пользователь --username и хотя бы одна категория")
+    token = issue_tokens(CurrentUser.model_validate(user)).access_token
+    product_id = await create_product(user.id, category_id, args.stock)
+    latencies: list[float] = []
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            codes = await asyncio.gather(
+                *(
+                    checkout(client, token, product_id, latencies)
+                    for _ in range(args.concurrency)
+                )
+            )
+            elapsed = time.perf_counter() - started
+        print(
+            f"{args.concurrency} checkouts in {elapsed:.2f}s"
+            f" ({args.concurrency / elapsed:.0f} checkouts/s)"
+        )
+        print_table({"checkout": percentiles(latencies)})
+        await verify(product_id, args.concurrency, args.stock, list(codes))
+    finally:
+        if not args.keep:
+            await cleanup(product_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест оформления заказов")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument(
+        "--keep", action="store_true", help="Не удалять продукт и заказы"
+    )
+    asyncio.run(main(parser.parse_args()))
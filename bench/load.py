@@ -0,0 +1,231 @@
+"""
+Нагрузочный тест приложения в одном процессе.
+
+Заполняет базу синтетическим каталогом (`bench.catalog`) и гоняет смесь
+запросов из `bench.scenarios` через `httpx.AsyncClient` с `ASGITransport`,
+как в `tests/test_main.py`: без сети и отдельного сервера, но через весь стек
+приложения (middleware, зависимости, сериализация, база). `--concurrency`
+воркеров выполняют `--requests` запросов, выбирая сценарии по весам. Прогрев
+кэшей (`bench.scenarios.warmup_requests`) и первые `--warmup` запросов
+не учитываются.
+
+По каждому эндпоинту печатаются количество запросов, пропускная способность
+и перцентили задержки; результаты можно записать в JSON (`--output`)
+и сравнить с сохранённым базовым прогоном (`--baseline`). При ухудшении
+больше чем на `--tolerance` скрипт завершается с ненулевым кодом.
+
+Запуск:
+
+    python -m bench.load --reset --requests 20000 --concurrency 32 \\
+        --output results.json --baseline baseline.json
+
+Абсолютные числа зависят от машины и СУБД: базовый прогон имеет смысл только
+с теми же параметрами на том же окружении.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from itertools import accumulate
+
+from httpx import ASGITransport, AsyncClient
+
+from app.backend.db import engine
+from app.main import app
+from bench.catalog import (
+    add_arguments,
+    build_catalog,
+    check_reset_allowed,
+    config_from_args,
+    seed,
+)
+from bench.report import (
+    compare,
+    percentiles,
+    print_comparison,
+    print_table,
+    read_results,
+    write_results,
+)
+from bench.scenarios import (
+    ROUTERS,
+    SCENARIOS,
+    LoadContext,
+    Scenario,
+    warmup_requests,
+)
+
+
+async def run_load(
+    client: AsyncClient,
+    ctx: LoadContext,
+    scenarios: list[Scenario],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int,
+) -> dict:
+    """
+    Выполняет нагрузочный прогон и собирает результаты по эндпоинтам.
+
+    Args:
+        client (AsyncClient): Клиент, подключённый к приложению.
+        ctx (LoadContext): Описание каталога и токены пользователей.
+        scenarios (list[Scenario]): Смесь сценариев.
+        requests (int): Количество учитываемых запросов.
+        concurrency (int): Количество одновременно работающих воркеров.
+        warmup (int): Количество предварительных запросов, не попадающих в результаты.
+        seed (int): Зерно генераторов случайных чисел воркеров.
+
+    Returns:
+        dict: `total` (requests, seconds, rps, errors) и `endpoints`:
+        имя сценария -> count, rps, перцентили в мс и коды ответов.
+    """
+    weights = list(accumulate(scenario.weight for scenario in scenarios))
+    samples: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter] = defaultdict(Counter)
+
+    async def worker(rng: random.Random, budget: list[int], record: bool) -> None:
+        while budget[0] > 0:
+            budget[0] -= 1
+            scenario = rng.choices(scenarios, cum_weights=weights)[0]
+            method, url, kwargs = scenario.build(ctx, rng)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = time.perf_counter() - started
+            if record:
+                samples[scenario.name].append(elapsed)
+                statuses[scenario.name][response.status_code] += 1
+
+    async def phase(count: int, record: bool, offset: int) -> float:
+        budget = [count]
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                worker(random.Random(seed + offset + i), budget, record)
+                for i in range(concurrency)
+            )
+        )
+        return time.perf_counter() - started
+
+    await asyncio.gather(
+        *(
+            client.request(method, url, **kwargs)
+            for method, url, kwargs in warmup_requests(ctx)
+        )
+    )
+    if warmup:
+        await phase(warmup, record=False, offset=concurrency)
+    seconds = await phase(requests, record=True, offset=0)
+
+    endpoints = {}
+    for scenario in scenarios:
+        if scenario.name not in samples:
+            continue
+        row = percentiles(samples[scenario.name])
+        row["rps"] = row["count"] / seconds
+        row["statuses"] = {
+            str(code): count for code, count in sorted(statuses[scenario.name].items())
+        }
+        endpoints[scenario.name] = row
+    errors = sum(
+        count
+        for counter in statuses.values()
+        for code, count in counter.items()
+        if code >= 500
+    )
+    return {
+        "total": {
+            "requests": requests,
+            "seconds": seconds,
+            "rps": requests / seconds,
+            "errors": errors,
+        },
+        "endpoints": endpoints,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = config_from_args(args)
+    catalog = build_catalog(config)
+    if not args.skip_seed:
+        check_reset_allowed(engine, args.reset)
+        await seed(engine, catalog)
+    scenarios = [scenario for scenario in SCENARIOS if scenario.router in args.routers]
+
+    # raise_app_exceptions=False: ошибка обработчика считается ответом 500,
+    # а не прерывает весь прогон
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = await run_load(
+                client,
+                LoadContext(catalog),
+                scenarios,
+                args.requests,
+                args.concurrency,
+                args.warmup,
+                args.seed,
+            )
+    await engine.dispose()
+
+    results = {
+        "meta": {
+            "config": vars(config),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "dialect": engine.dialect.name,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        **results,
+    }
+    total = results["total"]
+    print_table(results["endpoints"])
+    print(
+        f"\n{total['requests']} requests in {total['seconds']:.1f}s:"
+        f" {total['rps']:.1f} rps, {total['errors']} errors (5xx)"
+    )
+    if args.output:
+        write_results(args.output, results)
+
+    if args.baseline:
+        baseline = read_results(args.baseline)
+        print()
+        print_comparison(baseline, results)
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест приложения")
+    add_arguments(parser)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument(
+        "--routers",
+        nargs="+",
+        choices=ROUTERS,
+        default=list(ROUTERS),
+        help="Нагружать только эндпоинты этих роутеров",
+    )
+    parser.add_argument(
+        "--skip-seed",
+        action="store_true",
+        help="Не заполнять базу: каталог с теми же параметрами уже записан",
+    )
+    parser.add_argument("--output", help="Файл для записи результатов в JSON")
+    parser.add_argument("--baseline", help="JSON базового прогона для сравнения")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Допустимое ухудшение относительно базового прогона (доля)",
+    )
+    asyncio.run(main(parser.parse_args()))
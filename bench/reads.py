@@ -0,0 +1,139 @@
+"""
+Бенчмарк чтения продуктов: ORM-сущности против Core-запросов `app.backend.reads`.
+
+Создаёт в схеме `bench` копию таблицы `products`, заполняет её синтетическими
+продуктами и для каждого размера выборки (`--sizes`) замеряет:
+
+- `orm` — `select(Product)`: полные ORM-объекты в identity map сессии;
+- `orm_columns` — `select(колонки)` через `Session.execute`;
+- `core` — `reads.fetch_all`: те же колонки, запрос на подключении сессии.
+
+Для каждого варианта печатается время (перцентили по `--repeat` повторам)
+и пик выделенной памяти по `tracemalloc` за одно чтение. Каждое повторение
+идёт в новой сессии, как отдельный HTTP-запрос.
+
+Запуск:
+
+    python -m bench.reads --sizes 1000 10000 100000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend import reads
+from app.backend.db import engine
+from app.models.products import Product
+from bench.report import percentiles, print_table
+
+FILL = """
+    INSERT INTO bench.products (
+        id, name, slug, description, price, image_url, stock,
+        rating, rating_sum, rating_count, is_active, category_id
+    )
+    SELECT
+        i, 'Product ' || i, 'bench-' || i,
+        repeat('description ', 10) || i,
+        1 + i % 1000, 'https://example.com/' || i || '.png', 1 + i % 7,
+        (i % 100) / 10.0, 0, 0, true, 1
+    FROM generate_series(1, :rows) AS i
+"""
+
+
+async def prepare(rows: int) -> None:
+    """Создаёт и заполняет `bench.products`."""
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE SCHEMA IF NOT EXISTS bench"))
+        await conn.execute(text("DROP TABLE IF EXISTS bench.products"))
+        await conn.execute(
+            text("CREATE TABLE bench.products (LIKE public.products INCLUDING ALL)")
+        )
+        await conn.execute(text(FILL), {"rows": rows})
+        await conn.execute(text("ANALYZE bench.products"))
+
+
+def scenarios(size: int) -> dict:
+    """Варианты чтения `size` продуктов: функции (сессия) -> количество строк."""
+    columns = reads.PRODUCT_COLUMNS + (reads.products.c.updated_at,)
+    order = reads.products.c.id
+
+    async def orm(ss: AsyncSession) -> int:
+        result = await ss.execute(select(Product).order_by(Product.id).limit(size))
+        return len(result.scalars().all())
+
+    async def orm_columns(ss: AsyncSession) -> int:
+        result = await ss.execute(select(*columns).order_by(order).limit(size))
+        return len(result.all())
+
+    async def core(ss: AsyncSession) -> int:
+        statement = select(*columns).order_by(order).limit(size)
+        return len(await reads.fetch_all(ss, statement))
+
+    return {"orm": orm, "orm_columns": orm_columns, "core": core}
+
+
+async def measure(sizes: list[int], repeat: int) -> None:
+    """Замеряет время и пик памяти каждого варианта на каждом размере."""
+    async with engine.connect() as conn:
+        await conn.execute(text("SET search_path TO bench, public"))
+        await conn.commit()
+        memory = {}
+        for size in sizes:
+            results = {}
+            for name, read in scenarios(size).items():
+                async with AsyncSession(bind=conn) as ss:
+                    assert await read(ss) == size, "not enough rows, raise --rows"
+                samples = []
+                for _ in range(repeat):
+                    async with AsyncSession(bind=conn) as ss:
+                        started = time.perf_counter()
+                        await read(ss)
+                        samples.append(time.perf_counter() - started)
+                results[f"{name} {size}"] = percentiles(samples)
+
+                gc.collect()
+                tracemalloc.start()
+                async with AsyncSession(bind=conn) as ss:
+                    await read(ss)
+                    _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                memory[f"{name} {size}"] = peak
+            print_table(results)
+            print()
+        await conn.rollback()
+    print(f"{'scenario':<24}{'peak MiB':>10}{'bytes/row':>12}")
+    for name, peak in memory.items():
+        size = int(name.rsplit(" ", 1)[1])
+        print(f"{name:<24}{peak / 2**20:>10.2f}{peak / size:>12.0f}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not args.skip_fill:
+        await prepare(max(args.sizes))
+    await measure(sorted(args.sizes), args.repeat)
+    if not args.keep:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA bench CASCADE"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения продуктов")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--keep", action="store_true", help="Не удалять схему bench после замеров"
+    )
+    parser.add_argument(
+        "--skip-fill",
+        action="store_true",
+        help="Использовать уже заполненную bench.products (после --keep)",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""
+Общие функции для подсчёта, вывода и сравнения результатов бенчмарков.
+"""
+
+import json
+import statistics
+from pathlib import Path
+from typing import Iterable
+
+# Показатели, которые сравниваются с базовым прогоном: чем больше, тем хуже
+LATENCY_KEYS = ("p50", "p95", "p99")
+
+
+def percentiles(samples: Iterable[float]) -> dict[str, float]:
+    """
+    Считает перцентили задержки.
+
+    Args:
+        samples: Замеры в секундах.
+
+    Returns:
+        dict[str, float]: Количество замеров, p50, p95, p99 и максимум в миллисекундах.
+    """
+    samples = sorted(samples)
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {
+            "count": len(samples),
+            "p50": value,
+            "p95": value,
+            "p99": value,
+            "max": value,
+        }
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "max": samples[-1] * 1000,
+    }
+
+
+def print_table(results: dict[str, dict[str, float]]) -> None:
+    """Печатает перцентили (и пропускную способность `rps`, если есть) по сценариям."""
+    width = max([24, *(len(name) + 2 for name in results)])
+    with_rps = any("rps" in row for row in results.values())
+    print(
+        f"{'scenario':<{width}}{'count':>8}"
+        + (f"{'rps':>10}" if with_rps else "")
+        + f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for name, row in results.items():
+        print(
+            f"{name:<{width}}{row['count']:>8}"
+            + (f"{row.get('rps', 0):>10.1f}" if with_rps else "")
+            + f"{row['p50']:>10.2f}{row['p95']:>10.2f}{row['p99']:>10.2f}{row['max']:>10.2f}"
+        )
+
+
+def write_results(path: str, results: dict) -> None:
+    """Записывает результаты прогона в JSON."""
+    Path(path).write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n")
+
+
+def read_results(path: str) -> dict:
+    """Читает результаты прогона, записанные `write_results`."""
+    return json.loads(Path(path).read_text())
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """
+    Сравнивает результаты нагрузочного прогона с базовыми.
+
+    Регрессия — рост p50/p95/p99 или падение пропускной способности (`rps`)
+    эндпоинта больше чем на `tolerance` (доля, например 0.1 = 10%).
+    Эндпоинты, которых нет в одном из прогонов, не сравниваются.
+
+    Args:
+        baseline (dict): Базовый прогон (`endpoints`: имя -> показатели).
+        current (dict): Текущий прогон в том же формате.
+        tolerance (float): Допустимое относительное ухудшение.
+
+    Returns:
+        list[str]: Описания регрессий; пустой список, если их нет.
+    """
+    regressions = []
+    for name, row in current["endpoints"].items():
+        base = baseline["endpoints"].get(name)
+        if base is None:
+            continue
+        for key in LATENCY_KEYS:
+            if base[key] > 0 and row[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {base[key]:.2f} -> {row[key]:.2f} ms"
+                )
+        if row["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {row['rps']:.1f}")
+    return regressions
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    """Печатает изменение показателей эндпоинтов относительно базового прогона в %."""
+    names = [name for name in current["endpoints"] if name in baseline["endpoints"]]
+    width = max([24, *(len(name) + 2 for name in names)])
+    print(f"{'vs baseline':<{width}}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name in names:
+        base, row = baseline["endpoints"][name], current["endpoints"][name]
+        changes = [
+            (row[key] - base[key]) / base[key] * 100 if base[key] else 0.0
+            for key in ("rps", *LATENCY_KEYS)
+        ]
+        print(f"{name:<{width}}" + "".join(f"{change:>+9.1f}%" for change in changes))
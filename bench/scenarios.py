@@ -0,0 +1,181 @@
+"""
+Сценарии нагрузочного теста по роутерам приложения.
+
+Сценарий — один тип запроса к одному эндпоинту и его вес в смеси запросов.
+Запрос строится по описанию каталога (`bench.catalog.Catalog`): продукты
+выбираются с учётом популярности (Ципф), поэтому горячие продукты получают
+большую часть запросов, как на настоящей витрине. Имя сценария — метод
+и шаблон пути эндпоинта; по нему группируются результаты.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.routers.auth import issue_tokens
+from app.schemas import CurrentUser
+from bench.catalog import (
+    BENCH_PASSWORD,
+    Catalog,
+    category_slug,
+    product_slug,
+    username,
+)
+from bench.search import WORDS
+
+# Метод, URL и именованные аргументы `AsyncClient.request`
+Request = tuple[str, str, dict[str, Any]]
+
+# Небольшой круг пользователей с Basic-авторизацией: после прогрева проверка
+# пароля берётся из кэша учётных данных, а не из bcrypt
+BASIC_USERS = 20
+
+
+@dataclass
+class LoadContext:
+    """
+    Данные, общие для всех запросов нагрузочного теста.
+
+    Атрибуты:
+        catalog (Catalog): Описание каталога в базе.
+    """
+
+    catalog: Catalog
+    _tokens: dict[int, str] = field(default_factory=dict, repr=False)
+
+    def bearer(self, user_id: int) -> dict[str, str]:
+        """Заголовок с токеном доступа покупателя (токены выпускаются один раз)."""
+        token = self._tokens.get(user_id)
+        if token is None:
+            user = CurrentUser(id=user_id, username=username(user_id))
+            token = self._tokens[user_id] = issue_tokens(user).access_token
+        return {"Authorization": f"Bearer {token}"}
+
+    def customer(self, rng: random.Random) -> dict[str, str]:
+        """Заголовок случайного покупателя."""
+        return self.bearer(rng.choice(self.catalog.customers))
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    Сценарий нагрузки.
+
+    Атрибуты:
+        name (str): Метод и шаблон пути эндпоинта.
+        router (str): Роутер приложения, к которому относится эндпоинт.
+        weight (float): Относительная частота сценария в смеси запросов.
+        build (Callable): Строит запрос по контексту и генератору случайных чисел.
+    """
+
+    name: str
+    router: str
+    weight: float
+    build: Callable[[LoadContext, random.Random], Request]
+
+
+def product_list(ctx: LoadContext, rng: random.Random) -> Request:
+    params = {
+        "sort": rng.choice(("id", "price", "rating")),
+        "order": rng.choice(("asc", "desc")),
+    }
+    return "GET", "/products/", {"params": params}
+
+
+def product_detail(ctx: LoadContext, rng: random.Random) -> Request:
+    slug = product_slug(ctx.catalog.popular_product(rng))
+    return "GET", f"/products/detail/{slug}", {}
+
+
+def category_products(ctx: LoadContext, rng: random.Random) -> Request:
+    category_id, _ = rng.choice(ctx.catalog.categories)
+    return "GET", f"/products/{category_slug(category_id)}", {}
+
+
+def product_search(ctx: LoadContext, rng: random.Random) -> Request:
+    q = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+    return "GET", "/products/search", {"params": {"q": q}}
+
+
+def product_suggest(ctx: LoadContext, rng: random.Random) -> Request:
+    name = ctx.catalog.names[ctx.catalog.popular_product(rng) - 1]
+    return "GET", "/products/suggest", {"params": {"prefix": name[: rng.randint(1, 4)]}}
+
+
+def all_categories(ctx: LoadContext, rng: random.Random) -> Request:
+    return "GET", "/category/all_categories", {}
+
+
+def category_tree(ctx: LoadContext, rng: random.Random) -> Request:
+    return "GET", "/category/tree", {}
+
+
+def review_feed(ctx: LoadContext, rng: random.Random) -> Request:
+    return "GET", "/review/all_reviews", {}
+
+
+def product_reviews(ctx: LoadContext, rng: random.Random) -> Request:
+    slug = product_slug(ctx.catalog.popular_product(rng))
+    return "GET", f"/review/products_reviews/{slug}", {}
+
+
+def add_review(ctx: LoadContext, rng: random.Random) -> Request:
+    user_id = rng.choice(ctx.catalog.customers)
+    review = {
+        "id": 0,
+        "rating": rng.randint(1, 10),
+        "comment": "bench",
+        "user_id": user_id,
+        "product_id": ctx.catalog.popular_product(rng),
+    }
+    return (
+        "POST",
+        "/review/add_review",
+        {"json": review, "headers": ctx.bearer(user_id)},
+    )
+
+
+def basic_user(user_id: int) -> Request:
+    return "GET", "/auth/users/me", {"auth": (username(user_id), BENCH_PASSWORD)}
+
+
+def current_user(ctx: LoadContext, rng: random.Random) -> Request:
+    return basic_user(rng.choice(ctx.catalog.customers[:BASIC_USERS]))
+
+
+def checkout(ctx: LoadContext, rng: random.Random) -> Request:
+    product_ids = {ctx.catalog.popular_product(rng) for _ in range(rng.randint(1, 3))}
+    order = {
+        "items": [
+            {"product_id": product_id, "quantity": 1} for product_id in product_ids
+        ]
+    }
+    return "POST", "/orders/checkout", {"json": order, "headers": ctx.customer(rng)}
+
+
+def my_orders(ctx: LoadContext, rng: random.Random) -> Request:
+    return "GET", "/orders/", {"headers": ctx.customer(rng)}
+
+
+# Смесь запросов витрины: в основном чтение каталога, немного записи
+SCENARIOS = (
+    Scenario("GET /products/", "products", 10, product_list),
+    Scenario("GET /products/detail/{product_slug}", "products", 25, product_detail),
+    Scenario("GET /products/{category_slug}", "products", 10, category_products),
+    Scenario("GET /products/search", "products", 8, product_search),
+    Scenario("GET /products/suggest", "products", 8, product_suggest),
+    Scenario("GET /category/all_categories", "category", 3, all_categories),
+    Scenario("GET /category/tree", "category", 2, category_tree),
+    Scenario("GET /review/all_reviews", "reviews", 3, review_feed),
+    Scenario("GET /review/products_reviews/{slug}", "reviews", 10, product_reviews),
+    Scenario("POST /review/add_review", "reviews", 2, add_review),
+    Scenario("GET /auth/users/me", "auth", 3, current_user),
+    Scenario("POST /orders/checkout", "orders", 3, checkout),
+    Scenario("GET /orders/", "orders", 2, my_orders),
+)
+ROUTERS = tuple(dict.fromkeys(scenario.router for scenario in SCENARIOS))
+
+
+def warmup_requests(ctx: LoadContext) -> list[Request]:
+    """Запросы, которые заполняют кэши приложения до начала замеров."""
+    return [basic_user(user_id) for user_id in ctx.catalog.customers[:BASIC_USERS]]
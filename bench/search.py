@@ -0,0 +1,164 @@
+"""
+Бенчмарк полнотекстового поиска продуктов против ILIKE-сканирования.
+
+Создаёт в схеме `bench` копию таблицы `products` (со всеми индексами,
+включая GIN по `search_vector`), заполняет её синтетическими продуктами
+и замеряет задержку запросов:
+
+- `fts` — запрос эндпоинта `GET /products/search` (`search_statement`);
+- `ilike` — `name ILIKE '%q%' OR description ILIKE '%q%'`, который
+  пришлось бы писать без полнотекстового индекса.
+
+Запуск:
+
+    python -m bench.search --rows 1000000 --queries 200
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import and_, or_, select, text
+
+from app.backend.db import engine
+from app.backend.search import search_statement
+from app.models.products import Product
+from bench.report import percentiles, print_table
+
+# Слова для названий и описаний; первые встречаются чаще (см. random()^3 ниже)
+WORDS = (
+    "телефон смартфон чехол наушники зарядка кабель экран камера батарея "
+    "красный чёрный белый синий большой маленький быстрый беспроводной "
+    "ноутбук клавиатура мышь монитор колонка часы браслет планшет "
+    "phone case charger cable wireless screen camera battery laptop "
+    "keyboard mouse monitor speaker watch tablet black white red blue"
+).split()
+SYNTHETIC_WORDS = 5000  # Дополнительные редкие слова вида w123
+PAGE_SIZE = 20
+
+
+def fill_statement() -> str:
+    """SQL, вставляющий пачку продуктов с id из [:start, :stop)."""
+    return """
+        INSERT INTO bench.products (
+            id, name, slug, description, price, image_url, stock,
+            rating, rating_sum, rating_count, is_active, category_id
+        )
+        SELECT
+            i,
+            v.words[1 + floor(random() ^ 3 * :size)::int] || ' '
+                || v.words[1 + floor(random() ^ 3 * :size)::int],
+            'bench-' || i,
+            (
+                SELECT string_agg(word, ' ')
+                FROM (
+                    SELECT v.words[1 + floor(random() ^ 2 * :size)::int] AS word
+                    FROM generate_series(1, 15 + i % 10)
+                ) AS description_words
+            ),
+            1 + i % 1000,
+            'https://example.com/' || i || '.png',
+            i % 7,
+            0, 0, 0,
+            i % 20 <> 0,
+            1
+        FROM generate_series(:start, :stop - 1) AS i,
+            (SELECT CAST(:vocab AS text[]) AS words) AS v
+    """
+
+
+async def prepare(rows: int, batch: int) -> None:
+    """Создаёт и заполняет `bench.products`."""
+    vocab = WORDS + [f"w{i}" for i in range(SYNTHETIC_WORDS)]
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE SCHEMA IF NOT EXISTS bench"))
+        await conn.execute(text("DROP TABLE IF EXISTS bench.products"))
+        await conn.execute(
+            text("CREATE TABLE bench.products (LIKE public.products INCLUDING ALL)")
+        )
+    started = time.perf_counter()
+    for start in range(1, rows + 1, batch):
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(fill_statement()),
+                {
+                    "vocab": vocab,
+                    "size": len(vocab) - 1,
+                    "start": start,
+                    "stop": min(start + batch, rows + 1),
+                },
+            )
+        print(f"\rinserted {min(start + batch - 1, rows)}/{rows}", end="", flush=True)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE bench.products"))
+    print(f"\nfilled in {time.perf_counter() - started:.1f}s")
+
+
+def ilike_statement(q: str, limit: int):
+    """Запрос, который пишут без полнотекстового индекса."""
+    pattern = f"%{q}%"
+    return (
+        select(Product.id, Product.name, Product.slug, Product.price)
+        .where(
+            or_(Product.name.ilike(pattern), Product.description.ilike(pattern)),
+            and_(Product.is_active == True, Product.stock > 0),
+        )
+        .order_by(Product.id)
+        .limit(limit)
+    )
+
+
+async def measure(queries: list[str]) -> dict[str, dict[str, float]]:
+    """Замеряет задержку обоих вариантов поиска на одних и тех же запросах."""
+    statements = {
+        "fts": lambda q: search_statement(q, PAGE_SIZE + 1),
+        "ilike": lambda q: ilike_statement(q, PAGE_SIZE + 1),
+    }
+    results = {}
+    async with engine.connect() as conn:
+        await conn.execute(text("SET search_path TO bench, public"))
+        for name, build in statements.items():
+            await conn.execute(build(queries[0]))  # Прогрев
+            samples = []
+            for q in queries:
+                started = time.perf_counter()
+                (await conn.execute(build(q))).all()
+                samples.append(time.perf_counter() - started)
+            results[name] = percentiles(samples)
+        await conn.rollback()
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not args.skip_fill:
+        await prepare(args.rows, args.batch)
+    rng = random.Random(args.seed)
+    pool = WORDS + [f"w{i}" for i in range(0, SYNTHETIC_WORDS, 50)]
+    queries = [
+        " ".join(rng.sample(pool, 2)) if i % 4 == 0 else rng.choice(pool)
+        for i in range(args.queries)
+    ]
+    print_table(await measure(queries))
+    if not args.keep:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA bench CASCADE"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска продуктов")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--keep", action="store_true", help="Не удалять схему bench после замеров"
+    )
+    parser.add_argument(
+        "--skip-fill",
+        action="store_true",
+        help="Использовать уже заполненную bench.products (после --keep)",
+    )
+    asyncio.run(main(parser.parse_args()))
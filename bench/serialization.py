@@ -0,0 +1,116 @@
+"""
+Микробенчмарк сериализации страницы продуктов.
+
+Строит `--rows` строк `Row` с колонками списка продуктов (как их возвращает
+запрос `GET /products/`) и замеряет, сколько стоит превратить их в тело
+JSON-ответа:
+
+- `before` — прежний путь: `row._asdict()`, `jsonable_encoder` и `JSONResponse`;
+- `cached` — путь кэша ответов: `ProductOut.from_rows` и `render_json`;
+- `response_model` — путь без кэша: валидация и сериализация по
+  `response_model` (`Page[ProductOut]`) и `ORJSONResponse`.
+
+База данных не нужна. Запуск:
+
+    python -m bench.serialization --rows 10000 --repeat 50
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.engine.result import result_tuple
+
+from app.backend.response_cache import render_json
+from app.schemas import Page, ProductOut
+from bench.report import percentiles, print_table
+
+FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "description",
+    "price",
+    "image_url",
+    "stock",
+    "rating",
+    "category_id",
+    "supplier_id",
+    "updated_at",
+)
+
+
+def make_rows(count: int) -> list:
+    """Синтетические строки `Row` с колонками списка продуктов."""
+    make_row = result_tuple(FIELDS)
+    started = datetime(2026, 1, 1)
+    return [
+        make_row(
+            (
+                i,
+                f"Product {i}",
+                f"product-{i}",
+                "Синтетическое описание продукта " * 3,
+                random.randint(1, 100_000),
+                f"https://example.com/{i}.png",
+                random.randint(1, 100),
+                round(random.uniform(0, 10), 2),
+                random.randint(1, 50),
+                random.randint(1, 20),
+                started + timedelta(seconds=i, microseconds=i),
+            )
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def before(rows: list) -> bytes:
+    content = {"items": [row._asdict() for row in rows], "next_cursor": None}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def cached(rows: list) -> bytes:
+    page = Page[ProductOut](items=ProductOut.from_rows(rows), next_cursor=None)
+    return render_json(page)
+
+
+page_adapter = TypeAdapter(Page[ProductOut])
+
+
+def response_model(rows: list) -> bytes:
+    page = Page[ProductOut](items=ProductOut.from_rows(rows), next_cursor=None)
+    # То же, что делает FastAPI для эндпоинта с response_model
+    content = page_adapter.dump_python(page_adapter.validate_python(page), mode="json")
+    return ORJSONResponse(content).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    scenarios = {"before": before, "cached": cached, "response_model": response_model}
+    bodies = {name: scenario(rows) for name, scenario in scenarios.items()}
+    # Все пути отдают один и тот же JSON
+    assert len({len(body) for body in bodies.values()}) == 1, "bodies differ"
+
+    results = {}
+    for name, scenario in scenarios.items():
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            scenario(rows)
+            samples.append(time.perf_counter() - started)
+        results[name] = percentiles(samples)
+    print(f"{args.rows} rows, {len(bodies['before'])} bytes per page")
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
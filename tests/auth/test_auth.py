@@ -13,4 +13,140 @@
 
 Примеры тестов:
 - Проверка корневого эндпоинта `/` на корректный статус-код и тело ответа.
-"""
\ No newline at end of file
+"""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPBasicCredentials
+from httpx import AsyncClient, ASGITransport
+
+from app.main import app
+from app.models.user import User
+from app.routers.auth import (
+    bcrypt_context,
+    credentials_cache,
+    get_current_username,
+    invalidate_user_credentials,
+    issue_tokens,
+)
+from app.schemas import CurrentUser
+from app.backend.tokens import (
+    ACCESS_TOKEN,
+    REFRESH_TOKEN,
+    TokenError,
+    create_token,
+    decode_token,
+    revocation_list,
+)
+
+
+class FakeSession:
+    """Заглушка сессии, считающая запросы к БД."""
+
+    def __init__(self, user: User | None) -> None:
+        self.user = user
+        self.calls = 0
+
+    async def scalar(self, query):
+        self.calls += 1
+        return self.user
+
+
+@pytest.fixture
+def user() -> User:
+    credentials_cache.clear()
+    yield User(
+        id=1,
+        username="ivan",
+        first_name="Ivan",
+        last_name="Ivanov",
+        email="ivan@example.com",
+        hashed_password=bcrypt_context.hash("secret"),
+        is_active=True,
+        is_admin=False,
+        is_supplier=True,
+        is_customer=True,
+    )
+    credentials_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_credentials_cache_skips_db(user: User) -> None:
+    """Повторная аутентификация с теми же данными не обращается к БД."""
+    session = FakeSession(user)
+    credentials = HTTPBasicCredentials(username="ivan", password="secret")
+
+    first = await get_current_username(session, credentials)
+    second = await get_current_username(session, credentials)
+
+    assert session.calls == 1
+    assert first == second
+    assert first.is_supplier and first.id == 1
+
+
+@pytest.mark.asyncio
+async def test_credentials_cache_wrong_password(user: User) -> None:
+    """Неверный пароль не совпадает с закэшированным дайджестом."""
+    session = FakeSession(user)
+    await get_current_username(
+        session, HTTPBasicCredentials(username="ivan", password="secret")
+    )
+    with pytest.raises(HTTPException) as exc:
+        await get_current_username(
+            session, HTTPBasicCredentials(username="ivan", password="wrong")
+        )
+    assert exc.value.status_code == 401
+    assert session.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_credentials_cache_invalidation(user: User) -> None:
+    """После инвалидации учётные данные снова проверяются по БД."""
+    session = FakeSession(user)
+    credentials = HTTPBasicCredentials(username="ivan", password="secret")
+    await get_current_username(session, credentials)
+
+    invalidate_user_credentials("ivan")
+    await get_current_username(session, credentials)
+
+    assert session.calls == 2
+
+
+def test_token_roundtrip_and_tampering() -> None:
+    """Подписанный токен проверяется, а изменённый — отклоняется."""
+    token = create_token({"id": 7, "is_admin": True}, ACCESS_TOKEN, 60)
+    claims = decode_token(token, ACCESS_TOKEN)
+    assert claims["id"] == 7 and claims["is_admin"] is True
+
+    header, payload, signature = token.split(".")
+    forged = create_token({"id": 7, "is_admin": False}, ACCESS_TOKEN, 60)
+    with pytest.raises(TokenError):
+        decode_token(f"{header}.{forged.split('.')[1]}.{signature}", ACCESS_TOKEN)
+    with pytest.raises(TokenError):
+        decode_token(token, REFRESH_TOKEN)
+    with pytest.raises(TokenError):
+        decode_token("garbage", ACCESS_TOKEN)
+
+
+def test_revoked_token_is_rejected() -> None:
+    """Отозванный токен больше не принимается."""
+    token = create_token({"id": 7}, ACCESS_TOKEN, 60)
+    claims = decode_token(token, ACCESS_TOKEN)
+    revocation_list.revoke(claims["jti"], claims["exp"])
+    with pytest.raises(TokenError):
+        decode_token(token, ACCESS_TOKEN)
+
+
+@pytest.mark.asyncio
+async def test_bearer_token_authorizes_without_db(user: User) -> None:
+    """Запрос с токеном доступа авторизуется без обращения к БД."""
+    tokens = issue_tokens(CurrentUser.model_validate(user))
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as async_client:
+        response = await async_client.post(
+            "/category/create",
+            json={"name": "Phones", "parent_id": None},
+            headers={"Authorization": f"Bearer {tokens.access_token}"},
+        )
+    assert response.status_code == 403
@@ -13,4 +13,89 @@
 
 Примеры тестов:
 - Проверка корневого эндпоинта `/all_categories` на корректный статус-код и тело ответа.
-"""
\ No newline at end of file
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.backend.category_tree import CategoryTree
+from app.main import app
+
+
+def category(id, parent_id, is_active=True):
+    """Строка таблицы категорий для построения дерева."""
+    return SimpleNamespace(
+        id=id,
+        parent_id=parent_id,
+        name=f"c{id}",
+        slug=f"c{id}",
+        is_active=is_active,
+        updated_at=None,
+    )
+
+
+def test_category_tree_descendants() -> None:
+    """Множество потомков включает все уровни вложенности и саму категорию."""
+    tree = CategoryTree(ttl=60)
+    tree.load([category(1, None), category(2, 1), category(3, 2), category(4, None)])
+    assert tree.descendants("c1") == {1, 2, 3}
+    assert tree.descendants("c3") == {3}
+    assert tree.descendants("missing") is None
+    assert tree.get(2).children == (3,)
+
+
+def test_category_tree_cycle() -> None:
+    """Цикл в parent_id не приводит к зацикливанию при построении дерева."""
+    tree = CategoryTree(ttl=60)
+    tree.load([category(1, 2), category(2, 1), category(3, None)])
+    assert tree.descendants("c1") == {1, 2}
+    assert [node["id"] for node in tree.nested()] == [3]
+
+
+def test_category_tree_hides_inactive_subtree() -> None:
+    """Неактивная категория скрывается из дерева вместе с потомками."""
+    tree = CategoryTree(ttl=60)
+    tree.load([category(1, None), category(2, 1, is_active=False), category(3, 2)])
+    assert tree.nested() == [
+        {
+            "id": 1,
+            "parent_id": None,
+            "name": "c1",
+            "slug": "c1",
+            "is_active": True,
+            "children": [],
+        }
+    ]
+    assert [node["id"] for node in tree.active()] == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_category_writes_take_one_statement(catalog, db_calls) -> None:
+    """Изменение и удаление категории — один UPDATE с RETURNING, один коммит
+    и перечитывание дерева категорий; несуществующая категория — 404 без коммита."""
+    admin = {"Authorization": f"Bearer {catalog['admin']}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        for category_id, status_code, counts in ((1, 200, (2, 1)), (99, 404, (1, 0))):
+            db_calls.reset()
+            response = await client.put(
+                "/category/update_category",
+                params={"category_id": category_id},
+                json={"name": "Smartphones", "parent_id": None},
+                headers=admin,
+            )
+            assert response.status_code == status_code
+            assert db_calls.counts == counts
+
+            db_calls.reset()
+            response = await client.delete(
+                "/category/delete", params={"category_id": category_id}, headers=admin
+            )
+            assert response.status_code == status_code
+            assert db_calls.counts == counts
+
+        response = await client.get("/category/all_categories")
+        assert response.json() == []
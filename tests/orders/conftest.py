@@ -0,0 +1,3 @@
+"""
+Модуль для фикстур по работе с заказами.
+"""
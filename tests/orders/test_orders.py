@@ -0,0 +1,242 @@
+"""
+Модуль для тестирования оформления заказов.
+
+Проверяет, что резервирование остатка и отмена истёкших резервов строятся
+как одиночные условные запросы, и валидацию тела запроса оформления.
+"""
+
+import asyncio
+from collections import Counter
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql
+
+from app.backend.db import session
+
+from app.backend.reservations import (
+    ReservationSweeper,
+    expire_statement,
+    release_statement,
+    reserve_statement,
+)
+from app.main import app
+from app.models.order import OrderItem
+from app.models.products import Product
+from app.schemas import CreateOrder, OrderLine
+
+# Одновременных заказов в тесте на PostgreSQL (остаток «горячего» продукта — 100)
+CONCURRENT_CHECKOUTS = 300
+
+
+def compile_pg(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_reserve_statement() -> None:
+    """Все позиции списываются одним UPDATE с условием на остаток."""
+    sql = compile_pg(reserve_statement([(1, 2), (5, 1)]))
+    assert sql.startswith("UPDATE products SET stock=(products.stock - lines.quantity)")
+    assert "FROM (VALUES" in sql
+    assert "products.stock >= lines.quantity" in sql
+    assert "RETURNING products.id, products.slug, products.price" in sql
+
+
+def test_release_and_expire_statements() -> None:
+    """Отмена возвращает остаток одним UPDATE; очистка пропускает заблокированные заказы."""
+    sql = compile_pg(release_statement([1, 2]))
+    assert "stock=(products.stock + released.quantity)" in sql
+    assert "GROUP BY order_items.product_id" in sql
+    sql = compile_pg(expire_statement(100))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "orders.expires_at <= now()" in sql
+
+
+def test_create_order_validation() -> None:
+    """Пустой заказ и неположительное количество отклоняются."""
+    assert (
+        CreateOrder(items=[OrderLine(product_id=1, quantity=2)]).items[0].quantity == 2
+    )
+    with pytest.raises(ValueError):
+        CreateOrder(items=[])
+    with pytest.raises(ValueError):
+        OrderLine(product_id=1, quantity=0)
+
+
+def test_sweeper_disabled() -> None:
+    """Нулевой интервал отключает фоновую отмену резервов."""
+    sweeper = ReservationSweeper(interval=0, batch_size=10, session_factory=None)
+
+    async def run() -> None:
+        sweeper.start()
+        assert not sweeper.running
+        await sweeper.stop()
+
+    asyncio.run(run())
+
+
+@pytest.mark.asyncio
+async def test_sqlite_checkout_never_oversells(catalog) -> None:
+    """Параллельные заказы последней единицы: продаётся ровно одна, остаток не уходит в минус."""
+    headers = {"Authorization": f"Bearer {catalog['customer']}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/orders/checkout",
+                    json={"items": [{"product_id": 2, "quantity": 1}]},
+                    headers=headers,
+                )
+                for _ in range(5)
+            )
+        )
+        assert sorted(response.status_code for response in responses) == [
+            201,
+            409,
+            409,
+            409,
+            409,
+        ]
+        order_id = next(r.json()["order_id"] for r in responses if r.status_code == 201)
+
+        response = await client.post(f"/orders/{order_id}/cancel", headers=headers)
+        assert response.json()["status"] == "cancelled"
+        response = await client.post(
+            "/orders/checkout",
+            json={"items": [{"product_id": 2, "quantity": 1}]},
+            headers=headers,
+        )
+        assert response.status_code == 201
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_postgres_checkout_never_oversells(pg_catalog, db_calls) -> None:
+    """
+    Сотни одновременных заказов двух позиций на PostgreSQL: продаётся ровно
+    остаток «горячего» продукта, а отказ по нему не списывает вторую позицию.
+    """
+    async with session() as ss:
+        hot, plenty = await ss.scalars(
+            insert(Product)
+            .values(
+                [
+                    {
+                        "name": name,
+                        "slug": name,
+                        "description": "",
+                        "price": 10,
+                        "image_url": "",
+                        "stock": stock,
+                        "supplier_id": 1,
+                        "category_id": 1,
+                        "rating": 0.0,
+                    }
+                    for name, stock in (("hot", 100), ("plenty", 1000))
+                ]
+            )
+            .returning(Product.id)
+        )
+        await ss.commit()
+
+    headers = {"Authorization": f"Bearer {pg_catalog['customer']}"}
+    items = [{"product_id": hot, "quantity": 1}, {"product_id": plenty, "quantity": 1}]
+    db_calls.reset()
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        responses = await asyncio.gather(
+            *(
+                client.post("/orders/checkout", json={"items": items}, headers=headers)
+                for _ in range(CONCURRENT_CHECKOUTS)
+            )
+        )
+    statuses = Counter(response.status_code for response in responses)
+    assert statuses == {201: 100, 409: CONCURRENT_CHECKOUTS - 100}
+    # Каждый заказ списывает обе позиции одним UPDATE ... FROM (VALUES ...);
+    # после взаимоблокировки транзакция повторяет тот же запрос
+    stock_updates = [
+        sql
+        for sql in db_calls.statements
+        if sql.startswith("UPDATE products SET stock=")
+    ]
+    assert all(
+        sql.startswith("UPDATE products SET stock=(products.stock - lines.quantity)")
+        for sql in stock_updates
+    )
+    assert len(stock_updates) >= CONCURRENT_CHECKOUTS
+
+    async with session() as ss:
+        stock = dict(
+            (await ss.execute(select(Product.id, Product.stock))).tuples().all()
+        )
+        sold = await ss.scalar(
+            select(func.sum(OrderItem.quantity)).where(OrderItem.product_id == hot)
+        )
+    assert (stock[hot], stock[plenty], sold) == (0, 900, 100)
+
+
+@pytest.mark.asyncio
+async def test_order_writes_take_one_statement(catalog, db_calls) -> None:
+    """Оплата — один UPDATE с условием на владельца; заказ читается отдельно
+    только при отказе (404 чужому, 409 повторной оплате)."""
+    customer = {"Authorization": f"Bearer {catalog['customer']}"}
+    supplier = {"Authorization": f"Bearer {catalog['supplier']}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        order_ids = []
+        for _ in range(2):
+            response = await client.post(
+                "/orders/checkout",
+                json={"items": [{"product_id": 1, "quantity": 1}]},
+                headers=customer,
+            )
+            order_ids.append(response.json()["order_id"])
+
+        for headers, status_code, counts in (
+            (supplier, 404, (2, 0)),
+            (customer, 200, (1, 1)),
+            (customer, 409, (2, 0)),
+        ):
+            db_calls.reset()
+            response = await client.post(f"/orders/{order_ids[0]}/pay", headers=headers)
+            assert response.status_code == status_code
+            assert db_calls.counts == counts
+
+        # Отмена: UPDATE заказа и возврат остатка
+        db_calls.reset()
+        response = await client.post(f"/orders/{order_ids[1]}/cancel", headers=customer)
+        assert response.status_code == 200
+        assert db_calls.counts == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_ordered_product_cannot_be_deleted(catalog) -> None:
+    """Продукт из оплаченного заказа не удаляется: позиции и сумма заказа сохраняются."""
+    customer = {"Authorization": f"Bearer {catalog['customer']}"}
+    admin = {"Authorization": f"Bearer {catalog['admin']}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/orders/checkout",
+            json={"items": [{"product_id": 1, "quantity": 2}]},
+            headers=customer,
+        )
+        order_id = response.json()["order_id"]
+        await client.post(f"/orders/{order_id}/pay", headers=customer)
+
+        response = await client.delete(
+            "/products/delete", params={"product_slug": "red-phone"}, headers=admin
+        )
+        assert response.status_code == 409
+        order = (await client.get(f"/orders/{order_id}", headers=customer)).json()
+        assert order["status"] == "paid"
+        assert [item["quantity"] for item in order["items"]] == [2]
+        assert order["total"] == sum(
+            item["price"] * item["quantity"] for item in order["items"]
+        )
@@ -13,4 +13,647 @@
 
 Примеры тестов:
 - Проверка корневого эндпоинта `/` на корректный статус-код и тело ответа.
-"""
\ No newline at end of file
+"""
+
+import csv
+import gc
+import io
+import json
+import random
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.backend.etag import etag_matches, rows_etag
+from app.backend.pagination import encode_cursor
+from app.backend.response_cache import ResponseCache, cached_response, response_cache
+from app.backend.export import EXPORT_FIELDS, csv_chunk, csv_header, ndjson_chunk
+from app.backend.bulk import (
+    iter_csv,
+    iter_lines,
+    iter_ndjson,
+    stock_update_statement,
+    upsert_statement,
+)
+from app.routers.auth import issue_tokens
+from app.schemas import CurrentUser, ProductOut, UpdateProductStock
+from app.backend import reads
+from app.backend.db import session
+from app.models.products import Product
+from app.models.user import User
+from app.backend.search import render_highlight, search_statement
+from app.backend.suggest import SCAN_LIMIT, PrefixIndex, SuggestEntry, suggest_index
+from app.main import app
+
+
+def test_response_cache_invalidation() -> None:
+    """Запись сбрасывается по своему тегу и по пространству имён тега."""
+    cache = ResponseCache(maxsize=10, ttl=60)
+    cache.set("/a", b"a", {}, ["product:a"])
+    cache.set("/b", b"b", {}, ["product:b"])
+    cache.set("/c", b"c", {}, ["category:all"])
+
+    cache.invalidate("product:a")
+    assert cache.get("/a") is None
+    assert cache.get("/b").body == b"b"
+
+    cache.invalidate("product:*")
+    assert cache.get("/b") is None
+    assert cache.get("/c").body == b"c"
+    assert cache.stats()["hits"] == 2
+
+
+def test_response_cache_lru_eviction() -> None:
+    """При переполнении вытесняется давно не использованная запись."""
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.set("/a", b"a", {}, [])
+    cache.set("/b", b"b", {}, [])
+    cache.get("/a")
+    cache.set("/c", b"c", {}, [])
+    assert cache.get("/b") is None
+    assert cache.get("/a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_response_decorator() -> None:
+    """Повторный запрос отдаётся из кэша, пока тег эндпоинта не сброшен."""
+    app = FastAPI()
+    calls = []
+
+    @app.get("/items/{slug}")
+    @cached_response(tags=lambda slug, **kwargs: [f"test_item:{slug}"])
+    async def item(slug: str, page: int = 1) -> dict:
+        calls.append(slug)
+        return {"slug": slug, "page": page}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as async_client:
+        first = await async_client.get("/items/x?page=2")
+        second = await async_client.get("/items/x?page=2")
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json() == {"slug": "x", "page": 2}
+        assert calls == ["x"]
+
+        response_cache.invalidate("test_item:x")
+        third = await async_client.get("/items/x?page=2")
+        assert third.headers["X-Cache"] == "MISS"
+        assert calls == ["x", "x"]
+
+
+@pytest.mark.asyncio
+async def test_cached_response_invalidated_while_handling() -> None:
+    """Ответ, построенный до инвалидации, не считается свежим после неё."""
+    app = FastAPI()
+
+    @app.get("/racy")
+    @cached_response(tags=lambda **kwargs: ["test_racy:all"])
+    async def racy() -> dict:
+        # Запись в другом запросе завершилась, пока обработчик читал БД
+        response_cache.invalidate("test_racy:all")
+        return {}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as async_client:
+        assert (await async_client.get("/racy")).headers["X-Cache"] == "MISS"
+        assert (await async_client.get("/racy")).headers["X-Cache"] == "MISS"
+
+
+def test_etag_matches_if_none_match() -> None:
+    """`If-None-Match` сравнивается слабо и может содержать список ETag."""
+    rows = [SimpleNamespace(id=1, updated_at=datetime(2026, 1, 1))]
+    etag = rows_etag("page", rows)
+
+    def request(header):
+        headers = {"if-none-match": header} if header is not None else {}
+        return SimpleNamespace(headers=headers)
+
+    assert etag_matches(request(etag), etag)
+    assert etag_matches(request(f'"other", W/{etag}'), etag)
+    assert etag_matches(request("*"), etag)
+    assert not etag_matches(request(None), etag)
+    assert not etag_matches(request('"other"'), etag)
+
+    rows[0].updated_at = datetime(2026, 1, 2)
+    assert rows_etag("page", rows) != etag
+
+
+def test_search_statement_highlights_only_page() -> None:
+    """Поиск фильтрует по GIN-индексу, а ts_headline считает только для страницы."""
+    sql = str(
+        search_statement("phone", limit=21, after=(0.5, 10)).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    outer, page = sql.split("JOIN (SELECT", 1)
+    assert "ts_headline" in outer and "ts_headline" not in page
+    assert "products.search_vector @@ websearch_to_tsquery" in page
+    assert "LIMIT" in page
+
+
+def test_search_highlight_is_escaped() -> None:
+    """Текст поставщика в подсветке экранируется; разметка — только <b> вокруг совпадений."""
+    marked = "<img src=x onerror=alert(1)> red \x02phone\x03 & \x02<script>\x03 \x02"
+    assert render_highlight(marked) == (
+        "&lt;img src=x onerror=alert(1)&gt; red <b>phone</b> &amp; <b>&lt;script&gt;</b> "
+    )
+    assert render_highlight("plain <i>") == "plain &lt;i&gt;"
+    assert render_highlight(None) is None
+
+
+def test_suggest_prefix_index() -> None:
+    """Префикс ищется по началу любого слова, top-k — по рейтингу."""
+    index = PrefixIndex()
+    index.load(
+        [
+            SuggestEntry(1, "Красный телефон", "red-phone", 4.0),
+            SuggestEntry(2, "Телевизор", "tv", 5.0),
+            SuggestEntry(3, "Чехол для телефона", "case", 3.0),
+        ]
+    )
+    assert [entry.id for entry in index.search("ТЕЛ", 10)] == [2, 1, 3]
+    assert [entry.id for entry in index.search("телеф", 1)] == [1]
+
+    index.put(SuggestEntry(1, "Синий смартфон", "blue-phone", 4.0))
+    index.remove(2)
+    index.set_rating(3, 4.5)
+    assert [entry.id for entry in index.search("тел", 10)] == [3]
+    assert [entry.id for entry in index.search("см", 10)] == [1]
+    assert len(index) == 2
+
+
+def test_suggest_top_lists_stay_exact() -> None:
+    """Хранимые top-списки широких префиксов совпадают с полным перебором."""
+    rng = random.Random(7)
+    index = PrefixIndex()
+    index.load(
+        SuggestEntry(i, f"phone {i % 97} case", f"p{i}", rng.randint(0, 50))
+        for i in range(3 * SCAN_LIMIT)
+    )
+    for step in range(300):
+        entry_id = rng.randrange(3 * SCAN_LIMIT + 100)
+        if step % 3 == 0:
+            index.remove(entry_id)
+        elif step % 3 == 1:
+            index.set_rating(entry_id, rng.randint(0, 50))
+        else:
+            index.put(SuggestEntry(entry_id, f"phone x{step}", "s", rng.randint(0, 50)))
+
+    expected = sorted(
+        index._by_id.values(), key=lambda entry: (-entry.rating, entry.name)
+    )
+    assert index.search("p", 20) == expected[:20]
+    assert index.search("phone", 20) == expected[:20]
+
+
+def test_suggest_memory_footprint() -> None:
+    """Индекс занимает не больше ~0,7 ГБ на миллион названий (см. app/backend/suggest.py)."""
+    count = 20_000
+    rng = random.Random(1)
+    words = [f"{word}{i}" for i in range(500) for word in ("телефон", "phone")]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        index = PrefixIndex()
+        index.load(
+            SuggestEntry(
+                i,
+                f"{rng.choice(words)} {rng.choice(words)}",
+                f"product-{i}",
+                rng.random() * 5,
+            )
+            for i in range(count)
+        )
+        gc.collect()
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(index) == count
+    assert used / count < 700
+
+
+def test_export_serializers() -> None:
+    """Пачка строк выгрузки сериализуется в NDJSON и CSV одинаково по полям."""
+    updated_at = datetime(2026, 1, 2, 3, 4, 5)
+    row = (
+        1,
+        'Чехол "Люкс"',
+        "case",
+        "a, b\nc",
+        100,
+        "u",
+        5,
+        4.5,
+        2,
+        3,
+        True,
+        updated_at,
+    )
+
+    item = json.loads(ndjson_chunk([row, row]).decode().splitlines()[1])
+    assert list(item) == list(EXPORT_FIELDS)
+    assert (
+        item["name"] == 'Чехол "Люкс"' and item["updated_at"] == updated_at.isoformat()
+    )
+
+    table = list(csv.reader(io.StringIO((csv_header() + csv_chunk([row])).decode())))
+    assert table[0] == list(EXPORT_FIELDS)
+    assert table[1][1:4] == ['Чехол "Люкс"', "case", "a, b\nc"]
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_parsers() -> None:
+    """Строки собираются из кусков, разрезанных посреди символа и записи."""
+    body = 'name,price\r\n"Чехол ""Люкс""",10\n"две\nстроки",20\nx\n' + "y" * 50 + "\n"
+    records = [
+        record async for record in iter_csv(iter_lines(_chunks(body.encode(), 3), 40))
+    ]
+    assert records == [
+        (2, {"name": 'Чехол "Люкс"', "price": "10"}, None),
+        (3, {"name": "две\nстроки", "price": "20"}, None),
+        (5, None, "Expected 2 columns, got 1"),
+        (6, None, "Line is too long"),
+    ]
+
+    body = '{"name": "Телефон"}\n\n{bad\n[1]'.encode()
+    records = [record async for record in iter_ndjson(iter_lines(_chunks(body, 5)))]
+    assert [number for number, _, _ in records] == [1, 3, 4]
+    assert records[0][1] == {"name": "Телефон"}
+    assert records[1][2].startswith("Invalid JSON")
+    assert records[2][1:] == ([1], None)
+
+
+def test_bulk_upsert_statement() -> None:
+    """Поставщик перезаписывает только свои продукты; администратор — любые."""
+    own = str(upsert_statement(own_only=True).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (slug) DO UPDATE" in own
+    assert "WHERE products.supplier_id = excluded.supplier_id" in own
+    assert "FROM bulk_products" in own and "RETURNING" in own
+    any_owner = str(
+        upsert_statement(own_only=False).compile(dialect=postgresql.dialect())
+    )
+    assert "excluded.supplier_id" not in any_owner
+
+
+def test_bulk_stock_update_statement() -> None:
+    """Одна пачка — один UPDATE ... FROM (VALUES ...); владение проверяется в SQL."""
+    items = [
+        (0, UpdateProductStock(id=1, price=10)),
+        (3, UpdateProductStock(slug="phone", stock=0)),
+    ]
+    sql = str(
+        stock_update_statement(items, supplier_id=7).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert sql.startswith("UPDATE products SET") and "FROM (VALUES" in sql
+    assert "products.supplier_id = " in sql
+    assert "supplier_id" not in str(
+        stock_update_statement(items, supplier_id=None).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    with pytest.raises(ValueError):
+        UpdateProductStock(id=1, slug="phone", price=1)
+    with pytest.raises(ValueError):
+        UpdateProductStock(id=1)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_catalog_fallbacks(catalog) -> None:
+    """На SQLite поиск, выгрузка и пакетные операции работают без возможностей PostgreSQL."""
+    headers = {"Authorization": f"Bearer {catalog['supplier']}"}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/products/search", params={"q": "phone -charger"})
+        assert response.status_code == 200
+        assert [item["slug"] for item in response.json()["items"]] == ["red-phone"]
+
+        response = await client.get("/products/export")
+        assert [json.loads(line)["slug"] for line in response.text.splitlines()] == [
+            "red-phone",
+            "blue-phone",
+            "cable",
+        ]
+
+        response = await client.patch(
+            "/products/bulk",
+            json=[
+                {"slug": "cable", "stock": 7},
+                {"id": 1, "price": 150},
+                {"id": 99, "stock": 1},
+            ],
+            headers=headers,
+        )
+        body = response.json()
+        assert [
+            (row["slug"], row["price"], row["stock"]) for row in body["updated"]
+        ] == [("cable", 10, 7), ("red-phone", 150, 5)]
+        assert [row["index"] for row in body["rejected"]] == [2]
+
+        # Один продукт по id и по slug — одно изменение, последнее
+        response = await client.patch(
+            "/products/bulk",
+            json=[{"id": 1, "stock": 4}, {"slug": "red-phone", "stock": 2}],
+            headers=headers,
+        )
+        body = response.json()
+        assert [(row["index"], row["stock"]) for row in body["updated"]] == [(1, 2)]
+        assert [(row["index"], row["detail"]) for row in body["rejected"]] == [
+            (0, "Superseded by a later item")
+        ]
+
+        rows = [
+            {
+                "name": "Red phone",
+                "description": "new",
+                "price": 1,
+                "image_url": "",
+                "stock": 1,
+                "category": 1,
+            },
+            {
+                "name": "Green phone",
+                "description": "new",
+                "price": 2,
+                "image_url": "",
+                "stock": 2,
+                "category": 1,
+            },
+        ]
+        response = await client.post(
+            "/products/bulk",
+            content="".join(json.dumps(row) + "\n" for row in rows),
+            headers=headers,
+        )
+        summary = json.loads(response.text.splitlines()[-1])["summary"]
+        assert (summary["created"], summary["updated"], summary["error"]) == (1, 1, 0)
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_postgres_bulk_import(pg_catalog, db_calls) -> None:
+    """Импорт на PostgreSQL: COPY во временную таблицу и один upsert на пачку."""
+    async with session() as ss:
+        await ss.execute(
+            insert(User).values(
+                id=3, username="other", email="o@example.com", is_supplier=True
+            )
+        )
+        await ss.execute(
+            insert(Product).values(
+                name="Other phone",
+                slug="other-phone",
+                description="",
+                price=50,
+                image_url="",
+                stock=3,
+                supplier_id=3,
+                category_id=1,
+                rating=0.0,
+            )
+        )
+        await ss.commit()
+
+    def row(name: str, price: int, category: int = 1) -> dict:
+        return {
+            "name": name,
+            "description": "imported",
+            "price": price,
+            "image_url": "",
+            "stock": 9,
+            "category": category,
+        }
+
+    rows = [
+        row("Red phone", 110),
+        row("Green phone", 120),
+        row("Other phone", 130),
+        row("Lost phone", 140, category=99),
+    ]
+    headers = {"Authorization": f"Bearer {pg_catalog['supplier']}"}
+    db_calls.reset()
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/products/bulk",
+            content="".join(json.dumps(row) + "\n" for row in rows),
+            headers=headers,
+        )
+    *lines, summary = [json.loads(line) for line in response.text.splitlines()]
+    assert {line["line"]: line["status"] for line in lines} == {
+        1: "updated",
+        2: "created",
+        3: "rejected",
+        4: "error",
+    }
+    assert summary["summary"]["rows"] == 4
+    # Пачка переносится из временной таблицы одним INSERT ... ON CONFLICT
+    assert len([sql for sql in db_calls.statements if "FROM bulk_products" in sql]) == 1
+
+    async with session() as ss:
+        products = {
+            product.slug: product
+            for product in await ss.scalars(select(Product).order_by(Product.id))
+        }
+    assert (products["red-phone"].price, products["red-phone"].supplier_id) == (110, 1)
+    assert (products["green-phone"].price, products["green-phone"].supplier_id) == (
+        120,
+        1,
+    )
+    assert (products["other-phone"].price, products["other-phone"].supplier_id) == (
+        50,
+        3,
+    )
+    assert "lost-phone" not in products
+
+
+@pytest.mark.asyncio
+async def test_suggest_index_picks_up_external_changes(catalog) -> None:
+    """Изменения продуктов мимо этого процесса попадают в подсказки после обновления."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+
+        async def suggested(prefix: str) -> list[str]:
+            response = await client.get("/products/suggest", params={"prefix": prefix})
+            return [item["slug"] for item in response.json()["products"]]
+
+        assert await suggested("phone") == ["blue-phone", "red-phone"]
+        # Другой воркер или скрипт: запись в БД без обновления индекса этого процесса
+        async with session() as ss:
+            await ss.execute(
+                update(Product)
+                .where(Product.slug == "red-phone")
+                .values(name="Red handset")
+            )
+            await ss.execute(delete(Product).where(Product.slug == "blue-phone"))
+            await ss.commit()
+        assert await suggested("phone") == ["blue-phone", "red-phone"]
+
+        suggest_index.refreshed_at -= suggest_index.refresh_interval
+        assert await suggested("phone") == []
+        assert await suggested("hand") == ["red-phone"]
+
+
+@pytest.mark.asyncio
+async def test_product_list_rejects_malformed_cursor(catalog) -> None:
+    """Курсор с ключом не того типа — 400, а не ошибка сервера."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/products/", params={"limit": 1, "sort": "price"})
+        cursor = response.json()["next_cursor"]
+        response = await client.get(
+            "/products/", params={"sort": "price", "cursor": cursor}
+        )
+        assert response.status_code == 200
+
+        for sort, values in (
+            ("id", ["id", "asc", {"a": 1}, [1]]),
+            ("id", ["id", "asc", 1, "1"]),
+            ("price", ["price", "asc", "cheap", 1]),
+            ("rating", ["rating", "asc", 1.5, True]),
+        ):
+            response = await client.get(
+                "/products/", params={"sort": sort, "cursor": encode_cursor(*values)}
+            )
+            assert response.status_code == 400, values
+
+        response = await client.get(
+            "/products/phones", params={"cursor": encode_cursor({"a": 1})}
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_product_list_uses_response_model(catalog) -> None:
+    """Список продуктов отдаётся по ProductOut; ответ из кэша совпадает с исходным."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        first = await client.get("/products/")
+        second = await client.get("/products/")
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert first.content == second.content
+    items = first.json()["items"]
+    assert [item["slug"] for item in items] == ["red-phone", "blue-phone"]
+    assert set(items[0]) == set(ProductOut.model_fields)
+    assert datetime.fromisoformat(items[0]["updated_at"])
+
+
+@pytest.mark.asyncio
+async def test_reads_return_rows_without_orm_objects(catalog) -> None:
+    """Запросы read-репозитория отдают кортежи Row и не наполняют identity map."""
+    async with session() as ss:
+        rows = await reads.fetch_all(
+            ss, reads.product_page_statement("price", True, None, 10)
+        )
+        assert [(row.slug, row.price) for row in rows] == [
+            ("blue-phone", 200),
+            ("red-phone", 100),
+        ]
+        assert len(ss.identity_map) == 0
+
+        after = (rows[0].price, rows[0].id)
+        rows = await reads.fetch_all(
+            ss, reads.product_page_statement("price", True, after, 10)
+        )
+        assert [row.slug for row in rows] == ["red-phone"]
+
+        subtree = reads.category_subtree(reads.categories.c.id == 1)
+        rows = await reads.fetch_all(
+            ss, reads.category_products_statement(select(subtree.c.id), None, 10)
+        )
+        assert [row.name for row in rows] == ["Red phone", "Blue phone"]
+        assert await reads.fetch_one(ss, reads.category_id_statement("missing")) is None
+
+
+@pytest.mark.asyncio
+async def test_product_writes_take_one_statement(catalog, db_calls) -> None:
+    """Создание, изменение и удаление продукта — один запрос с RETURNING и один коммит."""
+    supplier = {"Authorization": f"Bearer {catalog['supplier']}"}
+    admin = {"Authorization": f"Bearer {catalog['admin']}"}
+    other = {
+        "Authorization": "Bearer "
+        + issue_tokens(
+            CurrentUser(id=3, username="other", is_supplier=True)
+        ).access_token
+    }
+    body = {
+        "name": "Green phone",
+        "description": "",
+        "price": 5,
+        "image_url": "",
+        "stock": 1,
+        "category": 1,
+    }
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        db_calls.reset()
+        response = await client.post("/products/create", json=body, headers=supplier)
+        assert response.status_code == 200
+        assert db_calls.counts == (1, 1)
+
+        db_calls.reset()
+        response = await client.post(
+            "/products/create", json={**body, "category": 99}, headers=supplier
+        )
+        assert response.status_code == 404
+        assert db_calls.counts == (1, 0)
+
+        db_calls.reset()
+        response = await client.put(
+            "/products/detail/red-phone",
+            json={**body, "name": "Red phone"},
+            headers=supplier,
+        )
+        assert response.status_code == 200
+        assert db_calls.counts == (1, 1)
+
+        # Ни одна строка не изменилась: только тогда продукт ищется, чтобы выбрать 403 или 404
+        for slug, status_code in (("red-phone", 403), ("missing", 404)):
+            db_calls.reset()
+            response = await client.put(
+                f"/products/detail/{slug}", json=body, headers=other
+            )
+            assert response.status_code == status_code
+            assert db_calls.counts == (2, 0)
+
+        # Удалять продукты может только администратор, в том числе свои — не поставщик
+        db_calls.reset()
+        response = await client.delete(
+            "/products/delete", params={"product_slug": "cable"}, headers=supplier
+        )
+        assert response.status_code == 403
+        assert db_calls.counts == (0, 0)
+        response = await client.delete(
+            "/products/delete", params={"product_slug": "missing"}, headers=admin
+        )
+        assert response.status_code == 404
+
+        db_calls.reset()
+        response = await client.delete(
+            "/products/delete", params={"product_slug": "cable"}, headers=admin
+        )
+        assert response.status_code == 200
+        assert db_calls.counts == (1, 1)
+        response = await client.get("/products/detail/cable")
+        assert response.status_code == 404
@@ -13,4 +13,191 @@
 
 Примеры тестов:
 - Проверка корневого эндпоинта `/all_reviews` на корректный статус-код и тело ответа.
-"""
\ No newline at end of file
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+
+from app.backend import rating_queue as rating_queue_module
+from app.backend.db import session
+from app.backend.ratings import is_drifted
+from app.main import app
+from app.backend.rating_queue import RatingQueue
+from app.backend.pagination import (
+    decode_cursor,
+    decode_datetime,
+    encode_cursor,
+    make_page,
+)
+
+
+def test_cursor_roundtrip() -> None:
+    """Курсор отзывов кодирует пару (comment_date, id) без потерь."""
+    date = datetime(2025, 9, 11, 14, 21, 14, 695871)
+    values = decode_cursor(encode_cursor(date, 42))
+    assert decode_datetime(values[0]) == date
+    assert values[1] == 42
+
+
+def test_invalid_cursor() -> None:
+    """Повреждённый курсор отклоняется с кодом 400."""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_make_page() -> None:
+    """Лишняя строка выборки превращается в курсор следующей страницы."""
+    rows, next_cursor = make_page([1, 2, 3], 2, lambda row: (row,))
+    assert rows == [1, 2]
+    assert decode_cursor(next_cursor) == [2]
+    assert make_page([1, 2], 2, lambda row: (row,)) == ([1, 2], None)
+
+
+def test_rating_drift_detection() -> None:
+    """Расхождение суммы, количества или рейтинга с отзывами обнаруживается."""
+    assert not is_drifted(1, 10.0, 2, 10.0, 2, 5.0)
+    assert not is_drifted(1, 0.0, 0, 0.0, 0, 0.0)
+    assert is_drifted(1, 10.0, 3, 10.0, 2, 5.0)
+    assert is_drifted(1, 9.0, 2, 10.0, 2, 5.0)
+    assert is_drifted(1, 10.0, 2, 10.0, 2, 0.0)
+
+
+class RecordingSession:
+    """Заглушка сессии PostgreSQL, запоминающая выполненные запросы."""
+
+    statements: list = []
+    bind = SimpleNamespace(dialect=postgresql.dialect())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def all(self):
+        return []
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_rating_queue_coalesces_deltas() -> None:
+    """Дельты одного продукта складываются и сбрасываются одним запросом."""
+    RecordingSession.statements = []
+    queue = RatingQueue(
+        maxsize=100, window=60, batch_size=100, session_factory=RecordingSession
+    )
+    queue.start()
+    assert queue.submit(1, 5.0, 1)
+    assert queue.submit(2, 3.0, 1)
+    assert queue.submit(1, -5.0, -1)
+    assert queue.submit(1, 8.0, 1)
+    await queue.stop()
+
+    assert len(RecordingSession.statements) == 1
+    params = RecordingSession.statements[0].compile().params
+    assert list(params.values())[-6:] == [1, 8.0, 1, 2, 3.0, 1]
+    assert queue.flushes == 1 and queue.depth == 0
+    assert not queue.submit(1, 1.0, 1)
+
+
+@pytest.mark.asyncio
+async def test_rating_queue_restarts_crashed_task() -> None:
+    """Упавшая фоновая задача перезапускается и не теряет дельты из очереди."""
+    RecordingSession.statements = []
+    queue = RatingQueue(
+        maxsize=100, window=60, batch_size=100, session_factory=RecordingSession
+    )
+    queue.start()
+    crashed = queue._task
+    queue._queue.put_nowait(("broken",))  # _merge не распакует такую дельту
+    assert queue.submit(1, 5.0, 1)
+    await asyncio.wait([crashed])
+    assert queue.task_failures == 1 and queue.running
+    await queue.stop()
+
+    assert len(RecordingSession.statements) == 1
+    params = RecordingSession.statements[0].compile().params
+    assert list(params.values())[-3:] == [1, 5.0, 1]
+
+
+@pytest.mark.asyncio
+async def test_dead_rating_queue_applies_ratings(catalog, monkeypatch) -> None:
+    """Если фоновая задача очереди погибла, рейтинг применяется в транзакции отзыва."""
+    queue = RatingQueue(maxsize=100, window=60, batch_size=100, session_factory=session)
+    monkeypatch.setattr(rating_queue_module, "rating_queue", queue)
+    queue.start()
+    queue._task.cancel()
+    await asyncio.wait([queue._task])
+    assert not queue.running and not queue.accepting
+
+    customer = {"Authorization": f"Bearer {catalog['customer']}"}
+    review = {"id": 0, "rating": 8, "comment": "ok", "user_id": 2, "product_id": 1}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/review/add_review", json=review, headers=customer
+        )
+        assert response.status_code == 200
+        response = await client.get("/products/")
+        ratings = {item["id"]: item["rating"] for item in response.json()["items"]}
+        assert ratings[1] == 8
+
+    assert queue.fallbacks == 1 and queue.task_failures == 1
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_review_writes_take_one_statement(catalog, db_calls) -> None:
+    """Отзыв добавляется и удаляется одним запросом с RETURNING (плюс обновление
+    рейтинга, когда очередь рейтингов не запущена) и одним коммитом."""
+    customer = {"Authorization": f"Bearer {catalog['customer']}"}
+    admin = {"Authorization": f"Bearer {catalog['admin']}"}
+    review = {"id": 0, "rating": 8, "comment": "ok", "user_id": 2, "product_id": 1}
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        db_calls.reset()
+        response = await client.post(
+            "/review/add_review", json=review, headers=customer
+        )
+        assert response.status_code == 200
+        assert db_calls.counts == (2, 1)
+
+        db_calls.reset()
+        response = await client.post(
+            "/review/add_review", json={**review, "product_id": 99}, headers=customer
+        )
+        assert response.status_code == 404
+        assert db_calls.counts == (1, 0)
+
+        response = await client.get("/review/products_reviews/red-phone")
+        review_id = response.json()["items"][0]["id"]
+        # Удаление, повторное удаление (ничего не меняет) и несуществующий отзыв
+        for review_id, status_code, counts in (
+            (review_id, 200, (2, 1)),
+            (review_id, 200, (2, 0)),
+            (99, 404, (2, 0)),
+        ):
+            db_calls.reset()
+            response = await client.patch(
+                "/review/delete_reviews", params={"review_id": review_id}, headers=admin
+            )
+            assert response.status_code == status_code
+            assert db_calls.counts == counts
+
+        response = await client.get("/products/")
+        assert response.json()["items"][0]["rating"] == 0